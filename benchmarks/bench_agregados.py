@@ -0,0 +1,91 @@
+"""Benchmark: saldo do dia e estatísticas pelas tabelas agregadas x varredura das tabelas brutas.
+
+Popula um banco temporário com `dias` dias de rodadas (uma a cada 30 s) e
+apostas de `usuarios` usuários, compara o tempo das leituras e confere que
+os agregados mantidos pelos triggers batem com o recálculo completo.
+
+Uso: python benchmarks/bench_agregados.py [dias] [usuarios]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ["BLAZE_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+from src import agregados
+from src.banco import DIA_MS, agora_ms, conexao, inicio_do_dia_ms
+from src.migracoes import aplicar_migracoes
+from src.modelo import BRANCO, PRETO, VERMELHO
+
+CORES = (BRANCO, VERMELHO, PRETO)
+
+# Como obter_saldo_do_dia e as estatísticas eram calculados antes dos agregados
+SALDO_POR_VARREDURA = """
+    SELECT SUM(CASE resultado WHEN 'win' THEN valor WHEN 'loss' THEN -valor ELSE 0 END)
+    FROM apostas WHERE data >= ? AND data < ? AND usuario_id = ?
+"""
+CORES_POR_VARREDURA = "SELECT cor, COUNT(*) FROM resultados WHERE created_at >= ? AND created_at < ? GROUP BY cor"
+
+
+def popular(dias, usuarios):
+    aleatorio = random.Random(13)
+    fim = agora_ms()
+    inicio = fim - dias * DIA_MS
+    rodadas = [(n, CORES[0] if n == 0 else CORES[1 + (n > 7)], t)
+               for t in range(inicio, fim, 30_000) for n in (aleatorio.randrange(15),)]
+    apostas = [(t, 2.0, aleatorio.choice(("win", "loss")), 1 + i % usuarios)
+               for i, (_, _, t) in enumerate(rodadas)]
+    inicio_carga = time.perf_counter()
+    with conexao() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("INSERT INTO resultados (numero, cor, created_at) VALUES (?, ?, ?)", rodadas)
+        conn.executemany("INSERT INTO apostas (data, valor, resultado, usuario_id) VALUES (?, ?, ?, ?)", apostas)
+    return len(rodadas), len(apostas), time.perf_counter() - inicio_carga
+
+
+def medir(funcao, repeticoes=200):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+def main(dias, usuarios):
+    aplicar_migracoes()
+    rodadas, apostas, carga = popular(dias, usuarios)
+    print(f"{rodadas} rodadas e {apostas} apostas de {usuarios} usuário(s) em {dias} dia(s), "
+          f"gravadas com os triggers em {carga:.2f} s")
+
+    hoje = inicio_do_dia_ms()
+
+    def saldo_varredura():
+        with conexao() as conn:
+            return conn.execute(SALDO_POR_VARREDURA, (hoje, hoje + DIA_MS, 1)).fetchone()[0] or 0.0
+
+    def cores_varredura():
+        with conexao() as conn:
+            return dict(conn.execute(CORES_POR_VARREDURA, (hoje, hoje + DIA_MS)).fetchall())
+
+    assert abs(saldo_varredura() - agregados.saldo_do_dia(1)) < 1e-6
+    assert cores_varredura() == agregados.estatisticas_de_cores(horas=1)["dia"]
+
+    print(f"  saldo do dia:   varredura {medir(saldo_varredura):8.1f} µs | "
+          f"agregado {medir(lambda: agregados.saldo_do_dia(1)):6.1f} µs")
+    print(f"  cores do dia:   varredura {medir(cores_varredura):8.1f} µs | "
+          f"agregado {medir(lambda: agregados.estatisticas_de_cores(horas=1)):6.1f} µs")
+    print(f"  histórico 7d:   agregado {medir(lambda: agregados.historico_do_usuario(1)):6.1f} µs")
+
+    inicio = time.perf_counter()
+    linhas = agregados.reconstruir_agregados()
+    print(f"  reconstrução completa: {time.perf_counter() - inicio:.2f} s {linhas}")
+    print(f"  divergências: {agregados.verificar_agregados()}")
+
+
+if __name__ == "__main__":
+    argumentos = [int(a) for a in sys.argv[1:]]
+    dias, usuarios = (argumentos + [30, 50][len(argumentos):])[:2]
+    main(dias, usuarios)
@@ -0,0 +1,41 @@
+"""Benchmark: cálculo das features e avaliação de todas as regras do analisador.
+
+Uso: python benchmarks/bench_analisador.py [rodadas]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.analisador import REGRAS, Features, Historico, avaliar_regras
+
+
+def main():
+    rodadas = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    numeros = np.random.default_rng(42).integers(0, 15, rodadas).astype(np.int8)
+    cores = np.where(numeros == 0, 0, np.where(numeros <= 7, 1, 2)).astype(np.int8)
+    historico = Historico(cores, numeros)
+
+    repeticoes = 20
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        features = Features(historico)
+    tempo_features = (time.perf_counter() - inicio) / repeticoes
+
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        sinais = avaliar_regras(features)
+    tempo_regras = (time.perf_counter() - inicio) / repeticoes
+
+    print(f"Rodadas: {rodadas:,}, regras: {len(REGRAS)}")
+    print(f"Features: {tempo_features * 1000:.2f} ms")
+    print(f"Regras:   {tempo_regras * 1000:.2f} ms")
+    for nome, sinal in sinais.items():
+        print(f"  {nome}: {np.count_nonzero(sinal >= 0):,} sinais")
+
+
+if __name__ == "__main__":
+    main()
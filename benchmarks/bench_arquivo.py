@@ -0,0 +1,92 @@
+"""Benchmark: histórico no SQLite x arquivo colunar (tamanho e tempo de carga do analisador).
+
+Gera `dias` dias de rodadas (uma a cada ~30 s), grava na tabela
+`resultados`, move tudo para o arquivo colunar com `arquivar` e compara o
+espaço ocupado e o tempo para carregar o histórico como arrays NumPy.
+
+Uso: python benchmarks/bench_arquivo.py [dias]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+_pasta = tempfile.mkdtemp()
+os.environ["BLAZE_DB_PATH"] = os.path.join(_pasta, "bench.db")
+
+import numpy as np
+
+from src.analisador import Historico
+from src.arquivo import CAMINHO_ARQUIVO, ArquivoColunar, arquivar
+from src.banco import DIA_MS, conexao, inicio_do_dia_ms
+from src.migracoes import aplicar_migracoes
+from src.modelo import BRANCO, PRETO, VERMELHO
+
+CORES = (BRANCO, VERMELHO, PRETO)
+
+
+def popular(dias):
+    aleatorio = random.Random(14)
+    fim = inicio_do_dia_ms() - 8 * DIA_MS
+    t = fim - dias * DIA_MS
+    rodadas = []
+    while t < fim:
+        numero = aleatorio.randrange(15)
+        rodadas.append((numero, CORES[0] if numero == 0 else CORES[1 + (numero > 7)], t))
+        t += 30_000 + aleatorio.randrange(-300, 300)
+    with conexao() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("INSERT INTO resultados (numero, cor, created_at) VALUES (?, ?, ?)", rodadas)
+    with conexao() as conn:
+        conn.execute("VACUUM")
+    return len(rodadas)
+
+
+def medir(funcao, repeticoes=3):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main(dias):
+    aplicar_migracoes()
+    with conexao() as conn:
+        conn.execute("VACUUM")
+    vazio = os.path.getsize(os.environ["BLAZE_DB_PATH"])
+    rodadas = popular(dias)
+    tamanho_banco = os.path.getsize(os.environ["BLAZE_DB_PATH"]) - vazio
+
+    tempo_banco, do_banco = medir(Historico.do_banco)
+    inicio = time.perf_counter()
+    arquivar(dias_quentes=7)
+    tempo_arquivar = time.perf_counter() - inicio
+    tamanho_arquivo = os.path.getsize(CAMINHO_ARQUIVO)
+    tempo_arquivo, do_arquivo = medir(Historico.do_arquivo)
+
+    assert np.array_equal(do_banco.cores, do_arquivo.cores)
+    assert np.array_equal(do_banco.numeros, do_arquivo.numeros)
+    assert np.array_equal(do_banco.created_at, do_arquivo.created_at)
+
+    # Um dia no meio do histórico: só os blocos com o intervalo são lidos
+    meio = int(do_arquivo.created_at[len(do_arquivo) // 2])
+    with ArquivoColunar() as arquivo:
+        tempo_dia, (cores_dia, _, _) = medir(lambda: arquivo.ler(meio, meio + DIA_MS), repeticoes=20)
+        blocos = len(arquivo.indice)
+
+    print(f"{rodadas} rodadas ({dias} dias)")
+    print(f"  SQLite (tabela + índices): {tamanho_banco / rodadas:6.1f} bytes/rodada | "
+          f"carga do histórico {tempo_banco * 1000:7.1f} ms")
+    print(f"  arquivo colunar:           {tamanho_arquivo / rodadas:6.2f} bytes/rodada | "
+          f"carga do histórico {tempo_arquivo * 1000:7.1f} ms ({blocos} blocos)")
+    print(f"  um dia do arquivo: {len(cores_dia)} rodadas em {tempo_dia * 1000:.2f} ms; "
+          f"arquivamento em {tempo_arquivar:.2f} s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 365)
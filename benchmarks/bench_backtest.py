@@ -0,0 +1,53 @@
+"""Benchmark: backtest de um ano de rodadas e varredura de parâmetros em paralelo.
+
+Uso: python benchmarks/bench_backtest.py [dias]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.analisador import REGRAS, Historico
+from src.backtest import executar_backtest, varrer_parametros
+
+
+def historico_sintetico(dias):
+    rodadas = dias * 24 * 60 * 2  # uma rodada a cada 30 s
+    numeros = np.random.default_rng(7).integers(0, 15, rodadas).astype(np.int8)
+    cores = np.where(numeros == 0, 0, np.where(numeros <= 7, 1, 2)).astype(np.int8)
+    created_at = 1_735_689_600_000 + np.arange(rodadas, dtype=np.int64) * 30_000
+    return Historico(cores, numeros, created_at)
+
+
+def main():
+    dias = int(sys.argv[1]) if len(sys.argv) > 1 else 365
+    historico = historico_sintetico(dias)
+
+    inicio = time.perf_counter()
+    resultados = executar_backtest(historico)
+    tempo = time.perf_counter() - inicio
+    print(f"{len(historico):,} rodadas ({dias} dias), {len(REGRAS)} regras: {tempo:.2f} s")
+    for r in resultados:
+        resumo = r.resumo()
+        print(f"  {resumo['regra']:<22} apostas={resumo['apostas']:<7} acerto={resumo['taxa_acerto']:.2%} "
+              f"banca_final=R${resumo['banca_final']:.2f} drawdown_max={resumo['drawdown_maximo_pct']:.1%}")
+
+    grade = {
+        "percentual_aposta": [0.01, 0.02, 0.05],
+        "stop_win": [5, 10, 20],
+        "stop_loss": [-5, -10, -20],
+    }
+    inicio = time.perf_counter()
+    resumos = varrer_parametros(grade, historico)
+    tempo = time.perf_counter() - inicio
+    print(f"Varredura: {len(resumos)} combinações em {os.cpu_count()} processos: {tempo:.2f} s")
+    melhor = resumos[0]
+    print(f"  Melhor: {melhor['regra']} percentual={melhor['percentual_aposta']} "
+          f"stops={melhor['stop_win']}/{melhor['stop_loss']} lucro=R${melhor['lucro_total']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
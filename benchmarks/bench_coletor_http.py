@@ -0,0 +1,132 @@
+"""Coletor HTTP adaptativo x polling fixo contra uma API local da Blaze.
+
+As rodadas saem em tempo real a cada `cadencia` s (com atraso aleatório até
+aparecerem na API). O polling antigo (requests.get sem sessão a cada meia
+rodada, como os 15 s de uma rodada de 30 s) e o coletor assíncrono
+(keep-alive, ETag e agenda adaptativa) consultam a mesma API ao mesmo tempo.
+Compara requisições, conexões TCP abertas e a latência de detecção.
+
+Uso: python benchmarks/bench_coletor_http.py [rodadas] [cadencia_s]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+_pasta = tempfile.mkdtemp()
+os.environ["BLAZE_DB_PATH"] = os.path.join(_pasta, "bench.db")
+
+import requests
+from aiohttp import web
+
+from src.banco import iso_para_ms
+from src.coletor import headers
+from src.coletor_http import AgendaAdaptativa, coletar_via_http
+from servidor_blaze_falso import ServidorBlazeFalso
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))] if valores else float("nan")
+
+
+class ApiRecentesFalsa:
+    """Endpoint de rodadas recentes com keep-alive e ETag, contando requisições por cliente."""
+
+    def __init__(self, gerador):
+        self.gerador = gerador
+        self.requisicoes = defaultdict(int)
+        self.nao_modificadas = defaultdict(int)
+        self.conexoes = defaultdict(set)
+
+    async def recentes(self, request):
+        cliente = request.query.get("cliente", "?")
+        self.requisicoes[cliente] += 1
+        self.conexoes[cliente].add(id(request.transport))
+        rodadas = self.gerador.rodadas
+        etag = f'"{rodadas[-1]["id"]}"' if rodadas else '"vazio"'
+        if request.headers.get("If-None-Match") == etag:
+            self.nao_modificadas[cliente] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.json_response(list(reversed(rodadas[-20:])), headers={"ETag": etag})
+
+
+async def main(rodadas, cadencia):
+    inicio = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=1)
+    gerador = ServidorBlazeFalso(inicio=inicio, duracao_rodada=timedelta(seconds=cadencia))
+    api = ApiRecentesFalsa(gerador)
+    app = web.Application()
+    app.router.add_get("/recent/1", api.recentes)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/recent/1"
+
+    visivel_em = {}
+    detectado = {"fixo": {}, "adaptativo": {}}
+    aleatorio = random.Random(7)
+
+    async def publicar():
+        inicio_real = time.time() + (inicio - datetime.now(timezone.utc).replace(tzinfo=None)).total_seconds()
+        for k in range(rodadas):
+            # A rodada aparece na API um pouco depois do created_at
+            alvo = inicio_real + k * cadencia + aleatorio.uniform(0.05, 0.15) * cadencia
+            await asyncio.sleep(max(0.0, alvo - time.time()))
+            rodada = gerador.nova_rodada()
+            visivel_em[iso_para_ms(rodada["created_at"])] = time.perf_counter()
+
+    parar = threading.Event()
+
+    def polling_fixo():
+        # Comportamento anterior: uma conexão nova por consulta e intervalo fixo de meia rodada
+        while not parar.is_set():
+            try:
+                pagina = requests.get(url + "?cliente=fixo", headers=headers, timeout=10).json()
+            except requests.RequestException:
+                pagina = []
+            agora = time.perf_counter()
+            for resultado in pagina:
+                detectado["fixo"].setdefault(iso_para_ms(resultado["created_at"]), agora)
+            parar.wait(cadencia / 2)
+
+    def ao_salvar(novos):
+        agora = time.perf_counter()
+        for _, _, created_at in novos:
+            detectado["adaptativo"].setdefault(created_at, agora)
+
+    agenda = AgendaAdaptativa(cadencia_padrao_ms=cadencia * 1000, intervalo_rapido=cadencia / 60,
+                              intervalo_maximo=cadencia / 2)
+    parar_adaptativo = asyncio.Event()
+    fixo = threading.Thread(target=polling_fixo, daemon=True)
+    fixo.start()
+    coletor = asyncio.create_task(coletar_via_http(url + "?cliente=adaptativo", agenda=agenda,
+                                                   ao_salvar=ao_salvar, parar=parar_adaptativo))
+    await publicar()
+    await asyncio.sleep(cadencia)
+    parar.set()
+    parar_adaptativo.set()
+    await coletor
+    fixo.join()
+    await runner.cleanup()
+
+    print(f"{rodadas} rodadas a cada {cadencia:.1f} s (cadência aprendida: {agenda.cadencia_ms / 1000:.2f} s)")
+    for cliente in ("fixo", "adaptativo"):
+        latencias = [detectado[cliente][t] - v for t, v in visivel_em.items() if t in detectado[cliente]]
+        perdidas = len(visivel_em) - len(latencias)
+        print(f"  {cliente:<10} requisições {api.requisicoes[cliente]:>4} "
+              f"(304: {api.nao_modificadas[cliente]:>3}, conexões TCP: {len(api.conexoes[cliente]):>3})  "
+              f"detecção p50 {percentil(latencias, 0.5) * 1000:6.0f} ms  p95 {percentil(latencias, 0.95) * 1000:6.0f} ms  "
+              f"máx {max(latencias, default=0) * 1000:6.0f} ms  não detectadas {perdidas}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20,
+                     float(sys.argv[2]) if len(sys.argv) > 2 else 3.0))
@@ -0,0 +1,89 @@
+"""Benchmark: abertura de conexões SQLite por ciclo de sinal (por chamada x pool).
+
+Uso: python benchmarks/bench_conexoes.py [ciclos]
+"""
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.banco import PoolConexoes
+
+# Consultas executadas em um ciclo de sinal do bot (enviar_sinal + liquidação)
+CICLO = [
+    ("SELECT banca FROM usuarios WHERE nome = ? AND senha = ?", ("pedro", "1415")),
+    ("SELECT cor FROM resultados ORDER BY created_at DESC LIMIT ?", (100,)),
+    ("INSERT INTO apostas (data, valor, resultado) VALUES (?, ?, ?)", ("2025-01-01 00:00:00", 2.0, "pendente")),
+    ("SELECT cor FROM resultados WHERE created_at >= ? ORDER BY created_at LIMIT 1", ("2025-01-01 00:00:00",)),
+    ("UPDATE apostas SET resultado = ? WHERE data = ?", ("win", "2025-01-01 00:00:00")),
+    ("SELECT banca FROM usuarios WHERE nome = ? AND senha = ?", ("pedro", "1415")),
+    ("UPDATE usuarios SET banca = ? WHERE nome = ? AND senha = ?", (102.0, "pedro", "1415")),
+    ("SELECT SUM(valor) FROM apostas WHERE data = ?", ("2025-01-01",)),
+]
+
+
+def preparar_banco(caminho):
+    conn = sqlite3.connect(caminho)
+    conn.executescript("""
+        CREATE TABLE resultados (id INTEGER PRIMARY KEY AUTOINCREMENT, numero INTEGER, cor TEXT,
+                                 timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, created_at TEXT UNIQUE);
+        CREATE TABLE apostas (id INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT, valor REAL, resultado TEXT);
+        CREATE TABLE usuarios (id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT NOT NULL, senha TEXT NOT NULL,
+                               banca REAL NOT NULL);
+        INSERT INTO usuarios (nome, senha, banca) VALUES ('pedro', '1415', 100.0);
+    """)
+    conn.executemany(
+        "INSERT INTO resultados (numero, cor, created_at) VALUES (?, ?, ?)",
+        [(i % 15, "Vermelho", f"2024-12-31 {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}") for i in range(2000)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def ciclo_por_chamada(caminho):
+    abertas = 0
+    for sql, params in CICLO:
+        conn = sqlite3.connect(caminho)
+        abertas += 1
+        conn.execute(sql, params).fetchall()
+        conn.commit()
+        conn.close()
+    return abertas
+
+
+def ciclo_com_pool(pool):
+    for sql, params in CICLO:
+        with pool.conexao() as conn:
+            conn.execute(sql, params).fetchall()
+
+
+def main():
+    ciclos = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "bench.db")
+        preparar_banco(caminho)
+
+        inicio = time.perf_counter()
+        abertas = sum(ciclo_por_chamada(caminho) for _ in range(ciclos))
+        tempo_antigo = time.perf_counter() - inicio
+
+        pool = PoolConexoes(caminho)
+        inicio = time.perf_counter()
+        for _ in range(ciclos):
+            ciclo_com_pool(pool)
+        tempo_pool = time.perf_counter() - inicio
+        stats = pool.estatisticas()
+        pool.fechar()
+
+    print(f"Ciclos de sinal: {ciclos}")
+    print(f"Por chamada: {abertas / ciclos:.1f} conexões/ciclo, {tempo_antigo / ciclos * 1000:.3f} ms/ciclo")
+    print(f"Com pool:    {stats['conexoes_abertas'] / ciclos:.4f} conexões/ciclo, "
+          f"{tempo_pool / ciclos * 1000:.3f} ms/ciclo ({stats['conexoes_abertas']} abertas no total)")
+    print(f"Speedup: {tempo_antigo / tempo_pool:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
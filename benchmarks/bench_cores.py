@@ -0,0 +1,108 @@
+"""Benchmark: cores como nome (TEXT) x código inteiro da API no caminho do analisador.
+
+Compara, para o mesmo histórico, o formato antigo (cor gravada como
+"Vermelho" e convertida com codigo_cor a cada linha) e o atual (código
+inteiro do banco direto para os arrays NumPy e para o buffer circular).
+
+Uso: python benchmarks/bench_cores.py [rodadas]
+"""
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+_pasta = tempfile.mkdtemp()
+os.environ["BLAZE_DB_PATH"] = os.path.join(_pasta, "bench.db")
+
+import numpy as np
+
+from src.analisador import Features, Historico, avaliar_regras
+from src.banco import conexao
+from src.buffer_resultados import BufferResultados
+from src.migracoes import aplicar_migracoes
+from src.modelo import NOMES_CORES, codigo_cor
+
+
+def gerar_rodadas(quantidade):
+    numeros = np.random.default_rng(15).integers(0, 15, quantidade)
+    cores = np.where(numeros == 0, 0, np.where(numeros <= 7, 1, 2))
+    inicio = 1_735_689_600_000
+    return [(int(n), int(c), inicio + 30_000 * i) for i, (n, c) in enumerate(zip(numeros, cores))]
+
+
+def preparar_banco_texto(caminho, rodadas):
+    """Tabela como era até a migração 4: cor TEXT com o nome capitalizado."""
+    conn = sqlite3.connect(caminho)
+    conn.execute("CREATE TABLE resultados (id INTEGER PRIMARY KEY AUTOINCREMENT, numero INTEGER, cor TEXT, created_at INTEGER)")
+    conn.execute("CREATE INDEX idx_resultados_created_at ON resultados(created_at, cor, numero)")
+    conn.executemany("INSERT INTO resultados (numero, cor, created_at) VALUES (?, ?, ?)",
+                     [(n, NOMES_CORES[c], t) for n, c, t in rodadas])
+    conn.commit()
+    return conn
+
+
+def historico_texto(conn):
+    """Carga do histórico no formato antigo (nome -> código linha a linha)."""
+    linhas = conn.execute("SELECT numero, cor, created_at FROM resultados ORDER BY created_at").fetchall()
+    numeros = [n if isinstance(n, int) else -1 for n, _, _ in linhas]
+    cores = [codigo_cor(c) for _, c, _ in linhas]
+    created_at = [t or 0 for _, _, t in linhas]
+    return Historico(cores, numeros, created_at)
+
+
+def buffer_texto(conn):
+    buffer = BufferResultados()
+    for id_resultado, numero, cor, created_at in conn.execute("SELECT id, numero, cor, created_at FROM resultados"):
+        buffer.adicionar(numero, codigo_cor(cor), id_resultado, created_at)
+    return buffer
+
+
+def buffer_codigo():
+    buffer = BufferResultados()
+    with conexao() as conn:
+        for id_resultado, numero, cor, created_at in conn.execute("SELECT id, numero, cor, created_at FROM resultados"):
+            buffer.adicionar(numero, cor, id_resultado, created_at)
+    return buffer
+
+
+def medir(funcao, repeticoes=5):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main(quantidade):
+    rodadas = gerar_rodadas(quantidade)
+    texto = preparar_banco_texto(os.path.join(_pasta, "texto.db"), rodadas)
+    aplicar_migracoes()
+    with conexao() as conn:
+        conn.executemany("INSERT INTO resultados (numero, cor, created_at) VALUES (?, ?, ?)", rodadas)
+
+    tempo_texto, antigo = medir(lambda: historico_texto(texto))
+    tempo_codigo, atual = medir(Historico.do_banco)
+    assert np.array_equal(antigo.cores, atual.cores) and np.array_equal(antigo.numeros, atual.numeros)
+
+    tempo_buffer_texto, _ = medir(lambda: buffer_texto(texto))
+    tempo_buffer_codigo, _ = medir(buffer_codigo)
+
+    # Ciclo completo do analisador: carga + features + regras
+    tempo_ciclo_texto, _ = medir(lambda: avaliar_regras(Features(historico_texto(texto))))
+    tempo_ciclo_codigo, _ = medir(lambda: avaliar_regras(Features(Historico.do_banco())))
+
+    print(f"{quantidade} rodadas")
+    print(f"  carga do histórico:      texto {tempo_texto * 1000:8.1f} ms | código {tempo_codigo * 1000:8.1f} ms "
+          f"({tempo_texto / tempo_codigo:.1f}x)")
+    print(f"  buffer (rodada a rodada): texto {tempo_buffer_texto * 1000:7.1f} ms | código {tempo_buffer_codigo * 1000:8.1f} ms "
+          f"({tempo_buffer_texto / tempo_buffer_codigo:.1f}x)")
+    print(f"  ciclo do analisador:     texto {tempo_ciclo_texto * 1000:8.1f} ms | código {tempo_ciclo_codigo * 1000:8.1f} ms "
+          f"({tempo_ciclo_texto / tempo_ciclo_codigo:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,81 @@
+"""Despachante de mensagens contra a Bot API falsa: limites de taxa, 429 e edições.
+
+Cada chat recebe um sinal seguido do resultado (que vira edição do sinal) e
+de um aviso avulso. O servidor recusa com 429 chamadas no mesmo chat com
+menos de `intervalo` s de distância, então as rajadas por chat acima disso
+precisam ser repetidas respeitando o `retry_after`.
+
+Uso: python benchmarks/bench_despachante.py [chats]
+"""
+import os
+import sys
+import time
+import asyncio
+from collections import defaultdict
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from telegram import Bot
+from telegram.request import HTTPXRequest
+
+from src.despachante import Despachante
+from servidor_telegram_falso import ServidorTelegramFalso
+
+
+async def rodar(chats, servidor, bot, rajada_por_chat, taxa_global):
+    servidor.mensagens.clear()
+    servidor.recusadas_429 = 0
+    servidor._ultimo_envio_chat.clear()
+    despachante = Despachante(bot, taxa_global=taxa_global, rajada_global=taxa_global,
+                              taxa_por_chat=1, rajada_por_chat=rajada_por_chat, trabalhadores=64)
+    despachante.iniciar()
+
+    inicio = time.perf_counter()
+    futuros = []
+    for chat_id in range(chats):
+        chave = f"sinal:{chat_id}"
+        futuros.append(despachante.enviar(chat_id, "🎯 Sinal: VERMELHO\n🔄 Aguardando...", chave))
+        # Metade dos resultados chega antes do sinal sair (agrupado), o resto vira edição
+        if chat_id % 2:
+            despachante.enviar(chat_id, "🎯 Sinal: VERMELHO\n✅ WIN", chave, ultima=True)
+        futuros.append(despachante.enviar(chat_id, "📊 Saldo do dia: R$2.00"))
+    await asyncio.gather(*futuros)
+    for chat_id in range(0, chats, 2):
+        futuros.append(despachante.enviar(chat_id, "🎯 Sinal: VERMELHO\n❌ LOSS", f"sinal:{chat_id}", ultima=True))
+    await asyncio.gather(*futuros)
+    total = time.perf_counter() - inicio
+    metricas = despachante.metricas()
+    await despachante.parar()
+
+    # Ordem por chat e conteúdo final de cada mensagem no servidor
+    por_chat = defaultdict(list)
+    for metodo, parametros, _ in servidor.mensagens:
+        if metodo in ("sendMessage", "editMessageText"):
+            por_chat[int(parametros["chat_id"])].append((metodo, parametros["text"]))
+    erros = 0
+    for chat_id in range(chats):
+        chamadas = por_chat[chat_id]
+        esperado_sinal = "✅ WIN" if chat_id % 2 else "❌ LOSS"
+        if chamadas[0][0] != "sendMessage" or "Sinal" not in chamadas[0][1] or esperado_sinal not in chamadas[-1][1] + chamadas[0][1]:
+            erros += 1
+
+    print(f"{chats} chats, rajada por chat {rajada_por_chat}: {total:.2f} s, "
+          f"429 do servidor {servidor.recusadas_429}, métricas {metricas}, chats inconsistentes {erros}")
+    return erros == 0 and metricas["falhas"] == 0 and metricas["repetidas_429"] == servidor.recusadas_429
+
+
+async def main(chats):
+    servidor = await ServidorTelegramFalso(intervalo_por_chat=0.5, retry_after=1).iniciar()
+    bot = Bot("123:falso", base_url=servidor.base_url,
+              request=HTTPXRequest(connection_pool_size=64, pool_timeout=60))
+    async with bot:
+        # Rajada acima do que o servidor aceita: os 429 são repetidos após o retry_after
+        ok = await rodar(chats, servidor, bot, rajada_por_chat=3, taxa_global=500)
+        # Limite por chat compatível com o servidor: nenhum 429
+        ok = await rodar(chats, servidor, bot, rajada_por_chat=1, taxa_global=500) and ok
+    await servidor.parar()
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)) else 1)
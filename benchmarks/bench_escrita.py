@@ -0,0 +1,91 @@
+"""Benchmark: milhares de usuários liquidando ao mesmo tempo, commit por escrita x escritor em lote.
+
+Cada usuário simulado registra a aposta (INSERT), espera a rodada (gravada
+pelo coletor em outra thread) e grava o resultado da aposta e a nova banca
+(UPDATEs pela chave primária). "por operação" é o caminho anterior, uma
+transação por escrita no executor; "em lote" passa tudo pelo EscritorEmLote
+(src/escrita.py). Mostra escritas por segundo e o atraso máximo do event loop.
+
+Uso: python benchmarks/bench_escrita.py [usuarios]
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ["BLAZE_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "escrita.db")
+
+from src import consultas
+from src.banco import agora_ms, conexao, fechar_pool
+from src.coletor import criar_tabela, salvar_resultado
+from src.escrita import EscritorEmLote
+from src.modelo import PRETO, VERMELHO
+
+
+def _escrever(sql, parametros):
+    with conexao() as conn:
+        cursor = conn.execute(sql, parametros)
+        return cursor.lastrowid
+
+
+async def por_operacao(sql, parametros):
+    return await asyncio.to_thread(_escrever, sql, parametros)
+
+
+async def medir_atraso_do_loop(atrasos, parar):
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        await asyncio.sleep(0.001)
+        atrasos.append(time.perf_counter() - inicio - 0.001)
+
+
+async def simular(nome, escrever, usuarios, rodada):
+    async def usuario(usuario_id):
+        cor = VERMELHO if usuario_id % 2 else PRETO
+        id_aposta = await escrever(consultas.INSERIR_APOSTA, (agora_ms(), 2.0, "pendente", usuario_id))
+        resultado = "win" if cor == (await rodada)[1] else "loss"
+        await escrever(consultas.ATUALIZAR_RESULTADO_APOSTA, (resultado, id_aposta))
+        await escrever(consultas.ATUALIZAR_BANCA, (100.0 + (2.0 if resultado == "win" else -2.0), usuario_id))
+
+    atrasos, parar = [], asyncio.Event()
+    monitor = asyncio.create_task(medir_atraso_do_loop(atrasos, parar))
+    inicio = time.perf_counter()
+    tarefas = [asyncio.create_task(usuario(usuario_id)) for usuario_id in usuarios]
+    await asyncio.sleep(0)
+    # A rodada chega enquanto as apostas ainda estão sendo registradas, como em um pico real
+    numero, cor = 5, VERMELHO
+    await asyncio.to_thread(salvar_resultado, numero, cor, agora_ms() + 1000)
+    rodada.set_result((numero, cor))
+    await asyncio.gather(*tarefas)
+    tempo = time.perf_counter() - inicio
+    parar.set()
+    await monitor
+
+    escritas = len(usuarios) * 3
+    print(f"  {nome:13s} {escritas} escritas em {tempo:6.2f} s | {escritas / tempo:9,.0f} escritas/s | "
+          f"maior atraso do loop {max(atrasos) * 1000:6.1f} ms")
+
+
+async def main(quantidade):
+    criar_tabela()
+    with conexao() as conn:
+        conn.executemany("INSERT INTO usuarios (nome, senha, banca) VALUES (?, ?, ?)",
+                         ((f"usuario{i}", "senha", 100.0) for i in range(quantidade)))
+        usuarios = [linha[0] for linha in conn.execute("SELECT id FROM usuarios ORDER BY id")]
+
+    print(f"{quantidade} usuários liquidando ao mesmo tempo (aposta + resultado + banca)")
+    loop = asyncio.get_running_loop()
+    await simular("por operação", por_operacao, usuarios, loop.create_future())
+
+    escritor = EscritorEmLote().iniciar()
+    await simular("em lote", escritor.executar, usuarios, loop.create_future())
+    escritor.parar()
+    print(f"  em lote: {escritor.escritas} escritas em {escritor.lotes} transações")
+    fechar_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000))
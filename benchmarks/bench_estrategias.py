@@ -0,0 +1,74 @@
+"""Benchmark: estratégias em modo sombra (src/estrategias.py), custo por rodada com ~100 estratégias.
+
+As estratégias padrão são completadas com outras parametrizações até
+`estrategias`. Cada rodada sintética passa pelo ExecutorSombra (placares
+incrementais, O(1) por estratégia) e, para comparação, pelo caminho que
+recalcula tudo a cada rodada: Features do analisador sobre as últimas 100
+rodadas e todas as regras (só 5 regras).
+
+Uso: python benchmarks/bench_estrategias.py [estrategias] [rodadas]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ["BLAZE_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "estrategias.db")
+
+from src.analisador import REGRAS, Features, Historico, avaliar_regras
+from src.estrategias import ESTRATEGIAS, ExecutorSombra, desequilibrio, padrao, quebra_de_sequencia, tendencia
+from src.modelo import BRANCO, PRETO, VERMELHO
+
+JANELA_RECALCULO = 100
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))] if valores else float("nan")
+
+
+def completar(quantidade):
+    """As estratégias padrão mais variações de parâmetros até `quantidade`."""
+    estrategias = dict(ESTRATEGIAS)
+    extras = ([(f"tendencia_{j}_{v}", tendencia(j, v / 100)) for j in (10, 25, 50, 100) for v in (2, 10)]
+              + [(f"desequilibrio_{j}_{l}", desequilibrio(j, l / 100)) for j in (25, 50, 100) for l in range(55, 91)]
+              + [(f"quebra_de_sequencia_{m}_x", quebra_de_sequencia(m)) for m in range(2, 12)]
+              + [(f"padrao_{k}_{minimo}", padrao(k, minimo)) for k in range(1, 6) for minimo in (20, 50, 100)])
+    for nome, funcao in extras:
+        if len(estrategias) >= quantidade:
+            break
+        estrategias.setdefault(nome, funcao)
+    return estrategias
+
+
+def main(quantidade, rodadas):
+    aleatorio = random.Random(25)
+    cores = [aleatorio.choices((BRANCO, VERMELHO, PRETO), (1, 7, 7))[0] for _ in range(rodadas)]
+
+    executor = ExecutorSombra(completar(quantidade))
+    tempos = []
+    for cor in cores:
+        inicio = time.perf_counter()
+        executor.adicionar(cor)
+        tempos.append(time.perf_counter() - inicio)
+    print(f"modo sombra   {len(executor):3d} estratégias: p50 {percentil(tempos, 0.5) * 1e6:7.1f} µs "
+          f"p99 {percentil(tempos, 0.99) * 1e6:7.1f} µs máx {max(tempos) * 1e6:7.1f} µs por rodada")
+
+    tempos = []
+    for i in range(JANELA_RECALCULO, min(rodadas, JANELA_RECALCULO + 2000)):
+        inicio = time.perf_counter()
+        avaliar_regras(Features(Historico(cores[i - JANELA_RECALCULO:i])))
+        tempos.append(time.perf_counter() - inicio)
+    print(f"recalculando  {len(REGRAS):3d} regras:      p50 {percentil(tempos, 0.5) * 1e6:7.1f} µs "
+          f"p99 {percentil(tempos, 0.99) * 1e6:7.1f} µs máx {max(tempos) * 1e6:7.1f} µs por rodada")
+
+    print("líderes:", ", ".join(f"{placar['estrategia']} ({placar['lucro']:+.0f})" for placar in executor.ranking(5)))
+
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    main(int(argumentos[0]) if len(argumentos) > 0 else 100,
+         int(argumentos[1]) if len(argumentos) > 1 else 20_000)
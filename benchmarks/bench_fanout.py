@@ -0,0 +1,56 @@
+"""Teste de carga: um sinal distribuído para 1k/10k sessões contra a Bot API falsa.
+
+Uso: python benchmarks/bench_fanout.py [usuarios ...]
+"""
+import os
+import sys
+import time
+import asyncio
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from telegram import Bot
+from telegram.request import HTTPXRequest
+
+from src.sessoes import RegistroSessoes, distribuir
+from servidor_telegram_falso import ServidorTelegramFalso
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+async def rodar(usuarios, servidor, bot):
+    registro = RegistroSessoes()
+    for chat_id in range(usuarios):
+        registro.entrar(chat_id, f"usuario{chat_id}", 100.0 + chat_id % 50)
+
+    async def enviar_para(sessao):
+        await bot.send_message(chat_id=sessao.chat_id, text=f"🎯 Sinal: VERMELHO - R${sessao.valor_aposta():.2f}")
+
+    servidor.mensagens.clear()
+    inicio = time.perf_counter()
+    latencias = await distribuir(registro.ativas(), enviar_para)
+    total = time.perf_counter() - inicio
+    # Latência do sinal até a entrega de cada mensagem no servidor
+    entregas = [instante - inicio for _, _, instante in servidor.mensagens]
+    falhas = sum(1 for l in latencias if l is None)
+
+    print(f"{usuarios:>6} usuários: total {total:.2f} s ({usuarios / total:,.0f} msg/s), "
+          f"entrega p50 {percentil(entregas, 0.5) * 1000:.0f} ms, p99 {percentil(entregas, 0.99) * 1000:.0f} ms, "
+          f"falhas {falhas}")
+
+
+async def main(tamanhos):
+    servidor = await ServidorTelegramFalso().iniciar()
+    bot = Bot("123:falso", base_url=servidor.base_url,
+              request=HTTPXRequest(connection_pool_size=64, pool_timeout=60))
+    async with bot:
+        for usuarios in tamanhos:
+            await rodar(usuarios, servidor, bot)
+    await servidor.parar()
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(a) for a in sys.argv[1:]] or [1000, 10000]))
@@ -0,0 +1,54 @@
+"""Benchmark: tempo de inicialização a frio de cada subcomando do main.py (python -X importtime).
+
+Para cada subcomando roda um processo novo que importa o que ele precisa
+até o ponto de abrir a rede (carregador do main.py e, no bot e no coletor,
+os clientes importados sob demanda) e soma o `-X importtime`. "tudo" é o
+conjunto que o main.py carregava antes dos subcomandos.
+
+Uso: python benchmarks/bench_inicializacao.py [repeticoes]
+"""
+import os
+import re
+import sys
+import time
+import tempfile
+import subprocess
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+CENARIOS = {
+    "bot": "import main; main.COMANDOS['bot'](); from src import telegram_bot; telegram_bot.init(); "
+           "import telegram.ext, src.coletor_stream",
+    "collect": "import main; main.COMANDOS['collect'](); import src.coletor_http",
+    "backtest": "import main; main.COMANDOS['backtest']()",
+    "stats": "import main; main.COMANDOS['stats']()",
+    "tudo": "import main, src.orquestrador, src.coletor_http, src.coletor_stream, src.backtest, src.padroes, "
+            "requests, telegram.ext; from src import telegram_bot; telegram_bot.init()",
+}
+
+LINHA = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def medir(codigo, ambiente):
+    inicio = time.perf_counter()
+    saida = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo], cwd=RAIZ, env=ambiente,
+                           capture_output=True, text=True, check=True).stderr
+    parede = time.perf_counter() - inicio
+    # Módulos de primeiro nível (um só espaço antes do nome): o cumulativo deles soma todas as importações
+    primeiro_nivel = [(int(cumulativo), nome) for _, cumulativo, recuo, nome in LINHA.findall(saida) if recuo == " "]
+    return parede, sum(c for c, _ in primeiro_nivel), sorted(primeiro_nivel, reverse=True)[:3]
+
+
+def main(repeticoes):
+    ambiente = dict(os.environ, TELEGRAM_TOKEN="123:falso", TELEGRAM_CHAT_ID="1",
+                    BLAZE_DB_PATH=os.path.join(tempfile.mkdtemp(), "bench.db"))
+    print(f"melhor de {repeticoes} processos por subcomando")
+    for nome, codigo in CENARIOS.items():
+        medidas = [medir(codigo, ambiente) for _ in range(repeticoes)]
+        parede, importacoes, mais_pesados = min(medidas)
+        pesados = ", ".join(f"{modulo} {cumulativo / 1000:.0f} ms" for cumulativo, modulo in mais_pesados)
+        print(f"  {nome:8s} processo {parede * 1000:6.0f} ms | importações {importacoes / 1000:6.1f} ms | {pesados}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,172 @@
+"""Benchmark: vários jogos acompanhados ao mesmo tempo (supervisor) x um laço serial pelos jogos.
+
+Uma API local publica rodadas de `jogos` jogos a cada `cadencia` s, com
+`latencia` s de resposta; um dos jogos para de responder (a conexão fica
+pendurada até o timeout de leitura) durante metade do tempo. O laço serial consulta um jogo depois do outro, como se o coletor
+antigo fosse estendido a vários feeds; o supervisor (src/jogos.py) roda um
+feed por tarefa com a sessão HTTP compartilhada e grava pelo escritor em lote.
+Compara rodadas gravadas e o atraso até a gravação, por jogo.
+
+Uso: python benchmarks/bench_jogos.py [jogos] [segundos] [cadencia_s] [latencia_s]
+"""
+import os
+import sys
+import random
+import asyncio
+import tempfile
+from datetime import datetime, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ["BLAZE_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "jogos.db")
+
+from aiohttp import web
+
+from src.banco import agora_ms, conexao, fechar_pool
+from src.coletor import criar_tabela
+from src.coletor_http import ConsultaRecentes, criar_sessao
+from src.escrita import obter_escritor
+from src.jogos import Jogo, SupervisorJogos, converter_crash, registrar_jogo
+from src.metricas import metricas
+
+QUEBRADO = "jogo0"
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))] if valores else float("nan")
+
+
+class ApiJogosFalsa:
+    """Endpoint de recentes de cada jogo, no formato do Crash, com latência e um jogo que trava."""
+
+    def __init__(self, nomes, cadencia, latencia):
+        self.rodadas = {nome: [] for nome in nomes}
+        self.cadencia = cadencia
+        self.latencia = latencia
+        self.fora_do_ar = False
+        self._aleatorio = random.Random(21)
+
+    async def publicar(self):
+        while True:
+            agora = datetime.now(timezone.utc)
+            texto = agora.strftime("%Y-%m-%dT%H:%M:%S.") + f"{agora.microsecond // 1000:03d}Z"
+            for rodadas in self.rodadas.values():
+                rodadas.append({"crash_point": f"{1 + self._aleatorio.expovariate(1):.2f}", "created_at": texto})
+            await asyncio.sleep(self.cadencia)
+
+    async def recentes(self, request):
+        nome = request.match_info["nome"]
+        await asyncio.sleep(self.latencia)
+        if nome == QUEBRADO and self.fora_do_ar:
+            await asyncio.sleep(60)
+        return web.json_response(list(reversed(self.rodadas[nome][-20:])))
+
+    async def iniciar(self):
+        app = web.Application()
+        app.router.add_get("/{nome}/recent/1", self.recentes)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.porta = site._server.sockets[0].getsockname()[1]
+        self._publicador = asyncio.create_task(self.publicar())
+        return self
+
+    async def parar(self):
+        self._publicador.cancel()
+        await self._runner.cleanup()
+
+
+def criar_jogos(quantidade, porta, cadencia):
+    jogos = []
+    with conexao() as conn:
+        for i in range(quantidade):
+            nome = f"jogo{i}"
+            conn.execute(f"CREATE TABLE IF NOT EXISTS resultados_{nome} "
+                         f"(id INTEGER PRIMARY KEY, ponto REAL, created_at INTEGER UNIQUE)")
+            jogos.append(registrar_jogo(Jogo(nome, f"http://127.0.0.1:{porta}/{nome}/recent/1", converter_crash,
+                                             f"resultados_{nome}", ("ponto", "created_at"),
+                                             cadencia_ms=int(cadencia * 1000))))
+    return jogos
+
+
+def contar(jogos, desde):
+    with conexao() as conn:
+        return {jogo.nome: conn.execute(f"SELECT COUNT(*) FROM {jogo.tabela} WHERE created_at >= ?",
+                                        (desde,)).fetchone()[0]
+                for jogo in jogos}
+
+
+async def laco_serial(jogos, parar, atrasos):
+    """Um laço só: consulta cada jogo em sequência, grava e passa para o próximo."""
+    async with criar_sessao() as sessao:
+        consultas = [ConsultaRecentes(sessao, jogo.url, jogo.converter) for jogo in jogos]
+        while not parar.is_set():
+            for jogo, consulta in zip(jogos, consultas):
+                try:
+                    novos = await consulta.buscar()
+                except Exception:
+                    continue
+                if novos:
+                    await obter_escritor().executar(jogo.sql_insercao, novos, muitos=True)
+                    agora = agora_ms()
+                    atrasos[jogo.nome].extend((agora - rodada[-1]) / 1000 for rodada in novos)
+
+
+async def rodar(api, jogos, segundos, executar):
+    publicadas_antes = {jogo: len(rodadas) for jogo, rodadas in api.rodadas.items()}
+    inicio = agora_ms()
+    parar = asyncio.Event()
+    tarefa = asyncio.create_task(executar(parar))
+    # O primeiro jogo trava no meio do teste e volta no fim
+    await asyncio.sleep(segundos / 4)
+    api.fora_do_ar = True
+    await asyncio.sleep(segundos / 2)
+    api.fora_do_ar = False
+    await asyncio.sleep(segundos / 4)
+    parar.set()
+    await tarefa
+    obter_escritor().descarregar()
+    return {jogo: len(rodadas) - publicadas_antes[jogo] for jogo, rodadas in api.rodadas.items()}, contar(jogos, inicio)
+
+
+def imprimir(nome, publicadas, gravadas, atrasos):
+    """`atrasos`: jogo -> (p50, p95) em segundos do created_at de cada rodada até a gravação."""
+    print(nome)
+    for jogo in publicadas:
+        p50, p95 = atrasos.get(jogo, (float("nan"), float("nan")))
+        print(f"  {jogo:6s} gravadas {gravadas[jogo]:4d}/{publicadas[jogo]:4d} | atraso p50 {p50:6.2f} s "
+              f"p95 {p95:6.2f} s{'  (travado metade do tempo)' if jogo == QUEBRADO else ''}")
+
+
+async def main(quantidade, segundos, cadencia, latencia):
+    criar_tabela()
+    api = await ApiJogosFalsa([f"jogo{i}" for i in range(quantidade)], cadencia, latencia).iniciar()
+    jogos = criar_jogos(quantidade, api.porta, cadencia)
+    print(f"{quantidade} jogos, rodada a cada {cadencia} s, resposta em {latencia} s, {segundos} s por cenário")
+
+    atrasos = {jogo.nome: [] for jogo in jogos}
+    publicadas, gravadas = await rodar(api, jogos, segundos, lambda parar: laco_serial(jogos, parar, atrasos))
+    imprimir("laço serial", publicadas, gravadas,
+             {jogo: (percentil(valores, 0.5), percentil(valores, 0.95)) for jogo, valores in atrasos.items()})
+
+    supervisor = SupervisorJogos([jogo.nome for jogo in jogos])
+    publicadas, gravadas = await rodar(api, jogos, segundos, supervisor.executar)
+    histogramas = metricas.resumo()["histogramas"]
+    imprimir("supervisor", publicadas, gravadas,
+             {jogo.nome: (h["p50_ms"] / 1000, h["p95_ms"] / 1000)
+              for jogo in jogos if (h := histogramas.get(f'blaze_feed_atraso_segundos{{jogo="{jogo.nome}"}}'))})
+    print(f"  {QUEBRADO}: {supervisor.feeds[QUEBRADO].erros} erro(s) de consulta")
+
+    await api.parar()
+    obter_escritor().parar()
+    fechar_pool()
+
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    asyncio.run(main(int(argumentos[0]) if len(argumentos) > 0 else 8,
+                     float(argumentos[1]) if len(argumentos) > 1 else 20,
+                     float(argumentos[2]) if len(argumentos) > 2 else 1.0,
+                     float(argumentos[3]) if len(argumentos) > 3 else 0.15))
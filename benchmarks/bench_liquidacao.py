@@ -0,0 +1,65 @@
+"""Benchmark: centenas de apostas pendentes liquidadas juntas quando a rodada é gravada.
+
+Mede também o atraso máximo do event loop durante a liquidação.
+
+Uso: python benchmarks/bench_liquidacao.py [apostas]
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ["BLAZE_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "liquidacao.db")
+
+from src.banco import agora_ms, fechar_pool
+from src.coletor import ao_salvar_rodada, criar_tabela, salvar_resultado
+from src.escrita import obter_escritor
+from src.liquidacao import AgendadorLiquidacao
+from src.modelo import PRETO, VERMELHO
+
+
+async def medir_atraso_do_loop(atrasos, parar):
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        await asyncio.sleep(0.001)
+        atrasos.append(time.perf_counter() - inicio - 0.001)
+
+
+async def main(quantidade):
+    criar_tabela()
+    agendador = AgendadorLiquidacao(intervalo=60)
+    agendador.iniciar()
+    ao_salvar_rodada(agendador.notificar_rodada)
+    await asyncio.sleep(0.1)
+
+    atrasos, parar = [], asyncio.Event()
+    monitor = asyncio.create_task(medir_atraso_do_loop(atrasos, parar))
+
+    inicio = time.perf_counter()
+    agendadas = await asyncio.gather(*(agendador.agendar(VERMELHO if i % 2 else PRETO, 2.0)
+                                       for i in range(quantidade)))
+    tempo_agendar = time.perf_counter() - inicio
+
+    # O coletor grava a rodada em outra thread, como no modo stream
+    gravada_em = time.perf_counter()
+    await asyncio.to_thread(salvar_resultado, 5, VERMELHO, agora_ms() + 1000)
+    resultados = await asyncio.gather(*(futuro for _, futuro in agendadas))
+    tempo_liquidar = time.perf_counter() - gravada_em
+
+    parar.set()
+    await monitor
+    await agendador.parar()
+    obter_escritor().parar()
+    fechar_pool()
+
+    vitorias = sum(1 for resultado, _ in resultados if resultado == "win")
+    print(f"{quantidade} apostas agendadas em {tempo_agendar * 1000:.0f} ms")
+    print(f"Liquidadas {len(resultados)} ({vitorias} win) {tempo_liquidar * 1000:.1f} ms após a rodada ser gravada")
+    print(f"Maior atraso do event loop: {max(atrasos) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
@@ -0,0 +1,141 @@
+"""Benchmark: jitter do event loop com o log gravado no próprio loop x pela fila com thread de escrita.
+
+Simula o fan-out de um sinal: a cada rodada, `sessoes` tarefas registram as
+linhas de log de uma aposta (sinal, resultado, banca). Em paralelo, uma
+tarefa acorda a cada 1 ms e mede o atraso em relação ao horário previsto.
+
+- arquivo: logging.basicConfig(filename=...) como antes (I/O de arquivo no loop)
+- fila:    src.logs.configurar_logs (QueueHandler + thread, JSON lines, amostragem)
+
+Com `atraso_disco_ms` > 0, o flush do arquivo para por esse tempo a cada
+256 KiB gravados, como um disco em writeback ou um cartão SD lento.
+
+Uso: python benchmarks/bench_logs.py [rodadas] [sessoes] [atraso_disco_ms]
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import logs
+
+TICK = 0.001
+BYTES_POR_PAUSA = 256 * 1024
+
+
+class DiscoLento:
+    """Envolve o stream do arquivo de log e pausa o flush a cada BYTES_POR_PAUSA gravados."""
+
+    def __init__(self, stream, atraso):
+        self.stream = stream
+        self.atraso = atraso
+        self.pendentes = 0
+
+    def write(self, texto):
+        self.pendentes += len(texto)
+        return self.stream.write(texto)
+
+    def flush(self):
+        self.stream.flush()
+        if self.atraso and self.pendentes >= BYTES_POR_PAUSA:
+            self.pendentes = 0
+            time.sleep(self.atraso)
+
+    def __getattr__(self, nome):
+        return getattr(self.stream, nome)
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))] if valores else 0.0
+
+
+def registrar_aposta_e_verificar_resultado(sessao, rodada):
+    logging.info(f"🎯 Sinal de Aposta: Apostar no **VERMELHO** 💰\n💵 Valor: R$2.00 (sessão {sessao}, rodada {rodada})")
+    logging.info(f"Aposta WIN (usuario{sessao})! Lucro de R$2.00.")
+    logging.info(f"Banca do usuário usuario{sessao} atualizada para R$102.00")
+
+
+async def medir_jitter(parar, atrasos):
+    previsto = time.perf_counter() + TICK
+    while not parar.is_set():
+        await asyncio.sleep(max(0.0, previsto - time.perf_counter()))
+        atrasos.append(time.perf_counter() - previsto)
+        previsto = time.perf_counter() + TICK
+
+
+async def cenario(rodadas, sessoes):
+    parar = asyncio.Event()
+    atrasos = []
+    medidor = asyncio.create_task(medir_jitter(parar, atrasos))
+
+    async def sessao(indice, rodada):
+        await asyncio.sleep(0)
+        registrar_aposta_e_verificar_resultado(indice, rodada)
+
+    inicio = time.perf_counter()
+    for rodada in range(rodadas):
+        await asyncio.gather(*(sessao(i, rodada) for i in range(sessoes)))
+        await asyncio.sleep(0.01)
+    duracao = time.perf_counter() - inicio
+    parar.set()
+    await medidor
+    return atrasos, duracao
+
+
+def executar(nome, configurar, encerrar, rodadas, sessoes, caminho, atraso):
+    arquivo = configurar()
+    arquivo.stream = DiscoLento(arquivo.stream, atraso)
+    atrasos, duracao = asyncio.run(cenario(rodadas, sessoes))
+    descartados = getattr(logs._handler, "descartados", 0)
+    encerrar()
+    tamanho = sum(os.path.getsize(os.path.join(os.path.dirname(caminho), f))
+                  for f in os.listdir(os.path.dirname(caminho)) if f.startswith(os.path.basename(caminho)))
+    print(f"  {nome:8s} atraso do loop: p50 {percentil(atrasos, 0.5) * 1000:6.2f} ms | "
+          f"p99 {percentil(atrasos, 0.99) * 1000:6.2f} ms | máx {max(atrasos) * 1000:7.2f} ms | "
+          f"duração {duracao:.2f} s | arquivo {tamanho / 1024:.0f} KiB | descartados {descartados}")
+
+
+def main(rodadas, sessoes, atraso_ms):
+    pasta = tempfile.mkdtemp()
+    print(f"{rodadas} rodadas x {sessoes} sessões ({3 * rodadas * sessoes} linhas de log), "
+          f"pausa de disco de {atraso_ms} ms a cada {BYTES_POR_PAUSA // 1024} KiB")
+    atraso = atraso_ms / 1000
+
+    caminho_antigo = os.path.join(pasta, "antigo.txt")
+
+    def configurar_antigo():
+        logging.basicConfig(filename=caminho_antigo, level=logging.INFO,
+                            format="%(asctime)s - %(levelname)s - %(message)s", force=True)
+        return logging.getLogger().handlers[0]
+
+    def encerrar_antigo():
+        raiz = logging.getLogger()
+        for handler in list(raiz.handlers):
+            raiz.removeHandler(handler)
+            handler.close()
+
+    def configurar_fila(caminho, amostragem):
+        logs.configurar_logs(caminho, amostragem=amostragem)
+        return logs._escritor.arquivo
+
+    executar("arquivo", configurar_antigo, encerrar_antigo, rodadas, sessoes, caminho_antigo, atraso)
+
+    caminho_fila = os.path.join(pasta, "fila.txt")
+    # A amostragem padrão vale para as funções do bot; aqui a função equivalente é a deste arquivo
+    amostragem = {"bench_logs.registrar_aposta_e_verificar_resultado":
+                  logs.AMOSTRAGEM_PADRAO["telegram_bot.registrar_aposta_e_verificar_resultado"]}
+    executar("fila", lambda: configurar_fila(caminho_fila, amostragem), logs.encerrar_logs,
+             rodadas, sessoes, caminho_fila, atraso)
+    executar("fila/1:1", lambda: configurar_fila(caminho_fila + ".completo", {}), logs.encerrar_logs,
+             rodadas, sessoes, caminho_fila + ".completo", atraso)
+
+
+if __name__ == "__main__":
+    argumentos = [int(a) for a in sys.argv[1:]]
+    rodadas, sessoes, atraso_ms = (argumentos + [50, 500, 20][len(argumentos):])[:3]
+    main(rodadas, sessoes, atraso_ms)
@@ -0,0 +1,105 @@
+"""Pipeline completo em um processo: feed falso da Blaze -> orquestrador -> Bot API falsa.
+
+Publica uma rodada por `cadencia` s no websocket falso e mede, para cada
+rodada, o tempo até o sinal seguinte chegar ao servidor do Telegram (e até
+a edição com o resultado da aposta anterior).
+
+Uso: python benchmarks/bench_orquestrador.py [rodadas] [sessoes] [cadencia_s]
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+_pasta = tempfile.mkdtemp()
+os.environ["BLAZE_DB_PATH"] = os.path.join(_pasta, "bench.db")
+os.environ.setdefault("TELEGRAM_TOKEN", "123:falso")
+os.environ.setdefault("TELEGRAM_CHAT_ID", "1")
+# O cadastro dos usuários de teste não precisa do custo de produção do hash das senhas
+os.environ.setdefault("BLAZE_HASH_ITERACOES", "1000")
+
+from telegram import Bot
+from telegram.request import HTTPXRequest
+
+from src import telegram_bot
+from src.despachante import Despachante
+from src.metricas import metricas
+from src.orquestrador import Orquestrador
+from servidor_blaze_falso import ServidorBlazeFalso
+from servidor_telegram_falso import ServidorTelegramFalso
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))] if valores else float("nan")
+
+
+async def main(rodadas, sessoes, cadencia):
+    telegram_bot.log_path = os.path.join(_pasta, "logs.txt")
+    # created_at de cada rodada meia cadência depois da publicação: a aposta feita com o
+    # sinal da rodada k é liquidada pela rodada k + 1
+    inicio_rodadas = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=1 + cadencia / 2)
+    blaze = await ServidorBlazeFalso(inicio=inicio_rodadas, duracao_rodada=timedelta(seconds=cadencia)).iniciar()
+    telegram = await ServidorTelegramFalso().iniciar()
+
+    bot = Bot("123:falso", base_url=telegram.base_url, request=HTTPXRequest(connection_pool_size=64))
+    telegram_bot.bot = bot
+    # Limites folgados: o teste mede o pipeline, não o rate limit do Telegram (ver bench_despachante.py)
+    telegram_bot.despachante = Despachante(bot, taxa_global=10_000, rajada_global=10_000,
+                                           taxa_por_chat=100, rajada_por_chat=100)
+
+    telegram_bot.criar_tabelas()
+    for chat_id in range(sessoes):
+        telegram_bot.cadastrar_usuario(f"usuario{chat_id}", "senha", 100.0)
+        usuario_id, _ = telegram_bot.obter_usuario(f"usuario{chat_id}", "senha")
+        telegram_bot.registro.entrar(chat_id + 100, f"usuario{chat_id}", 100.0,
+                                     stop_win=10**9, stop_loss=-10**9, usuario_id=usuario_id)
+
+    orquestrador = Orquestrador("stream", url_stream=blaze.url_stream, url_api=blaze.url_recentes,
+                                porta_metricas=0)
+    tarefa = asyncio.create_task(orquestrador.executar())
+    await asyncio.sleep(1.0)
+
+    publicadas = []
+    inicio = time.perf_counter()
+    for k in range(rodadas):
+        await asyncio.sleep(max(0.0, inicio + k * cadencia - time.perf_counter()))
+        await blaze.publicar_rodada()
+        publicadas.append(time.perf_counter())
+    await asyncio.sleep(cadencia)
+    tarefa.cancel()
+    await asyncio.gather(tarefa, return_exceptions=True)
+
+    # Para cada rodada: primeiro sinal novo e primeira edição (resultado) depois da publicação
+    sinais, resultados = [], []
+    for i, publicada in enumerate(publicadas):
+        limite = publicadas[i + 1] if i + 1 < len(publicadas) else float("inf")
+        envios = [t for m, _, t in telegram.mensagens if m == "sendMessage" and publicada <= t < limite]
+        edicoes = [t for m, _, t in telegram.mensagens if m == "editMessageText" and publicada <= t < limite]
+        if envios:
+            sinais.append(min(envios) - publicada)
+        if edicoes:
+            resultados.append(min(edicoes) - publicada)
+
+    print(f"{rodadas} rodadas, {sessoes} sessões, cadência {cadencia:.1f} s: {orquestrador.metricas()}")
+    print(f"  rodada -> primeiro sinal no Telegram: p50 {percentil(sinais, 0.5) * 1000:.1f} ms, "
+          f"p95 {percentil(sinais, 0.95) * 1000:.1f} ms ({len(sinais)} rodadas)")
+    print(f"  rodada -> resultado da aposta anterior: p50 {percentil(resultados, 0.5) * 1000:.1f} ms, "
+          f"p95 {percentil(resultados, 0.95) * 1000:.1f} ms ({len(resultados)} rodadas)")
+    print(f"  despachante: {telegram_bot.despachante.metricas()}")
+    for nome, histograma in metricas.resumo()["histogramas"].items():
+        print(f"  {nome}: {histograma}")
+
+    await bot.shutdown()
+    await blaze.parar()
+    await telegram.parar()
+
+
+if __name__ == "__main__":
+    argumentos = [float(a) for a in sys.argv[1:]]
+    rodadas, sessoes, cadencia = (argumentos + [20, 10, 1.0][len(argumentos):])[:3]
+    asyncio.run(main(int(rodadas), int(sessoes), cadencia))
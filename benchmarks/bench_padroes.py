@@ -0,0 +1,68 @@
+"""Benchmark: "o que saiu depois destas k cores" pelo índice de k-mers x varredura do histórico.
+
+Gera `rodadas` cores, constrói o índice (vetorizado), mede a atualização
+incremental por rodada e compara a consulta pelo índice com a varredura
+do histórico inteiro (NumPy, janela deslizante) para k de 1 a 8.
+
+Uso: python benchmarks/bench_padroes.py [rodadas]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from src.analisador import Historico
+from src.padroes import TAMANHO_MAXIMO_PADRAO, IndicePadroes
+
+
+def gerar_historico(quantidade):
+    numeros = np.random.default_rng(18).integers(0, 15, quantidade)
+    cores = np.where(numeros == 0, 0, np.where(numeros <= 7, 1, 2))
+    return Historico(cores, numeros)
+
+
+def varrer(cores, padrao):
+    """Como uma consulta de padrão seria feita sem índice: compara todas as janelas de k cores."""
+    k = len(padrao)
+    janelas = np.lib.stride_tricks.sliding_window_view(cores[:-1], k)
+    proximas = cores[k:]
+    return np.bincount(proximas[(janelas == padrao).all(axis=1)], minlength=3)
+
+
+def medir(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+def main(quantidade):
+    historico = gerar_historico(quantidade)
+    inicio = time.perf_counter()
+    indice = IndicePadroes.do_historico(historico)
+    construcao = time.perf_counter() - inicio
+
+    incremental = IndicePadroes()
+    amostra = historico.cores[:100_000].tolist()
+    inicio = time.perf_counter()
+    for posicao, cor in enumerate(amostra):
+        incremental.adicionar(cor, posicao * 30_000)
+    por_rodada = (time.perf_counter() - inicio) / len(amostra)
+
+    print(f"{quantidade} rodadas: construção {construcao:.2f} s, "
+          f"atualização incremental {por_rodada * 1e6:.1f} µs/rodada")
+    cores = historico.cores.astype(np.int64)
+    for k in range(1, TAMANHO_MAXIMO_PADRAO + 1):
+        padrao = cores[-k:].tolist()
+        assert (indice.distribuicao(padrao) == varrer(cores, padrao)).all()
+        tempo_indice = medir(lambda: indice.distribuicao(padrao), 2000)
+        tempo_varredura = medir(lambda: varrer(cores, padrao), 3)
+        print(f"  k={k}: índice {tempo_indice * 1e6:6.1f} µs | varredura {tempo_varredura * 1000:8.1f} ms "
+              f"({tempo_varredura / tempo_indice:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
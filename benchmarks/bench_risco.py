@@ -0,0 +1,91 @@
+"""Benchmark: motor de risco (src/risco.py) vetorizado x laço Python, e a consulta repetida pelo cache.
+
+O laço Python simula aposta por aposta, como uma versão direta faria; para
+não levar minutos, roda só `simulacoes_laco` caminhos e o tempo é projetado
+para o total. Depois mede a primeira chamada de simular_risco (sem cache) e
+as seguintes com os mesmos parâmetros (o que o /risco repete).
+
+Uso: python benchmarks/bench_risco.py [simulacoes] [simulacoes_laco]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ["BLAZE_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "risco.db")
+
+from src.risco import (
+    APOSTAS_POR_DIA,
+    BANCA_PADRAO,
+    DIAS,
+    DISTRIBUICAO_TEORICA,
+    LIMITE_RUINA,
+    custo_sequencia,
+    limpar_cache,
+    probabilidade_vitoria,
+    simular_risco,
+)
+from src.sessoes import PERCENTUAL_APOSTA, STOP_LOSS, STOP_WIN
+
+GALES = 1
+
+
+def laco_python(simulacoes, stop_win, stop_loss):
+    """Mesmo modelo do motor, uma aposta por vez; retorna a fração de bancas quebradas."""
+    aleatorio = random.Random(0)
+    p = probabilidade_vitoria(DISTRIBUICAO_TEORICA, GALES)
+    queda = PERCENTUAL_APOSTA * custo_sequencia(GALES)
+    limite = BANCA_PADRAO * LIMITE_RUINA
+    quebradas = 0
+    for _ in range(simulacoes):
+        banca = BANCA_PADRAO
+        for _ in range(DIAS):
+            inicio_dia = banca
+            for _ in range(APOSTAS_POR_DIA):
+                banca *= 1 + PERCENTUAL_APOSTA if aleatorio.random() < p else 1 - queda
+                lucro = banca - inicio_dia
+                if lucro >= stop_win or lucro <= stop_loss or banca * (1 - queda) < limite:
+                    break
+            if banca * (1 - queda) < limite:
+                quebradas += 1
+                break
+    return quebradas / simulacoes
+
+
+def comparar(simulacoes, simulacoes_laco, stop_win, stop_loss):
+    print(f"stops +R${stop_win} / R${stop_loss}")
+    inicio = time.perf_counter()
+    ruina_laco = laco_python(simulacoes_laco, stop_win, stop_loss)
+    projetado = (time.perf_counter() - inicio) * simulacoes / simulacoes_laco
+    print(f"  laço Python   {projetado:8.2f} s (projetado de {simulacoes_laco} caminhos) | ruína {ruina_laco:.2%}")
+
+    parametros = dict(gales=GALES, stop_win=stop_win, stop_loss=stop_loss, probabilidades=DISTRIBUICAO_TEORICA,
+                      simulacoes=simulacoes)
+    limpar_cache()
+    inicio = time.perf_counter()
+    resultado = simular_risco(**parametros)
+    frio = time.perf_counter() - inicio
+    print(f"  vetorizado    {frio:8.2f} s ({projetado / frio:.0f}x) | ruína {resultado['risco_ruina']:.2%}")
+
+    repeticoes = 1000
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        simular_risco(**parametros)
+    em_cache = (time.perf_counter() - inicio) / repeticoes
+    print(f"  com cache     {em_cache * 1000:8.3f} ms por consulta")
+
+
+def main(simulacoes, simulacoes_laco):
+    print(f"{simulacoes} simulações de {DIAS} dias, até {APOSTAS_POR_DIA} sinais por dia, {GALES} gale(s)")
+    # Os stops do bot encerram o dia em poucos sinais; com stops largos o dia inteiro é simulado
+    comparar(simulacoes, simulacoes_laco, STOP_WIN, STOP_LOSS)
+    comparar(simulacoes, simulacoes_laco, 10 * STOP_WIN, 10 * STOP_LOSS)
+
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    main(int(argumentos[0]) if len(argumentos) > 0 else 10_000,
+         int(argumentos[1]) if len(argumentos) > 1 else 500)
@@ -0,0 +1,268 @@
+"""Carga de ponta a ponta, offline: Blaze e Telegram falsos, N usuários e M rodadas por segundo.
+
+Cada cenário roda em dois processos novos. Um é o de servidores_falsos.py,
+com o feed, a API e a Bot API, e toca as rodadas pelo gerador_rodadas.py.
+O outro roda o pipeline do bot inteiro (orquestrador: coletor,
+analisador, telegram_bot e liquidação) com N sessões logadas. O pipeline
+mede as latências com o created_at de cada rodada, no mesmo relógio:
+- rodada -> sinal entregue (blaze_rodada_sinal_segundos);
+- rodada -> resultado da aposta entregue (blaze_rodada_liquidacao_segundos);
+- rodada -> gravada no banco.
+
+O resultado de cada cenário traz os percentis dessas latências, as vazões
+(rodadas, mensagens e liquidações por segundo) e a memória (RSS) do
+processo do bot. Tudo vai para um arquivo JSON, com a versão (git)
+medida. Com --comparar, mostra a diferença para um resultado anterior.
+
+Uso: python benchmarks/carga.py [--usuarios 10,100,1000] [--velocidades 100]
+                                [--rodadas-por-segundo 2,5] [--rodadas 50]
+                                [--saida arquivo.json] [--comparar anterior.json]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PASTA_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+
+# Métricas comparadas entre versões: (caminho no resultado, maior é melhor)
+INDICADORES = [
+    ("rodada_sinal.p50_ms", False),
+    ("rodada_sinal.p95_ms", False),
+    ("rodada_liquidacao.p50_ms", False),
+    ("rodada_liquidacao.p95_ms", False),
+    ("rodada_gravacao.p95_ms", False),
+    ("vazao.mensagens_por_s", True),
+    ("vazao.liquidacoes_por_s", True),
+    ("memoria.rss_pico_mb", False),
+]
+
+
+def _rss_mb():
+    """RSS atual e de pico do processo, em MB (Linux; pico via getrusage)."""
+    import resource
+
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    try:
+        with open("/proc/self/statm") as arquivo:
+            atual = int(arquivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        atual = float("nan")
+    return round(atual, 1), round(pico, 1)
+
+
+def _latencias(histogramas, nome):
+    h = histogramas.get(nome, {})
+    return {"amostras": h.get("contagem", 0), "p50_ms": h.get("p50_ms"), "p95_ms": h.get("p95_ms"),
+            "p99_ms": h.get("p99_ms")}
+
+
+async def _executar_cenario(cenario, urls):
+    """Roda o pipeline contra os servidores falsos e devolve as medidas (processo do bot)."""
+    from telegram import Bot
+    from telegram.request import HTTPXRequest
+
+    from src import telegram_bot
+    from src.despachante import Despachante
+    from src.metricas import metricas
+    from src.orquestrador import Orquestrador
+
+    telegram_bot.log_path = os.path.join(os.path.dirname(os.environ["BLAZE_DB_PATH"]), "logs.txt")
+    bot = Bot("123:falso", base_url=urls["telegram"], request=HTTPXRequest(connection_pool_size=64))
+    telegram_bot.bot = bot
+    if not cenario["limites_reais"]:
+        # O cenário mede o pipeline, não o rate limit do Telegram (ver bench_despachante.py)
+        telegram_bot.despachante = Despachante(bot, taxa_global=100_000, rajada_global=100_000,
+                                               taxa_por_chat=1000, rajada_por_chat=1000)
+
+    telegram_bot.criar_tabelas()
+    for i in range(cenario["usuarios"]):
+        telegram_bot.cadastrar_usuario(f"usuario{i}", "senha", 1000.0)
+        usuario_id, _ = telegram_bot.obter_usuario(f"usuario{i}", "senha")
+        telegram_bot.registro.entrar(i + 100, f"usuario{i}", 1000.0,
+                                     stop_win=10**9, stop_loss=-10**9, usuario_id=usuario_id)
+    rss_inicial, _ = _rss_mb()
+
+    orquestrador = Orquestrador("stream", url_stream=urls["url_stream"], url_api=urls["url_recentes"],
+                                porta_metricas=0)
+    tarefa = asyncio.create_task(orquestrador.executar())
+    intervalo = urls["intervalo"]
+    prazo = time.perf_counter() + 30 + cenario["rodadas"] * intervalo * 3
+    # A primeira rodada gravada marca o início da medição
+    while orquestrador.rodadas_gravadas == 0 and time.perf_counter() < prazo and not tarefa.done():
+        await asyncio.sleep(0.01)
+    inicio = time.perf_counter()
+    while orquestrador.rodadas_gravadas < cenario["rodadas"] and time.perf_counter() < prazo and not tarefa.done():
+        await asyncio.sleep(0.01)
+    # Tempo para as últimas apostas serem liquidadas e as mensagens entregues
+    await asyncio.sleep(2 * intervalo + 0.5)
+    duracao = time.perf_counter() - inicio
+    tarefa.cancel()
+    await asyncio.gather(tarefa, return_exceptions=True)
+    rss_final, rss_pico = _rss_mb()
+
+    histogramas = metricas.resumo()["histogramas"]
+    despachante = telegram_bot.despachante.metricas()
+    entregues = despachante.get("enviadas", 0) + despachante.get("editadas", 0)
+    liquidacao = _latencias(histogramas, "blaze_rodada_liquidacao_segundos")
+    await bot.shutdown()
+    return {
+        "rodadas_gravadas": orquestrador.rodadas_gravadas,
+        "sinais": orquestrador.sinais_enviados,
+        "duracao_s": round(duracao, 2),
+        "rodada_gravacao": _latencias(histogramas, "blaze_rodada_gravacao_segundos"),
+        "rodada_sinal": _latencias(histogramas, "blaze_rodada_sinal_segundos"),
+        "rodada_liquidacao": liquidacao,
+        "analise": _latencias(histogramas, 'blaze_analise_segundos{funcao="gerar_sinal_aposta"}'),
+        "vazao": {
+            "rodadas_por_s": round(orquestrador.rodadas_gravadas / duracao, 2),
+            "mensagens_por_s": round(entregues / duracao, 1),
+            "liquidacoes_por_s": round(liquidacao["amostras"] / duracao, 1),
+        },
+        "despachante": despachante,
+        "memoria": {"rss_inicial_mb": rss_inicial, "rss_final_mb": rss_final, "rss_pico_mb": rss_pico},
+    }
+
+
+def rodar_cenario(cenario, pasta):
+    """Sobe os servidores falsos e o processo do bot para um cenário; devolve o resultado completo."""
+    servidores = subprocess.Popen(
+        [sys.executable, os.path.join(RAIZ, "benchmarks", "servidores_falsos.py"),
+         "--velocidade", str(cenario["velocidade"]), "--rodadas", str(cenario["rodadas"] + 2)],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        urls = json.loads(servidores.stdout.readline())
+        saida = os.path.join(pasta, f"cenario-{cenario['usuarios']}-{cenario['velocidade']}.json")
+        ambiente = dict(os.environ, TELEGRAM_TOKEN="123:falso", TELEGRAM_CHAT_ID="1",
+                        BLAZE_DB_PATH=os.path.join(tempfile.mkdtemp(dir=pasta), "carga.db"),
+                        BLAZE_METRICAS_AMOSTRAS="1000000", BLAZE_HASH_ITERACOES="1000")
+        registro = os.path.join(pasta, f"cenario-{cenario['usuarios']}-{cenario['velocidade']}.log")
+        with open(registro, "w") as log:
+            bot = subprocess.run([sys.executable, __file__, "--executar-cenario", json.dumps({**cenario, "urls": urls}),
+                                  "--resultado", saida], cwd=RAIZ, env=ambiente, stdout=log, stderr=subprocess.STDOUT)
+        if bot.returncode != 0:
+            with open(registro) as log:
+                print("".join(log.readlines()[-20:]), file=sys.stderr)
+            raise RuntimeError(f"O processo do bot falhou no cenário {cenario}")
+        with open(saida) as arquivo:
+            resultado = json.load(arquivo)
+    finally:
+        servidores.stdin.close()
+        resumo = servidores.stdout.readline()
+        servidores.wait(timeout=30)
+    resultado["servidores"] = json.loads(resumo) if resumo else {}
+    return {**cenario, **resultado}
+
+
+def _versao():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        alterado = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=RAIZ,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ("-alterado" if alterado else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecida"
+
+
+def _valor(resultado, caminho):
+    for parte in caminho.split("."):
+        resultado = (resultado or {}).get(parte)
+    return resultado
+
+
+def comparar(atual, anterior):
+    """Mostra, cenário a cenário, a variação dos indicadores em relação a um arquivo anterior."""
+    chave = lambda c: (c["usuarios"], c["velocidade"])
+    anteriores = {chave(c): c for c in anterior["cenarios"]}
+    print(f"\nComparação com {anterior['versao']} ({anterior['data']}):")
+    for cenario in atual["cenarios"]:
+        base = anteriores.get(chave(cenario))
+        if base is None:
+            continue
+        variacoes = []
+        for caminho, maior_melhor in INDICADORES:
+            novo, velho = _valor(cenario, caminho), _valor(base, caminho)
+            if not novo or not velho:
+                continue
+            delta = (novo - velho) / velho * 100
+            pior = delta < -10 if maior_melhor else delta > 10
+            variacoes.append(f"{caminho} {velho:g} -> {novo:g} ({delta:+.0f}%{' ⚠️' if pior else ''})")
+        print(f"  {cenario['usuarios']} usuários, {cenario['velocidade']:g}x:")
+        for linha in variacoes:
+            print(f"    {linha}")
+
+
+def imprimir(cenario):
+    sinal, liquidacao = cenario["rodada_sinal"], cenario["rodada_liquidacao"]
+    print(f"  {cenario['usuarios']:5d} usuários, {cenario['rodadas_por_segundo']:5.2f} rodadas/s: "
+          f"rodada->sinal p50 {sinal['p50_ms']} ms p95 {sinal['p95_ms']} ms | "
+          f"rodada->liquidação p50 {liquidacao['p50_ms']} ms p95 {liquidacao['p95_ms']} ms | "
+          f"{cenario['vazao']['mensagens_por_s']} msg/s | RSS pico {cenario['memoria']['rss_pico_mb']} MB")
+
+
+def _lista(tipo):
+    return lambda texto: [tipo(item) for item in texto.split(",") if item.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--usuarios", type=_lista(int), default=[10, 100, 1000])
+    parser.add_argument("--velocidades", type=_lista(float), default=[100],
+                        help="vezes o ritmo real do jogo (100 = uma rodada a cada 0,3 s)")
+    parser.add_argument("--rodadas-por-segundo", type=_lista(float),
+                        help="alternativa a --velocidades: rodadas por segundo de cada cenário")
+    parser.add_argument("--rodadas", type=int, default=50, help="rodadas medidas por cenário")
+    parser.add_argument("--limites-reais", action="store_true",
+                        help="mantém os limites de envio do Telegram no despachante")
+    parser.add_argument("--saida", help=f"arquivo JSON do resultado (padrão: em {os.path.relpath(PASTA_RESULTADOS, RAIZ)}/)")
+    parser.add_argument("--comparar", help="resultado anterior (JSON) para comparar")
+    parser.add_argument("--executar-cenario", help=argparse.SUPPRESS)
+    parser.add_argument("--resultado", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.executar_cenario:
+        # Processo do bot de um cenário (chamado por rodar_cenario)
+        sys.path.insert(0, RAIZ)
+        cenario = json.loads(args.executar_cenario)
+        resultado = asyncio.run(_executar_cenario(cenario, cenario.pop("urls")))
+        with open(args.resultado, "w") as arquivo:
+            json.dump(resultado, arquivo)
+        return
+
+    velocidades = [taxa * 30 for taxa in args.rodadas_por_segundo] if args.rodadas_por_segundo else args.velocidades
+    versao = _versao()
+    relatorio = {"versao": versao, "data": datetime.now().isoformat(timespec="seconds"),
+                 "python": platform.python_version(), "plataforma": platform.platform(),
+                 "cpus": os.cpu_count(), "cenarios": []}
+    print(f"Versão {versao}: {len(args.usuarios) * len(velocidades)} cenário(s) de {args.rodadas} rodadas")
+    with tempfile.TemporaryDirectory() as pasta:
+        for velocidade in velocidades:
+            for usuarios in args.usuarios:
+                cenario = {"usuarios": usuarios, "velocidade": velocidade, "rodadas_por_segundo": round(velocidade / 30, 3),
+                           "rodadas": args.rodadas, "limites_reais": args.limites_reais}
+                resultado = rodar_cenario(cenario, pasta)
+                relatorio["cenarios"].append(resultado)
+                imprimir(resultado)
+
+    saida = args.saida or os.path.join(PASTA_RESULTADOS,
+                                       f"carga-{versao}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w") as arquivo:
+        json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    print(f"Resultado em {os.path.relpath(saida)}")
+
+    if args.comparar:
+        with open(args.comparar) as arquivo:
+            comparar(relatorio, json.load(arquivo))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Teste ponta a ponta offline do coletor em modo stream contra o servidor falso.
+
+Publica rodadas, derruba o feed no meio e confere se a reconexão com
+preenchimento de lacunas deixou o banco sem buracos.
+
+Uso: python benchmarks/e2e_stream.py [rodadas]
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+_pasta = tempfile.mkdtemp()
+os.environ["BLAZE_DB_PATH"] = os.path.join(_pasta, "e2e.db")
+
+from src import coletor_stream
+from src.banco import conexao, fechar_pool, iso_para_ms
+from servidor_blaze_falso import ServidorBlazeFalso
+
+
+async def main(rodadas):
+    servidor = await ServidorBlazeFalso().iniciar()
+    coletor_stream.BACKOFF_INICIAL = 0.2
+
+    latencias = []
+    publicado_em = {}
+
+    def ao_salvar(numero, cor, created_at):
+        if created_at in publicado_em:
+            latencias.append(time.perf_counter() - publicado_em[created_at])
+
+    tarefa = asyncio.create_task(coletor_stream.coletar_via_stream(
+        servidor.url_stream, servidor.url_recentes, ao_salvar=ao_salvar))
+    await asyncio.sleep(0.5)
+
+    for i in range(rodadas):
+        rodada = await servidor.publicar_rodada()
+        publicado_em[iso_para_ms(rodada["created_at"])] = time.perf_counter()
+        if i == rodadas // 2:
+            # Queda do feed: as próximas rodadas são publicadas sem ninguém ouvindo
+            await servidor.derrubar_conexoes()
+        await asyncio.sleep(0.05)
+
+    await asyncio.sleep(2)
+    tarefa.cancel()
+    await servidor.parar()
+
+    with conexao() as conn:
+        salvas = conn.execute("SELECT COUNT(*) FROM resultados").fetchone()[0]
+    fechar_pool()
+
+    latencias.sort()
+    print(f"Rodadas publicadas: {len(servidor.rodadas)}, salvas: {salvas}")
+    if latencias:
+        print(f"Latência publicação → banco (p50): {latencias[len(latencias) // 2] * 1000:.2f} ms")
+    if salvas != len(servidor.rodadas):
+        sys.exit("❌ Há rodadas faltando no banco.")
+    print("✅ Nenhuma rodada perdida.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
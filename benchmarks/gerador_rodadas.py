@@ -0,0 +1,47 @@
+"""Gerador de rodadas sintéticas no ritmo do Double, acelerado `velocidade` vezes.
+
+Com velocidade 1 sai uma rodada a cada 30 s, como no jogo; com 100, uma a
+cada 0,3 s. O `created_at` de cada rodada é o horário real da publicação,
+então a liquidação das apostas e as métricas de atraso funcionam como em
+produção, só que mais rápido. A agenda é pelo relógio monotônico: um
+atraso em uma publicação não desloca as seguintes.
+"""
+import time
+import asyncio
+from datetime import datetime, timezone
+
+DURACAO_RODADA_S = 30
+
+
+class GeradorRodadas:
+    def __init__(self, velocidade=1.0, duracao_rodada=DURACAO_RODADA_S):
+        if velocidade <= 0:
+            raise ValueError("A velocidade precisa ser positiva.")
+        self.velocidade = velocidade
+        self.intervalo = duracao_rodada / velocidade
+        self.publicadas = []   # (instante em perf_counter, created_at em epoch ms)
+        self.atraso_maximo = 0.0
+
+    @property
+    def rodadas_por_segundo(self):
+        return 1 / self.intervalo
+
+    @classmethod
+    def por_taxa(cls, rodadas_por_segundo, duracao_rodada=DURACAO_RODADA_S):
+        """Gerador que publica `rodadas_por_segundo` rodadas por segundo."""
+        return cls(rodadas_por_segundo * duracao_rodada, duracao_rodada)
+
+    async def tocar(self, publicar, quantidade):
+        """Chama `await publicar(created_at)` `quantidade` vezes, uma a cada `intervalo` s.
+
+        `created_at` é um datetime em UTC sem fuso (o formato do ServidorBlazeFalso).
+        """
+        inicio = time.perf_counter()
+        for k in range(quantidade):
+            programado = inicio + k * self.intervalo
+            await asyncio.sleep(max(0.0, programado - time.perf_counter()))
+            self.atraso_maximo = max(self.atraso_maximo, time.perf_counter() - programado)
+            agora = datetime.now(timezone.utc)
+            await publicar(agora.replace(tzinfo=None))
+            self.publicadas.append((time.perf_counter(), int(agora.timestamp() * 1000)))
+        return self.publicadas
@@ -0,0 +1,124 @@
+"""Servidor local que imita a Blaze: feed websocket (socket.io) e o endpoint HTTP de rodadas recentes.
+
+As rodadas são geradas com um relógio simulado (30 s por rodada), então o
+servidor pode acelerar o jogo sem gerar `created_at` repetidos. `inicio` e
+`duracao_rodada` permitem alinhar esse relógio ao tempo real.
+"""
+import json
+import random
+import asyncio
+from http import HTTPStatus
+from datetime import datetime, timedelta
+
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+INICIO_SIMULADO = datetime(2025, 1, 1)
+DURACAO_RODADA = timedelta(seconds=30)
+
+
+def cor_do_numero(numero):
+    """Regra do Double: 0 é branco, 1-7 vermelho, 8-14 preto."""
+    if numero == 0:
+        return 0
+    return 1 if numero <= 7 else 2
+
+
+class ServidorBlazeFalso:
+    """Gera rodadas sintéticas e as publica pelo websocket e pela API HTTP."""
+
+    def __init__(self, host="127.0.0.1", porta=0, semente=42, inicio=INICIO_SIMULADO, duracao_rodada=DURACAO_RODADA):
+        self.host = host
+        self.porta = porta
+        self.inicio = inicio
+        self.duracao_rodada = duracao_rodada
+        self.rodadas = []
+        self.conexoes = set()
+        self.requisicoes_http = 0
+        self._aleatorio = random.Random(semente)
+        self._servidor = None
+
+    @property
+    def url_stream(self):
+        return f"ws://{self.host}:{self.porta}/replication/?EIO=3&transport=websocket"
+
+    @property
+    def url_recentes(self):
+        return f"http://{self.host}:{self.porta}/api/singleplayer-originals/originals/roulette_games/recent/1"
+
+    def nova_rodada(self, created_at=None):
+        """Sorteia uma rodada nova e a guarda no histórico (formato da API).
+
+        Sem `created_at` (datetime em UTC, sem fuso), usa o relógio simulado.
+        """
+        numero = self._aleatorio.randint(0, 14)
+        if created_at is None:
+            created_at = self.inicio + self.duracao_rodada * len(self.rodadas)
+        rodada = {
+            "id": f"rodada-{len(self.rodadas)}",
+            "created_at": created_at.strftime("%Y-%m-%dT%H:%M:%S.") + f"{created_at.microsecond // 1000:03d}Z",
+            "color": cor_do_numero(numero),
+            "roll": numero,
+        }
+        self.rodadas.append(rodada)
+        return rodada
+
+    async def publicar_rodada(self, created_at=None):
+        """Gera uma rodada e envia os ticks "rolling" e "complete" para os inscritos."""
+        rodada = self.nova_rodada(created_at)
+        for status in ("rolling", "complete"):
+            pacote = "42" + json.dumps(["data", {"id": "double.tick", "payload": dict(rodada, status=status)}])
+            for ws in list(self.conexoes):
+                try:
+                    await ws.send(pacote)
+                except Exception:
+                    self.conexoes.discard(ws)
+        return rodada
+
+    async def derrubar_conexoes(self):
+        """Fecha todos os websockets abertos (simula queda do feed)."""
+        for ws in list(self.conexoes):
+            await ws.close()
+        self.conexoes.clear()
+
+    def _processar_http(self, connection, request):
+        if request.path.startswith("/replication"):
+            return None
+        self.requisicoes_http += 1
+        recentes = list(reversed(self.rodadas[-20:]))
+        return connection.respond(HTTPStatus.OK, json.dumps(recentes))
+
+    async def _atender(self, ws):
+        await ws.send('0' + json.dumps({"sid": "falso", "pingInterval": 25000, "pingTimeout": 5000}))
+        await ws.send("40")
+        try:
+            async for texto in ws:
+                if texto == "2":
+                    await ws.send("3")
+                elif texto.startswith("42") and "subscribe" in texto:
+                    self.conexoes.add(ws)
+        except ConnectionClosed:
+            pass
+        finally:
+            self.conexoes.discard(ws)
+
+    async def iniciar(self):
+        self._servidor = await serve(self._atender, self.host, self.porta, process_request=self._processar_http)
+        self.porta = self._servidor.sockets[0].getsockname()[1]
+        return self
+
+    async def parar(self):
+        self._servidor.close()
+        await self._servidor.wait_closed()
+
+
+async def _main():
+    servidor = await ServidorBlazeFalso(porta=8765).iniciar()
+    print(f"Feed: {servidor.url_stream}\nAPI:  {servidor.url_recentes}")
+    while True:
+        await asyncio.sleep(1)
+        await servidor.publicar_rodada()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
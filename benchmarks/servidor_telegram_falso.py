@@ -0,0 +1,115 @@
+"""Servidor local que imita a Bot API do Telegram (sendMessage, editMessageText, getMe...).
+
+Responde como a API real e guarda as mensagens recebidas. Use com
+`Bot(token, base_url=servidor.base_url)`. Com `intervalo_por_chat`, chamadas
+mais próximas que isso no mesmo chat recebem 429 com `retry_after`, como o
+Telegram faz quando o limite de envio é ultrapassado.
+"""
+import json
+import time
+import asyncio
+from urllib.parse import parse_qsl
+
+
+class ServidorTelegramFalso:
+    """Servidor HTTP/1.1 mínimo (keep-alive) sobre asyncio.start_server."""
+
+    def __init__(self, host="127.0.0.1", porta=0, atraso=0.0, intervalo_por_chat=None, retry_after=1):
+        self.host = host
+        self.porta = porta
+        self.atraso = atraso          # latência simulada de cada chamada (s)
+        self.intervalo_por_chat = intervalo_por_chat
+        self.retry_after = retry_after
+        self.mensagens = []           # (metodo, parametros, instante)
+        self.recusadas_429 = 0
+        self._ultimo_envio_chat = {}
+        self._proximo_id = 1
+        self._servidor = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.porta}/bot"
+
+    def _excedeu_limite(self, parametros):
+        if self.intervalo_por_chat is None or "chat_id" not in parametros:
+            return False
+        agora = time.monotonic()
+        chat_id = str(parametros["chat_id"])
+        ultimo = self._ultimo_envio_chat.get(chat_id)
+        if ultimo is not None and agora - ultimo < self.intervalo_por_chat:
+            self.recusadas_429 += 1
+            return True
+        self._ultimo_envio_chat[chat_id] = agora
+        return False
+
+    def _responder(self, metodo, parametros):
+        self.mensagens.append((metodo, parametros, time.perf_counter()))
+        if metodo == "getUpdates":
+            return []
+        if metodo == "getMe":
+            return {"id": 1, "is_bot": True, "first_name": "Falso", "username": "falso_bot"}
+        if metodo in ("sendMessage", "editMessageText"):
+            id_mensagem = parametros.get("message_id") or self._proximo_id
+            self._proximo_id += 1
+            return {
+                "message_id": int(id_mensagem),
+                "date": int(time.time()),
+                "chat": {"id": int(parametros.get("chat_id", 0)), "type": "private"},
+                "text": parametros.get("text", ""),
+            }
+        return True
+
+    async def _atender(self, leitor, escritor):
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                _, caminho, _ = linha.decode().split(" ", 2)
+                cabecalhos = {}
+                while (linha := await leitor.readline()) not in (b"\r\n", b"\n", b""):
+                    chave, _, valor = linha.decode().partition(":")
+                    cabecalhos[chave.strip().lower()] = valor.strip()
+                corpo = await leitor.readexactly(int(cabecalhos.get("content-length", 0)))
+
+                if "json" in cabecalhos.get("content-type", ""):
+                    parametros = json.loads(corpo or b"{}")
+                else:
+                    parametros = dict(parse_qsl(corpo.decode()))
+                metodo = caminho.rstrip("/").rsplit("/", 1)[-1]
+
+                if self.atraso:
+                    await asyncio.sleep(self.atraso)
+                if metodo == "getUpdates":
+                    # Long polling sem atualizações: segura a resposta como o Telegram faria
+                    await asyncio.sleep(min(float(parametros.get("timeout") or 0), 0.5))
+                if self._excedeu_limite(parametros):
+                    status = b"429 Too Many Requests"
+                    resposta = json.dumps({
+                        "ok": False,
+                        "error_code": 429,
+                        "description": f"Too Many Requests: retry after {self.retry_after}",
+                        "parameters": {"retry_after": self.retry_after},
+                    }).encode()
+                else:
+                    status = b"200 OK"
+                    resposta = json.dumps({"ok": True, "result": self._responder(metodo, parametros)}).encode()
+                escritor.write(
+                    b"HTTP/1.1 " + status + b"\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(resposta)}\r\n\r\n".encode()
+                    + resposta
+                )
+                await escritor.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            escritor.close()
+
+    async def iniciar(self):
+        self._servidor = await asyncio.start_server(self._atender, self.host, self.porta, backlog=4096)
+        self.porta = self._servidor.sockets[0].getsockname()[1]
+        return self
+
+    async def parar(self):
+        self._servidor.close()
+        await self._servidor.wait_closed()
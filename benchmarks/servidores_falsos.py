@@ -0,0 +1,64 @@
+"""Blaze e Telegram falsos em um processo próprio, tocando rodadas sintéticas.
+
+Escreve na saída uma linha JSON com as URLs (feed, API de recentes e Bot
+API). Quando o primeiro cliente se inscreve no feed, espera `aquecimento`
+s e publica `rodadas` rodadas na velocidade pedida (gerador_rodadas.py).
+Ao fechar a entrada padrão, escreve uma segunda linha JSON com o resumo
+(rodadas publicadas, atraso do gerador, chamadas recebidas pelo Telegram)
+e encerra. Usado por benchmarks/carga.py; rodar à parte serve para
+apontar um bot manual para os servidores falsos.
+
+Uso: python benchmarks/servidores_falsos.py [--velocidade V] [--rodadas R] [--atraso-telegram S]
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from gerador_rodadas import GeradorRodadas
+from servidor_blaze_falso import ServidorBlazeFalso
+from servidor_telegram_falso import ServidorTelegramFalso
+
+
+def emitir(dados):
+    print(json.dumps(dados), flush=True)
+
+
+async def tocar_quando_conectar(blaze, gerador, rodadas, aquecimento):
+    while not blaze.conexoes:
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(aquecimento)
+    await gerador.tocar(blaze.publicar_rodada, rodadas)
+
+
+async def main(args):
+    blaze = await ServidorBlazeFalso().iniciar()
+    telegram = await ServidorTelegramFalso(atraso=args.atraso_telegram).iniciar()
+    gerador = GeradorRodadas(args.velocidade)
+    emitir({"url_stream": blaze.url_stream, "url_recentes": blaze.url_recentes, "telegram": telegram.base_url,
+            "intervalo": gerador.intervalo})
+
+    tocador = asyncio.create_task(tocar_quando_conectar(blaze, gerador, args.rodadas, args.aquecimento))
+    # Roda até quem iniciou o processo fechar a entrada padrão
+    await asyncio.get_running_loop().run_in_executor(None, sys.stdin.read)
+    tocador.cancel()
+    await asyncio.gather(tocador, return_exceptions=True)
+
+    chamadas = Counter(metodo for metodo, _, _ in telegram.mensagens)
+    emitir({"rodadas_publicadas": len(gerador.publicadas), "atraso_gerador_max_ms": round(gerador.atraso_maximo * 1000, 2),
+            "telegram": dict(chamadas), "telegram_429": telegram.recusadas_429})
+    await blaze.parar()
+    await telegram.parar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--velocidade", type=float, default=100, help="vezes o ritmo real do jogo (1 = 30 s por rodada)")
+    parser.add_argument("--rodadas", type=int, default=50)
+    parser.add_argument("--aquecimento", type=float, default=1.0, help="espera, em s, entre a inscrição e a primeira rodada")
+    parser.add_argument("--atraso-telegram", type=float, default=0.0, help="latência simulada de cada chamada à Bot API")
+    asyncio.run(main(parser.parse_args()))
@@ -1,33 +1,89 @@
-import time
-from src.coletor import coletar_resultados
-from src.analisador import analisar_padroes
-from src.telegram_bot import enviar_sinal, registrar_resultado, obter_saldo_do_dia
+import sys
+import argparse
 
-def main():
-    print("🚀 Iniciando o Bot Blaze Double...")
-    
-    saldo = obter_saldo_do_dia()  # Pega o saldo atual
+# Cada subcomando importa os próprios módulos só quando é escolhido: `collect` não carrega
+# o Telegram, `stats` não carrega NumPy nem clientes HTTP. O carregador importa e devolve
+# a função que roda o subcomando (benchmarks/bench_inicializacao.py mede cada um).
 
-    while True:
-        resultados = coletar_resultados()
+def _carregar_bot():
+    import asyncio
+    from src.orquestrador import executar
 
-        if not resultados:
-            print("⚠️ Erro ao coletar resultados, tentando novamente...")
-            time.sleep(10)  # Espera antes de tentar novamente
-            continue
+    def rodar(args):
+        print("🚀 Iniciando o Bot Blaze Double...")
+        asyncio.run(executar(args.fonte, porta_metricas=args.porta_metricas, perfil=args.perfil or None))
+    return rodar
 
-        aposta, cor = analisar_padroes(resultados)
+def _carregar_collect():
+    from src import coletor
 
-        if aposta:
-            enviar_sinal(cor, aposta)
-            time.sleep(10)  # Aguarda o tempo para aposta ser feita
+    return lambda args: coletor.run(args.modo, args.dias, args.jogos)
 
-            # Aqui poderíamos validar o resultado no banco
-            # Exemplo: Se a aposta foi feita, registrar o resultado
-            resultado = 2 if cor == "red" else -2  # Simulação, precisa pegar da API
-            registrar_resultado(resultado)
+def _carregar_backtest():
+    from src import backtest
 
-        time.sleep(30)  # Aguarda um pouco antes de verificar de novo
+    return lambda args: backtest.run(args.regra, args.varrer, args.aposta_fixa)
+
+def _carregar_stats():
+    from src import agregados
+    from src.migracoes import aplicar_migracoes
+
+    def rodar(args):
+        aplicar_migracoes()
+        agregados.imprimir_estatisticas(args.horas)
+    return rodar
+
+COMANDOS = {
+    "bot": _carregar_bot,
+    "collect": _carregar_collect,
+    "backtest": _carregar_backtest,
+    "stats": _carregar_stats,
+}
+
+def criar_parser():
+    from src.metricas import PORTA_METRICAS
+
+    parser = argparse.ArgumentParser(description="Bot Blaze Double: coletor, analisador e bot do Telegram")
+    subcomandos = parser.add_subparsers(dest="comando")
+
+    bot = subcomandos.add_parser("bot", help="coletor, analisador e bot do Telegram em um único processo (padrão)")
+    bot.add_argument("--fonte", choices=["stream", "http"], default="stream",
+                     help="stream recebe as rodadas pelo websocket; http consulta a API no ritmo das rodadas")
+    bot.add_argument("--porta-metricas", type=int, default=PORTA_METRICAS,
+                     help="porta local do endpoint /metrics (0 desliga)")
+    bot.add_argument("--perfil", action="store_true",
+                     help="habilita o perfilador por amostragem (GET /perfil ou kill -USR1)")
+
+    collect = subcomandos.add_parser("collect", help="só o coletor de resultados")
+    collect.add_argument("--modo", choices=["polling", "stream", "backfill", "jogos"], default="polling",
+                         help="polling consulta a API no ritmo das rodadas; stream recebe as rodadas pelo websocket; "
+                              "backfill recupera o histórico e encerra; jogos acompanha vários jogos ao mesmo tempo")
+    collect.add_argument("--dias", type=float, default=1,
+                         help="quantos dias de histórico recuperar no modo backfill")
+    collect.add_argument("--jogos", type=lambda texto: [nome.strip() for nome in texto.split(",") if nome.strip()],
+                         help="jogos do modo jogos, separados por vírgula (ex.: double,crash); padrão: todos")
+
+    backtest = subcomandos.add_parser("backtest", help="backtest das regras do analisador sobre o histórico salvo")
+    backtest.add_argument("--regra", action="append", help="regra a testar (pode repetir); padrão: todas")
+    backtest.add_argument("--varrer", action="store_true", help="varre uma grade de stops e percentuais de aposta")
+    backtest.add_argument("--aposta-fixa", action="store_true",
+                          help="aposta fixa de R$2 (a do sinal do bot) em vez de percentual da banca")
+
+    stats = subcomandos.add_parser("stats", help="cores das rodadas e saldo do dia")
+    stats.add_argument("--horas", type=int, default=6, help="quantas horas detalhar")
+    return parser
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Sem subcomando (ou só com as opções antigas, ex.: --fonte http) roda o bot completo
+    if not argv or argv[0] not in COMANDOS and argv[0] not in ("-h", "--help"):
+        argv.insert(0, "bot")
+    args = criar_parser().parse_args(argv)
+
+    try:
+        COMANDOS[args.comando]()(args)
+    except KeyboardInterrupt:
+        print("👋 Bot encerrado.")
 
 if __name__ == "__main__":
     main()
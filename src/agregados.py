@@ -0,0 +1,187 @@
+from src import consultas
+from src.banco import DIA_MS, HORA_MS, conexao, dia_local_sql, hora_sql, inicio_da_hora_ms, inicio_do_dia_ms
+from src.metricas import cronometrado
+from src.modelo import BRANCO, PRETO, VERMELHO, nome_cor
+
+# As tabelas agregadas são mantidas pelos triggers da migração 3 (src/migracoes.py).
+# Este módulo lê os agregados e os reconstrói a partir das tabelas brutas quando necessário.
+TABELAS_AGREGADAS = ("resultados_por_hora", "resultados_por_dia", "apostas_por_usuario_dia")
+
+# Os agregados das rodadas movidas para o arquivo colunar (src/arquivo.py) são mantidos:
+# reconstrução e verificação só olham os períodos a partir do dia da rodada mais antiga do banco
+_PERIODO_QUENTE = {"resultados_por_hora": "hora", "resultados_por_dia": "dia"}
+
+_COLUNAS = {
+    "resultados_por_hora": ("hora", "cor", "quantidade"),
+    "resultados_por_dia": ("dia", "cor", "quantidade"),
+    "apostas_por_usuario_dia": ("dia", "usuario_id", "apostas", "vitorias", "derrotas", "pendentes",
+                                "valor_apostado", "saldo"),
+}
+
+_SELECTS_RECONSTRUCAO = {
+    "resultados_por_hora": f"""
+        SELECT {hora_sql("created_at")}, cor, COUNT(*)
+        FROM resultados WHERE created_at IS NOT NULL AND cor IS NOT NULL
+        GROUP BY 1, 2
+    """,
+    "resultados_por_dia": f"""
+        SELECT {dia_local_sql("created_at")}, cor, COUNT(*)
+        FROM resultados WHERE created_at IS NOT NULL AND cor IS NOT NULL
+        GROUP BY 1, 2
+    """,
+    "apostas_por_usuario_dia": f"""
+        SELECT {dia_local_sql("data")}, COALESCE(usuario_id, 0),
+               COUNT(*),
+               SUM(resultado IS 'win'),
+               SUM(resultado IS 'loss'),
+               SUM(resultado IS 'pendente'),
+               TOTAL(COALESCE(valor, 0)),
+               TOTAL(CASE resultado WHEN 'win' THEN valor WHEN 'loss' THEN -valor ELSE 0 END)
+        FROM apostas WHERE data IS NOT NULL
+        GROUP BY 1, 2
+    """,
+}
+
+
+def reconstruir_agregados(conn=None):
+    """Apaga e recalcula todas as tabelas agregadas a partir de `resultados` e `apostas`.
+
+    Usado pela migração que cria os agregados e para recuperação
+    (`python -m src.agregados --reconstruir`). Retorna {tabela: linhas}.
+    """
+    if conn is None:
+        with conexao() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            return reconstruir_agregados(conn)
+
+    limite = _inicio_do_periodo_quente(conn)
+    linhas = {}
+    for tabela in TABELAS_AGREGADAS:
+        filtro, parametros = _filtro_quente(tabela, limite)
+        conn.execute(f"DELETE FROM {tabela} WHERE {filtro}", parametros)
+        conn.execute(f"INSERT INTO {tabela} {_SELECTS_RECONSTRUCAO[tabela]}")
+        linhas[tabela] = conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+    return linhas
+
+
+def _inicio_do_periodo_quente(conn):
+    """Meia-noite local do dia da rodada mais antiga ainda na tabela `resultados` (hoje, se vazia)."""
+    primeira = conn.execute(consultas.PRIMEIRO_CREATED_AT).fetchone()[0]
+    if primeira is None:
+        return inicio_do_dia_ms()
+    return conn.execute(f"SELECT {dia_local_sql('?')}", (primeira,)).fetchone()[0]
+
+
+def _filtro_quente(tabela, limite):
+    """Condição SQL e parâmetros que selecionam as linhas recalculáveis da tabela."""
+    periodo = _PERIODO_QUENTE.get(tabela)
+    return (f"{periodo} >= ?", (limite,)) if periodo else ("1", ())
+
+
+def verificar_agregados():
+    """Compara os agregados mantidos pelos triggers com um recálculo completo.
+
+    Retorna {tabela: linhas divergentes}; tudo zero quando estão consistentes.
+    Linhas zeradas (ex.: depois de uma remoção) não contam como divergência,
+    os valores em reais são comparados com 6 casas e os períodos já
+    arquivados ficam de fora.
+    """
+    divergencias = {}
+    with conexao() as conn:
+        limite = _inicio_do_periodo_quente(conn)
+        for tabela in TABELAS_AGREGADAS:
+            colunas = _COLUNAS[tabela]
+            arredondadas = ", ".join(f"ROUND({c}, 6)" if c in ("valor_apostado", "saldo") else c for c in colunas)
+            filtro, parametros = _filtro_quente(tabela, limite)
+            atual = f"SELECT {arredondadas} FROM {tabela} WHERE {colunas[2]} != 0 AND {filtro}"
+            recalculado = f"SELECT {arredondadas} FROM recalculado"
+            divergencias[tabela] = conn.execute(f"""
+                WITH recalculado({", ".join(colunas)}) AS ({_SELECTS_RECONSTRUCAO[tabela]})
+                SELECT COUNT(*) FROM (
+                    SELECT * FROM ({atual} EXCEPT {recalculado})
+                    UNION ALL
+                    SELECT * FROM ({recalculado} EXCEPT {atual})
+                )
+            """, parametros * 2).fetchone()[0]
+    return divergencias
+
+
+# Funções de leitura (cada uma lê poucas linhas pela chave primária dos agregados)
+@cronometrado()
+def saldo_do_dia(usuario_id=None, dia=None):
+    """Lucro/prejuízo das apostas do dia (de um usuário ou de todos)."""
+    dia = dia if dia is not None else inicio_do_dia_ms()
+    with conexao() as conn:
+        if usuario_id is None:
+            return conn.execute(consultas.SALDO_DO_DIA, (dia,)).fetchone()[0]
+        linha = conn.execute(consultas.APOSTAS_DO_USUARIO_NO_DIA, (dia, usuario_id)).fetchone()
+    return linha[5] if linha else 0.0
+
+
+@cronometrado()
+def resumo_do_dia(usuario_id, dia=None):
+    """Apostas, vitórias, derrotas, pendentes, valor apostado e saldo do usuário no dia."""
+    dia = dia if dia is not None else inicio_do_dia_ms()
+    with conexao() as conn:
+        linha = conn.execute(consultas.APOSTAS_DO_USUARIO_NO_DIA, (dia, usuario_id)).fetchone()
+    campos = ("apostas", "vitorias", "derrotas", "pendentes", "valor_apostado", "saldo")
+    return dict(zip(campos, linha or (0, 0, 0, 0, 0.0, 0.0)))
+
+
+@cronometrado()
+def historico_do_usuario(usuario_id, dias=7):
+    """Resumo diário do usuário nos últimos `dias` dias, do mais recente ao mais antigo."""
+    desde = inicio_do_dia_ms() - (dias - 1) * DIA_MS
+    with conexao() as conn:
+        linhas = conn.execute(consultas.HISTORICO_DO_USUARIO, (usuario_id, desde)).fetchall()
+    campos = ("dia", "apostas", "vitorias", "derrotas", "valor_apostado", "saldo")
+    return [dict(zip(campos, linha)) for linha in linhas]
+
+
+@cronometrado()
+def estatisticas_de_cores(dia=None, horas=24):
+    """Contagem por cor no dia e em cada uma das últimas `horas` horas."""
+    dia = dia if dia is not None else inicio_do_dia_ms()
+    desde = inicio_da_hora_ms() - (horas - 1) * HORA_MS
+    with conexao() as conn:
+        do_dia = dict(conn.execute(consultas.CORES_DO_DIA, (dia,)).fetchall())
+        por_hora = {}
+        for hora, cor, quantidade in conn.execute(consultas.CORES_POR_HORA, (desde,)):
+            por_hora.setdefault(hora, {})[cor] = quantidade
+    return {"dia": do_dia, "por_hora": por_hora}
+
+
+
+def resumo_de_cores(contagem):
+    """Texto com a quantidade e a porcentagem de cada cor em {cor: quantidade}."""
+    total = sum(contagem.values())
+    if not total:
+        return "sem rodadas"
+    return " | ".join(f"{nome_cor(cor)} {contagem.get(cor, 0)} ({contagem.get(cor, 0) / total:.0%})"
+                      for cor in (VERMELHO, PRETO, BRANCO))
+
+
+def imprimir_estatisticas(horas=6):
+    """Resumo do dia no terminal (o mesmo do /stats, mais o saldo de todos os usuários)."""
+    from datetime import datetime
+
+    cores = estatisticas_de_cores(horas=horas)
+    print(f"🎲 Rodadas de hoje: {resumo_de_cores(cores['dia'])}")
+    for hora, contagem in sorted(cores["por_hora"].items(), reverse=True):
+        print(f"🕒 {datetime.fromtimestamp(hora / 1000):%H}h: {resumo_de_cores(contagem)}")
+    print(f"💰 Saldo do dia (todos os usuários): R${saldo_do_dia() or 0.0:.2f}")
+
+if __name__ == "__main__":
+    import sys
+
+    from src.migracoes import aplicar_migracoes
+
+    aplicar_migracoes()
+    if "--reconstruir" in sys.argv:
+        for tabela, total in reconstruir_agregados().items():
+            print(f"🔁 {tabela}: {total} linha(s) recalculada(s).")
+    divergencias = verificar_agregados()
+    for tabela, total in divergencias.items():
+        print(f"{'✅' if total == 0 else '❌'} {tabela}: {total} linha(s) divergente(s).")
+    if any(divergencias.values()):
+        sys.exit(1)
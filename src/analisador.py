@@ -0,0 +1,244 @@
+import os
+import itertools
+
+import numpy as np
+
+from src import consultas
+from src.arquivo import CAMINHO_ARQUIVO, ArquivoColunar
+from src.banco import conexao
+from src.modelo import BRANCO, CORES_VALIDAS, DURACAO_RODADA_MS, VERMELHO, PRETO, codigo_cor
+
+SEM_APOSTA = -1
+
+JANELAS_PADRAO = (10, 25, 50, 100)
+TAMANHO_NGRAMA = 3
+
+
+class Historico:
+    """Histórico de rodadas em arrays NumPy, do mais antigo ao mais novo.
+
+    Cores e números em int8; `created_at` em epoch ms (int64). Sem datas, as
+    rodadas são espaçadas de 30 s a partir da época.
+    """
+
+    def __init__(self, cores, numeros=None, created_at=None):
+        self.cores = np.asarray(cores, dtype=np.int8)
+        if numeros is None:
+            numeros = np.full(len(self.cores), -1, dtype=np.int8)
+        self.numeros = np.asarray(numeros, dtype=np.int8)
+        if created_at is None:
+            created_at = np.arange(len(self.cores), dtype=np.int64) * DURACAO_RODADA_MS
+        self.created_at = np.asarray(created_at, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.cores)
+
+    @classmethod
+    def das_linhas(cls, linhas):
+        """Monta o histórico a partir de linhas (numero, cor, created_at) já em inteiros."""
+        if not linhas:
+            return cls([])
+        colunas = np.fromiter(itertools.chain.from_iterable(linhas), dtype=np.int64, count=3 * len(linhas))
+        numeros, cores, created_at = colunas.reshape(-1, 3).T
+        return cls(cores, numeros, created_at)
+
+    @classmethod
+    def do_banco(cls, limite=None):
+        """Carrega o histórico do banco em ordem cronológica (percorre o índice de created_at)."""
+        with conexao() as conn:
+            if limite is None:
+                linhas = conn.execute(consultas.HISTORICO_COMPLETO).fetchall()
+            else:
+                linhas = conn.execute(consultas.RESULTADOS_RECENTES, (limite,)).fetchall()[::-1]
+                linhas = [(-1 if numero is None else numero, -1 if cor is None else cor, created_at or 0)
+                          for _, numero, cor, created_at in linhas]
+        return cls.das_linhas(linhas)
+
+    @classmethod
+    def do_arquivo(cls, caminho=CAMINHO_ARQUIVO, inicio_ms=None, fim_ms=None):
+        """Carrega as rodadas do arquivo colunar (mmap) no intervalo [inicio_ms, fim_ms)."""
+        with ArquivoColunar(caminho) as arquivo:
+            return cls(*arquivo.ler(inicio_ms, fim_ms))
+
+    @classmethod
+    def completo(cls, caminho=CAMINHO_ARQUIVO):
+        """Histórico inteiro: o arquivo colunar (se existir) seguido das rodadas do banco."""
+        if not os.path.exists(caminho):
+            return cls.do_banco()
+        with ArquivoColunar(caminho) as arquivo:
+            cores, numeros, created_at = arquivo.ler()
+            maximo = arquivo.maximo if arquivo.maximo is not None else -1
+        with conexao() as conn:
+            recentes = cls.das_linhas(conn.execute(consultas.HISTORICO_APOS, (maximo,)).fetchall())
+        return cls(
+            np.concatenate((cores, recentes.cores)),
+            np.concatenate((numeros, recentes.numeros)),
+            np.concatenate((created_at, recentes.created_at)),
+        )
+
+
+class Features:
+    """Features calculadas para cada posição do histórico em uma única passada vetorizada.
+
+    Todos os arrays têm o tamanho do histórico; a posição i descreve a
+    situação logo após a rodada i (sem olhar rodadas futuras).
+    """
+
+    def __init__(self, historico, janelas=JANELAS_PADRAO, tamanho_ngrama=TAMANHO_NGRAMA):
+        cores = historico.cores
+        n = len(cores)
+        indices = np.arange(n)
+        self.historico = historico
+        self.cores = cores
+
+        # Tamanho da sequência atual da mesma cor
+        mudou = np.ones(n, dtype=bool)
+        mudou[1:] = cores[1:] != cores[:-1]
+        inicio_sequencia = np.maximum.accumulate(np.where(mudou, indices, 0))
+        self.sequencia = indices - inicio_sequencia + 1
+
+        # Rodadas desde o último branco (n + 1 enquanto nenhum branco saiu)
+        ultimo_branco = np.maximum.accumulate(np.where(cores == BRANCO, indices, -1))
+        self.desde_branco = np.where(ultimo_branco >= 0, indices - ultimo_branco, indices + 1)
+
+        # Contagem de cada cor nas janelas móveis, a partir da soma acumulada do one-hot
+        acumulado = np.zeros((n + 1, 3), dtype=np.int32)
+        np.cumsum(cores[:, None] == np.arange(3, dtype=np.int8), axis=0, out=acumulado[1:])
+        self.janelas = {}
+        for janela in janelas:
+            inicio = np.maximum(indices + 1 - janela, 0)
+            self.janelas[janela] = acumulado[indices + 1] - acumulado[inicio]
+
+        # N-grama que termina em cada posição (código em base 3 das últimas `tamanho_ngrama` cores,
+        # -1 se faltar alguma ou houver cor desconhecida) e quantas vezes ele saiu até ali, inclusive
+        self.tamanho_ngrama = tamanho_ngrama
+        self.ngrama = np.full(n, -1, dtype=np.int64)
+        self.ocorrencias_ngrama = np.zeros(n, dtype=np.int64)
+        if n >= tamanho_ngrama:
+            valida = (cores >= 0) & (cores <= 2)
+            cores_validas = np.clip(cores, 0, 2).astype(np.int64)
+            codigos = np.zeros(n - tamanho_ngrama + 1, dtype=np.int64)
+            completo = np.ones(n - tamanho_ngrama + 1, dtype=bool)
+            for deslocamento in range(tamanho_ngrama):
+                fatia = slice(deslocamento, n - tamanho_ngrama + 1 + deslocamento)
+                codigos = codigos * 3 + cores_validas[fatia]
+                completo &= valida[fatia]
+            self.ngrama[tamanho_ngrama - 1:] = np.where(completo, codigos, -1)
+
+            # Contagem acumulada por código: ordena as posições por código (estável, então
+            # cronológica dentro de cada código) e numera cada posição dentro do seu grupo
+            posicoes = np.flatnonzero(self.ngrama >= 0)
+            ordem = posicoes[np.argsort(self.ngrama[posicoes], kind="stable")]
+            ordenados = self.ngrama[ordem]
+            inicio_grupo = np.flatnonzero(np.concatenate(([True], ordenados[1:] != ordenados[:-1])))
+            tamanho_grupo = np.diff(np.append(inicio_grupo, len(ordem)))
+            self.ocorrencias_ngrama[ordem] = np.arange(len(ordem)) - np.repeat(inicio_grupo, tamanho_grupo) + 1
+
+    def frequencia(self, janela):
+        """Frequência (branco, vermelho, preto) em cada posição para a janela informada."""
+        contagem = self.janelas[janela]
+        return contagem / np.maximum(contagem.sum(axis=1, keepdims=True), 1)
+
+
+# Registro de regras: cada regra recebe as Features e devolve, para cada posição,
+# a cor a apostar na rodada seguinte (ou SEM_APOSTA).
+REGRAS = {}
+
+
+def regra(nome):
+    """Decorador que registra uma estratégia no analisador."""
+    def registrar(funcao):
+        REGRAS[nome] = funcao
+        return funcao
+    return registrar
+
+
+@regra("tendencia_100")
+def _tendencia(features, janela=100, vantagem=0.05):
+    """Aposta na cor (vermelho/preto) mais frequente nas últimas 100 rodadas.
+
+    Só dispara quando a diferença entre as frequências passa de `vantagem`;
+    com a janela vazia ou as duas cores empatadas, não aposta.
+    """
+    frequencia = features.frequencia(janela)
+    diferenca = frequencia[:, VERMELHO] - frequencia[:, PRETO]
+    return np.select([diferenca >= vantagem, diferenca <= -vantagem], [VERMELHO, PRETO], SEM_APOSTA).astype(np.int8)
+
+
+@regra("quebra_de_sequencia")
+def _quebra_de_sequencia(features, minimo=4):
+    """Depois de `minimo` cores iguais seguidas (vermelho ou preto), aposta na cor oposta."""
+    cores = features.cores
+    oposta = np.where(cores == VERMELHO, PRETO, VERMELHO)
+    dispara = (features.sequencia >= minimo) & (cores != BRANCO) & (cores >= 0)
+    return np.where(dispara, oposta, SEM_APOSTA).astype(np.int8)
+
+
+@regra("seguir_sequencia")
+def _seguir_sequencia(features, minimo=2, maximo=3):
+    """Acompanha sequências curtas (2 a 3 vermelhos ou pretos iguais)."""
+    cores = features.cores
+    dispara = (features.sequencia >= minimo) & (features.sequencia <= maximo) & (cores != BRANCO) & (cores >= 0)
+    return np.where(dispara, cores, SEM_APOSTA).astype(np.int8)
+
+
+@regra("branco_atrasado")
+def _branco_atrasado(features, atraso=40):
+    """Aposta no branco quando ele não sai há pelo menos `atraso` rodadas."""
+    return np.where(features.desde_branco >= atraso, BRANCO, SEM_APOSTA).astype(np.int8)
+
+
+@regra("desequilibrio_curto")
+def _desequilibrio_curto(features, janela=10, limite=0.7):
+    """Aposta contra a cor dominante quando ela passa de 70% nas últimas 10 rodadas."""
+    frequencia = features.frequencia(janela)
+    dispara_vermelho = frequencia[:, VERMELHO] >= limite
+    dispara_preto = frequencia[:, PRETO] >= limite
+    return np.select([dispara_vermelho, dispara_preto], [PRETO, VERMELHO], SEM_APOSTA).astype(np.int8)
+
+
+def avaliar_regras(features, regras=None):
+    """Avalia as regras sobre todas as posições. Retorna {nome: array de sinais}."""
+    regras = REGRAS if regras is None else {nome: REGRAS[nome] for nome in regras}
+    return {nome: funcao(features) for nome, funcao in regras.items()}
+
+
+def analisar_padroes(resultados=None, regras=None, indice=None):
+    """Gera o sinal para a próxima rodada a partir do histórico.
+
+    `resultados` pode ser um Historico, uma lista de cores (códigos ou nomes)
+    ou None para carregar do banco. Retorna (nome_da_regra, código da cor) da
+    primeira regra que disparar na última rodada, ou (None, None).
+
+    Com um `indice` de padrões (src.padroes), se nenhuma regra disparar, o
+    sinal vem da cor que mais seguiu as últimas cores em todo o histórico
+    (regra "padrao_historico").
+    """
+    if isinstance(resultados, Historico):
+        historico = resultados
+    elif resultados is None:
+        historico = Historico.do_banco(max(JANELAS_PADRAO))
+    else:
+        historico = Historico([codigo_cor(c) for c in resultados])
+
+    if len(historico) == 0:
+        return None, None
+
+    sinais = avaliar_regras(Features(historico), regras)
+    for nome, sinal in sinais.items():
+        cor = int(sinal[-1])
+        if cor != SEM_APOSTA:
+            return nome, cor
+
+    if indice is not None:
+        from src.padroes import sinal_do_indice
+
+        # O padrão atual começa depois da última cor desconhecida
+        cores = historico.cores[-indice.tamanho_maximo:].tolist()
+        desconhecidas = [i for i, c in enumerate(cores) if c not in CORES_VALIDAS]
+        if desconhecidas:
+            cores = cores[desconhecidas[-1] + 1:]
+        cor, _, _ = sinal_do_indice(indice, cores)
+        if cor is not None:
+            return "padrao_historico", cor
+    return None, None
@@ -0,0 +1,263 @@
+import os
+import sys
+import mmap
+import logging
+
+import numpy as np
+
+from src import consultas
+from src.banco import DB_PATH, DIA_MS, conexao, inicio_do_dia_ms, ms_para_texto
+
+# Arquivo colunar com o histórico frio das rodadas, ao lado do banco
+CAMINHO_ARQUIVO = os.getenv("BLAZE_ARQUIVO_PATH", os.path.splitext(DB_PATH)[0] + ".arquivo")
+
+# Dias mais recentes que continuam na tabela `resultados` (o restante vai para o arquivo)
+DIAS_QUENTES = 7
+RODADAS_POR_BLOCO = 65536
+
+# Layout do arquivo (little-endian):
+#   cabeçalho: MAGICO (8 bytes) + versão (u4) + reservado (u4)
+#   blocos:    `linhas` bytes de código (cor nos bits 0-1, número nos bits 2-5),
+#              alinhamento para 4 bytes e `linhas` deltas de created_at (u2, u4 ou u8,
+#              o menor em que cabe o maior delta do bloco)
+#   índice:    um registro INDICE por bloco
+#   rodapé:    deslocamento do índice (u8) + quantidade de blocos (u4) + FIM (4 bytes)
+MAGICO = b"BLZCOL\x00\x01"
+VERSAO = 1
+CABECALHO = np.dtype([("magico", "S8"), ("versao", "<u4"), ("reservado", "<u4")])
+INDICE = np.dtype([
+    ("deslocamento", "<u8"),
+    ("linhas", "<u4"),
+    ("largura_delta", "<u4"),
+    ("minimo", "<i8"),    # created_at da primeira rodada do bloco (base dos deltas)
+    ("maximo", "<i8"),    # created_at da última rodada do bloco
+])
+RODAPE = np.dtype([("indice", "<u8"), ("blocos", "<u4"), ("fim", "S4")])
+FIM = b"BLZF"
+
+# Valores reservados para cor e número desconhecidos
+COR_DESCONHECIDA = 3
+NUMERO_DESCONHECIDO = 15
+
+
+def codificar(cores, numeros):
+    """Junta cor (2 bits) e número (4 bits) em um byte por rodada."""
+    cores = np.asarray(cores, dtype=np.int16)
+    numeros = np.asarray(numeros, dtype=np.int16)
+    cores = np.where((cores >= 0) & (cores < COR_DESCONHECIDA), cores, COR_DESCONHECIDA)
+    numeros = np.where((numeros >= 0) & (numeros < NUMERO_DESCONHECIDO), numeros, NUMERO_DESCONHECIDO)
+    return (cores | (numeros << 2)).astype(np.uint8)
+
+
+def decodificar(codigos):
+    """Separa os códigos em (cores, números) int8, com -1 para desconhecidos."""
+    cores = (codigos & 0b11).astype(np.int8)
+    numeros = (codigos >> 2).astype(np.int8)
+    cores[cores == COR_DESCONHECIDA] = -1
+    numeros[numeros == NUMERO_DESCONHECIDO] = -1
+    return cores, numeros
+
+
+def _bloco_em_bytes(codigos, created_at):
+    """Serializa um bloco (created_at em ordem crescente). Retorna (bytes, largura do delta)."""
+    deltas = np.diff(created_at, prepend=created_at[:1])
+    assert deltas.min(initial=0) >= 0, "created_at fora de ordem no bloco"
+    maior = deltas.max(initial=0)
+    largura = next(largura for largura in (2, 4, 8) if maior <= np.iinfo(f"<u{largura}").max)
+    alinhamento = b"\x00" * (-len(codigos) % 4)
+    return codigos.tobytes() + alinhamento + deltas.astype(f"<u{largura}").tobytes(), largura
+
+
+class ArquivoColunar:
+    """Leitura do arquivo colunar por mmap.
+
+    O índice e os códigos de cada bloco são views NumPy sobre o mmap (sem
+    cópia); só os created_at são reconstruídos a partir dos deltas. Os blocos
+    fora do intervalo pedido são descartados pelo mínimo/máximo do índice.
+    """
+
+    def __init__(self, caminho=CAMINHO_ARQUIVO):
+        self.caminho = caminho
+        with open(caminho, "rb") as arquivo:
+            self._mmap = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        cabecalho = np.frombuffer(self._mmap, CABECALHO, count=1)[0]
+        rodape = np.frombuffer(self._mmap, RODAPE, count=1, offset=len(self._mmap) - RODAPE.itemsize)[0]
+        if cabecalho["magico"] != MAGICO or rodape["fim"] != FIM:
+            raise ValueError(f"Arquivo colunar inválido: {caminho}")
+        if cabecalho["versao"] != VERSAO:
+            raise ValueError(f"Versão do arquivo colunar não suportada: {cabecalho['versao']}")
+        self.indice = np.frombuffer(self._mmap, INDICE, count=int(rodape["blocos"]), offset=int(rodape["indice"]))
+
+    def __len__(self):
+        return int(self.indice["linhas"].sum())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+    def fechar(self):
+        # As views do índice seguram o buffer; o mmap é liberado quando elas somem
+        self.indice = self.indice[:0].copy()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    @property
+    def minimo(self):
+        return int(self.indice["minimo"][0]) if len(self.indice) else None
+
+    @property
+    def maximo(self):
+        return int(self.indice["maximo"][-1]) if len(self.indice) else None
+
+    def codigos(self, bloco):
+        """Códigos (cor e número) do bloco, como view sobre o mmap."""
+        entrada = self.indice[bloco]
+        return np.frombuffer(self._mmap, np.uint8, count=int(entrada["linhas"]), offset=int(entrada["deslocamento"]))
+
+    def created_at(self, bloco):
+        """created_at (epoch ms) do bloco, reconstruído dos deltas."""
+        entrada = self.indice[bloco]
+        linhas = int(entrada["linhas"])
+        deslocamento = int(entrada["deslocamento"]) + linhas + (-linhas % 4)
+        deltas = np.frombuffer(self._mmap, f"<u{int(entrada['largura_delta'])}", count=linhas, offset=deslocamento)
+        return int(entrada["minimo"]) + np.cumsum(deltas, dtype=np.int64)
+
+    def blocos(self, inicio_ms=None, fim_ms=None):
+        """Blocos que podem ter rodadas com inicio_ms <= created_at < fim_ms."""
+        selecionados = np.ones(len(self.indice), dtype=bool)
+        if inicio_ms is not None:
+            selecionados &= self.indice["maximo"] >= inicio_ms
+        if fim_ms is not None:
+            selecionados &= self.indice["minimo"] < fim_ms
+        return np.flatnonzero(selecionados)
+
+    def ler(self, inicio_ms=None, fim_ms=None):
+        """Retorna (cores, números, created_at) das rodadas do intervalo, em ordem cronológica."""
+        cores, numeros, datas = [], [], []
+        for bloco in self.blocos(inicio_ms, fim_ms):
+            created_at = self.created_at(bloco)
+            primeira = 0 if inicio_ms is None else np.searchsorted(created_at, inicio_ms)
+            ultima = len(created_at) if fim_ms is None else np.searchsorted(created_at, fim_ms)
+            bloco_cores, bloco_numeros = decodificar(self.codigos(bloco)[primeira:ultima])
+            cores.append(bloco_cores)
+            numeros.append(bloco_numeros)
+            datas.append(created_at[primeira:ultima])
+        if not datas:
+            return np.zeros(0, np.int8), np.zeros(0, np.int8), np.zeros(0, np.int64)
+        return np.concatenate(cores), np.concatenate(numeros), np.concatenate(datas)
+
+
+def gravar_arquivo(caminho, cores, numeros, created_at, rodadas_por_bloco=RODADAS_POR_BLOCO):
+    """Acrescenta as rodadas (ordenadas por created_at) ao arquivo e retorna quantas foram gravadas.
+
+    Rodadas com created_at até o máximo já arquivado são ignoradas, então
+    repetir um arquivamento interrompido não duplica nada. O arquivo é
+    regravado em um temporário e trocado de uma vez (os blocos existentes
+    são copiados como estão).
+    """
+    cores = np.asarray(cores)
+    numeros = np.asarray(numeros)
+    created_at = np.asarray(created_at, dtype=np.int64)
+    if np.any(np.diff(created_at) < 0):
+        raise ValueError("As rodadas precisam estar ordenadas por created_at")
+
+    blocos_antigos, indice_antigo = [], np.zeros(0, INDICE)
+    if os.path.exists(caminho):
+        with ArquivoColunar(caminho) as anterior:
+            indice_antigo = anterior.indice.copy()
+            for entrada in indice_antigo:
+                linhas = int(entrada["linhas"])
+                tamanho = linhas + (-linhas % 4) + linhas * int(entrada["largura_delta"])
+                inicio = int(entrada["deslocamento"])
+                blocos_antigos.append(anterior._mmap[inicio:inicio + tamanho])
+            if anterior.maximo is not None:
+                novas = created_at > anterior.maximo
+                cores, numeros, created_at = cores[novas], numeros[novas], created_at[novas]
+    if len(created_at) == 0:
+        return 0
+
+    codigos = codificar(cores, numeros)
+    indice = []
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as arquivo:
+        cabecalho = np.zeros(1, CABECALHO)
+        cabecalho[0] = (MAGICO, VERSAO, 0)
+        arquivo.write(cabecalho.tobytes())
+        for entrada, dados in zip(indice_antigo, blocos_antigos):
+            indice.append((arquivo.tell(), entrada["linhas"], entrada["largura_delta"], entrada["minimo"], entrada["maximo"]))
+            arquivo.write(dados)
+        for inicio in range(0, len(created_at), rodadas_por_bloco):
+            bloco_codigos = codigos[inicio:inicio + rodadas_por_bloco]
+            bloco_datas = created_at[inicio:inicio + rodadas_por_bloco]
+            dados, largura = _bloco_em_bytes(bloco_codigos, bloco_datas)
+            indice.append((arquivo.tell(), len(bloco_datas), largura, bloco_datas[0], bloco_datas[-1]))
+            arquivo.write(dados)
+        arquivo.write(b"\x00" * (-arquivo.tell() % 8))
+        deslocamento_indice = arquivo.tell()
+        arquivo.write(np.array(indice, dtype=INDICE).tobytes())
+        rodape = np.zeros(1, RODAPE)
+        rodape[0] = (deslocamento_indice, len(indice), FIM)
+        arquivo.write(rodape.tobytes())
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+    os.replace(temporario, caminho)
+    return len(created_at)
+
+
+def arquivar(dias_quentes=DIAS_QUENTES, caminho=CAMINHO_ARQUIVO):
+    """Move as rodadas anteriores aos últimos `dias_quentes` dias para o arquivo colunar.
+
+    O corte é sempre uma meia-noite local, então os agregados por hora e por
+    dia das rodadas arquivadas continuam completos: a remoção não passa pelos
+    triggers dos agregados (ver src/agregados.py). Retorna a quantidade de
+    rodadas arquivadas.
+    """
+    from src.migracoes import aplicar_migracoes
+
+    aplicar_migracoes()
+    corte = inicio_do_dia_ms() - dias_quentes * DIA_MS
+    with conexao() as conn:
+        # Lock de escrita durante todo o arquivamento: nenhuma rodada antiga entra no meio
+        conn.execute("BEGIN IMMEDIATE")
+        linhas = conn.execute(consultas.HISTORICO_ATE, (corte,)).fetchall()
+        if not linhas:
+            return 0
+        numeros, cores, created_at = np.array(linhas, dtype=np.int64).T
+        gravar_arquivo(caminho, cores, numeros, created_at)
+
+        triggers = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'resultados' AND name LIKE '%_remocao'"
+        ).fetchall()
+        for nome, _ in triggers:
+            conn.execute(f"DROP TRIGGER {nome}")
+        conn.execute(consultas.REMOVER_RESULTADOS_ATE, (corte,))
+        for _, sql in triggers:
+            conn.execute(sql)
+    logging.info(f"{len(linhas)} rodada(s) anteriores a {ms_para_texto(corte)} movidas para {caminho}")
+    return len(linhas)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Arquivo colunar com o histórico frio das rodadas")
+    parser.add_argument("--dias", type=int, default=DIAS_QUENTES, help="dias que ficam na tabela resultados")
+    parser.add_argument("--info", action="store_true", help="só mostra os blocos do arquivo")
+    args = parser.parse_args()
+
+    if not args.info:
+        print(f"📦 {arquivar(args.dias)} rodada(s) arquivada(s).")
+    if not os.path.exists(CAMINHO_ARQUIVO):
+        print("Nenhum arquivo colunar ainda.")
+        sys.exit(0)
+    with ArquivoColunar() as arquivo:
+        tamanho = os.path.getsize(CAMINHO_ARQUIVO)
+        print(f"{CAMINHO_ARQUIVO}: {len(arquivo)} rodada(s) em {len(arquivo.indice)} bloco(s), "
+              f"{tamanho} bytes ({tamanho / max(len(arquivo), 1):.2f} bytes/rodada)")
+        for entrada in arquivo.indice:
+            print(f"  {ms_para_texto(int(entrada['minimo']))} -> {ms_para_texto(int(entrada['maximo']))}: "
+                  f"{entrada['linhas']} rodada(s), deltas u{entrada['largura_delta'] * 8}")
@@ -0,0 +1,74 @@
+import time
+from datetime import datetime, timedelta
+
+import requests
+
+from src.coletor import (
+    URL_RECENTES,
+    converter_resultado,
+    criar_tabela,
+    headers,
+    salvar_resultados_em_lote,
+)
+
+# Endpoint paginado com o histórico do Double
+URL_HISTORICO = "https://blaze.bet.br/api/singleplayer-originals/originals/roulette_games/recent/history/1"
+
+FORMATO_DATA_API = "%Y-%m-%dT%H:%M:%S.000Z"
+TIMEOUT = 15
+MAX_PAGINAS = 10000
+
+
+def buscar_pagina_historico(sessao, inicio, fim, pagina, url=URL_HISTORICO):
+    """Busca uma página do histórico. Retorna (resultados, total_de_paginas)."""
+    params = {
+        "startDate": inicio.strftime(FORMATO_DATA_API),
+        "endDate": fim.strftime(FORMATO_DATA_API),
+        "page": pagina,
+    }
+    response = sessao.get(url, params=params, headers=headers, timeout=TIMEOUT)
+    response.raise_for_status()
+    data = response.json()
+
+    # A API devolve {"records": [...], "total_pages": N}; aceitamos também uma lista simples
+    if isinstance(data, list):
+        return [converter_resultado(r) for r in data], 1
+    registros = data.get("records") or []
+    return [converter_resultado(r) for r in registros], data.get("total_pages") or 1
+
+
+def executar_backfill(dias=1, fim=None, url_recentes=URL_RECENTES, url_historico=URL_HISTORICO, sessao=None):
+    """Percorre a página de recentes e o histórico página a página gravando tudo em lote.
+
+    Cada página é deduplicada por `created_at` e gravada com um único
+    executemany. Retorna a quantidade de rodadas recuperadas.
+    """
+    criar_tabela()
+    fim = fim or datetime.utcnow()
+    inicio = fim - timedelta(days=dias)
+    sessao = sessao or requests.Session()
+
+    recuperadas = 0
+    lidas = 0
+    comeco = time.perf_counter()
+    try:
+        response = sessao.get(url_recentes, headers=headers, timeout=TIMEOUT)
+        response.raise_for_status()
+        recentes = [converter_resultado(r) for r in response.json()]
+        lidas += len(recentes)
+        recuperadas += salvar_resultados_em_lote(recentes)
+
+        pagina, total_paginas = 1, 1
+        while pagina <= min(total_paginas, MAX_PAGINAS):
+            resultados, total_paginas = buscar_pagina_historico(sessao, inicio, fim, pagina, url_historico)
+            if not resultados:
+                break
+            lidas += len(resultados)
+            recuperadas += salvar_resultados_em_lote(resultados)
+            pagina += 1
+    except requests.exceptions.RequestException as e:
+        print(f"Erro na requisição durante o backfill: {e}")
+
+    duracao = time.perf_counter() - comeco
+    print(f"📥 Backfill concluído: {recuperadas} rodada(s) recuperada(s) de {lidas} lida(s) em {duracao:.1f} s.")
+    return recuperadas
@@ -0,0 +1,248 @@
+import os
+import inspect
+import itertools
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.analisador import BRANCO, REGRAS, Features, Historico
+from src.modelo import PAGAMENTO_BRANCO, PAGAMENTO_COR
+
+# Mesmas regras de gestão de banca usadas pelo bot (telegram_bot.py)
+STOP_WIN = 5
+STOP_LOSS = -5
+APOSTA_PADRAO = 2
+PERCENTUAL_APOSTA = 0.02
+BANCA_INICIAL = 100.0
+
+DIA_MS = 24 * 60 * 60 * 1000
+HORA_MS = 60 * 60 * 1000
+
+
+class ResultadoBacktest:
+    """Resultado da simulação de uma regra com uma configuração de banca."""
+
+    def __init__(self, regra, parametros, curva, lucros, dias_stop_win, dias_stop_loss, quebrou):
+        self.regra = regra
+        self.parametros = parametros
+        self.curva = curva        # banca após cada aposta executada
+        self.lucros = lucros      # lucro/prejuízo de cada aposta executada
+        self.dias_stop_win = dias_stop_win
+        self.dias_stop_loss = dias_stop_loss
+        self.quebrou = quebrou
+
+    @property
+    def apostas(self):
+        return len(self.lucros)
+
+    @property
+    def taxa_acerto(self):
+        return float(np.mean(self.lucros > 0)) if self.apostas else 0.0
+
+    @property
+    def lucro_total(self):
+        return float(self.lucros.sum())
+
+    @property
+    def drawdown(self):
+        """Série de drawdown (queda em relação ao pico anterior da banca)."""
+        if not self.apostas:
+            return np.zeros(0)
+        curva = np.concatenate(([self.parametros["banca_inicial"]], self.curva))
+        return np.maximum.accumulate(curva) - curva
+
+    def resumo(self):
+        drawdown = self.drawdown
+        picos = np.maximum.accumulate(np.concatenate(([self.parametros["banca_inicial"]], self.curva)))
+        return {
+            "regra": self.regra,
+            **self.parametros,
+            "apostas": self.apostas,
+            "taxa_acerto": round(self.taxa_acerto, 4),
+            "lucro_total": round(self.lucro_total, 2),
+            "banca_final": round(float(self.curva[-1]), 2) if self.apostas else self.parametros["banca_inicial"],
+            "drawdown_maximo": round(float(drawdown.max()), 2) if drawdown.size else 0.0,
+            "drawdown_maximo_pct": round(float((drawdown / picos).max()), 4) if drawdown.size else 0.0,
+            "dias_stop_win": self.dias_stop_win,
+            "dias_stop_loss": self.dias_stop_loss,
+            "quebrou": self.quebrou,
+        }
+
+
+def _parametros_da_regra(funcao, parametros):
+    """Separa os parâmetros aceitos pela função da regra."""
+    aceitos = inspect.signature(funcao).parameters
+    return {k: v for k, v in parametros.items() if k in aceitos and k != "features"}
+
+
+def dias_locais(created_at):
+    """Número do dia local de cada created_at (epoch ms), no fuso da máquina como banco.dia_local_sql.
+
+    O deslocamento do fuso (que muda no horário de verão) é calculado uma vez
+    por hora distinta do histórico, não por rodada.
+    """
+    horas, posicao = np.unique(np.asarray(created_at) // HORA_MS, return_inverse=True)
+    deslocamentos = np.array([datetime.fromtimestamp(hora * 3600, timezone.utc).astimezone().utcoffset().total_seconds()
+                              for hora in horas.tolist()], dtype=np.int64) * 1000
+    return (created_at + deslocamentos[posicao]) // DIA_MS
+
+
+def simular(features, regra, banca_inicial=BANCA_INICIAL, percentual_aposta=PERCENTUAL_APOSTA,
+            aposta_fixa=None, stop_win=STOP_WIN, stop_loss=STOP_LOSS, dias=None, **parametros_regra):
+    """Reproduz o histórico com uma regra aplicando o tamanho da aposta e os stops diários.
+
+    Os sinais e os retornos de todas as apostas são calculados de uma vez;
+    só a composição da banca é feita dia a dia (um bloco vetorizado por dia),
+    porque os stops dependem do saldo acumulado no próprio dia (dia local;
+    `dias` evita recalcular dias_locais a cada regra). Apostas cuja rodada
+    saiu com cor desconhecida ficam de fora.
+    """
+    funcao = REGRAS[regra]
+    sinal = funcao(features, **_parametros_da_regra(funcao, parametros_regra))
+    cores = features.cores
+    dias = dias_locais(features.historico.created_at) if dias is None else dias
+
+    # O sinal da posição i é a aposta na rodada i + 1 (sem resultado se a cor dela é desconhecida)
+    posicoes = np.flatnonzero((sinal[:-1] >= 0) & (cores[1:] >= 0))
+    apostada = sinal[posicoes]
+    saiu = cores[posicoes + 1]
+    pagamento = np.where(apostada == BRANCO, PAGAMENTO_BRANCO, PAGAMENTO_COR)
+    retorno = np.where(saiu == apostada, pagamento - 1, -1).astype(np.float64)
+    dia_aposta = dias[posicoes + 1]
+
+    curvas, lucros = [], []
+    banca = float(banca_inicial)
+    dias_stop_win = dias_stop_loss = 0
+    quebrou = False
+    limites_dia = np.flatnonzero(np.diff(dia_aposta)) + 1
+    for bloco in np.split(retorno, limites_dia):
+        if aposta_fixa is not None:
+            lucro_acumulado = np.cumsum(bloco * aposta_fixa)
+            banca_bloco = banca + lucro_acumulado
+        else:
+            banca_bloco = banca * np.cumprod(1 + percentual_aposta * bloco)
+            lucro_acumulado = banca_bloco - banca
+
+        # Primeira aposta em que o stop do dia (ou a quebra da banca) é atingido
+        parada = np.flatnonzero((lucro_acumulado >= stop_win) | (lucro_acumulado <= stop_loss) | (banca_bloco <= 0))
+        fim = parada[0] + 1 if parada.size else len(bloco)
+        if parada.size:
+            if lucro_acumulado[parada[0]] >= stop_win:
+                dias_stop_win += 1
+            else:
+                dias_stop_loss += 1
+
+        banca_bloco = banca_bloco[:fim]
+        curvas.append(banca_bloco)
+        lucros.append(np.diff(np.concatenate(([banca], banca_bloco))))
+        banca = float(banca_bloco[-1]) if fim else banca
+        if banca <= 0:
+            quebrou = True
+            break
+
+    parametros = {
+        "banca_inicial": banca_inicial,
+        "percentual_aposta": percentual_aposta,
+        "aposta_fixa": aposta_fixa,
+        "stop_win": stop_win,
+        "stop_loss": stop_loss,
+        **parametros_regra,
+    }
+    return ResultadoBacktest(
+        regra,
+        parametros,
+        np.concatenate(curvas) if curvas else np.zeros(0),
+        np.concatenate(lucros) if lucros else np.zeros(0),
+        dias_stop_win,
+        dias_stop_loss,
+        quebrou,
+    )
+
+
+def executar_backtest(historico=None, regras=None, **parametros):
+    """Roda as regras (todas por padrão) sobre o histórico completo (arquivo + banco) ou o informado."""
+    historico = historico if historico is not None else Historico.completo()
+    features = Features(historico)
+    dias = dias_locais(historico.created_at)
+    return [simular(features, regra, dias=dias, **parametros) for regra in (regras or REGRAS)]
+
+
+# Estado de cada processo da varredura: as features e os dias são calculados uma vez por worker
+_features_do_worker = None
+_dias_do_worker = None
+
+
+def _iniciar_worker(cores, numeros, created_at):
+    global _features_do_worker, _dias_do_worker
+    _features_do_worker = Features(Historico(cores, numeros, created_at))
+    _dias_do_worker = dias_locais(created_at)
+
+
+def _simular_no_worker(combinacao):
+    return simular(_features_do_worker, dias=_dias_do_worker, **combinacao).resumo()
+
+
+def varrer_parametros(grade, historico=None, processos=None):
+    """Testa todas as combinações da grade em paralelo (um processo por núcleo).
+
+    `grade` mapeia nome do parâmetro -> lista de valores; a chave "regra"
+    escolhe as regras e as demais vão para `simular` ou para a função da regra.
+    Retorna os resumos ordenados pelo lucro total.
+    """
+    historico = historico if historico is not None else Historico.completo()
+    grade = dict(grade)
+    grade.setdefault("regra", list(REGRAS))
+    nomes = list(grade)
+    combinacoes = [dict(zip(nomes, valores)) for valores in itertools.product(*grade.values())]
+
+    processos = processos or os.cpu_count()
+    with ProcessPoolExecutor(
+        max_workers=processos,
+        initializer=_iniciar_worker,
+        initargs=(historico.cores, historico.numeros, historico.created_at),
+    ) as executor:
+        resumos = list(executor.map(_simular_no_worker, combinacoes, chunksize=max(1, len(combinacoes) // (processos * 4))))
+
+    return sorted(resumos, key=lambda r: r["lucro_total"], reverse=True)
+
+
+def run(regras=None, varrer=False, aposta_fixa=False):
+    """Roda o backtest (ou a varredura de parâmetros) e imprime os 20 melhores resultados.
+
+    Com `aposta_fixa`, cada aposta vale APOSTA_PADRAO (o valor do sinal do bot)
+    em vez de um percentual da banca; a varredura então só varia os stops.
+    """
+    fixa = APOSTA_PADRAO if aposta_fixa else None
+    if varrer:
+        grade = {
+            "regra": regras or list(REGRAS),
+            "aposta_fixa": [fixa],
+            "percentual_aposta": [PERCENTUAL_APOSTA] if aposta_fixa else [0.01, 0.02, 0.05],
+            "stop_win": [5, 10, 20],
+            "stop_loss": [-5, -10, -20],
+        }
+        resumos = varrer_parametros(grade)
+    else:
+        resumos = [r.resumo() for r in executar_backtest(regras=regras, aposta_fixa=fixa)]
+
+    for resumo in resumos[:20]:
+        aposta = f"R${resumo['aposta_fixa']:.2f}" if resumo["aposta_fixa"] is not None else f"{resumo['percentual_aposta']:.0%}"
+        print(
+            f"{resumo['regra']:<22} aposta={aposta:<7} apostas={resumo['apostas']:<6} acerto={resumo['taxa_acerto']:.2%} "
+            f"lucro=R${resumo['lucro_total']:.2f} drawdown=R${resumo['drawdown_maximo']:.2f} "
+            f"stops(win/loss)={resumo['dias_stop_win']}/{resumo['dias_stop_loss']}"
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backtest das regras do analisador sobre o histórico salvo")
+    parser.add_argument("--regra", action="append", help="regra a testar (pode repetir); padrão: todas")
+    parser.add_argument("--varrer", action="store_true", help="varre uma grade de stops e percentuais de aposta")
+    parser.add_argument("--aposta-fixa", action="store_true",
+                        help=f"aposta fixa de R${APOSTA_PADRAO} (a do sinal do bot) em vez de percentual da banca")
+    args = parser.parse_args()
+
+    run(args.regra, args.varrer, args.aposta_fixa)
@@ -0,0 +1,180 @@
+import os
+import time
+import queue
+import sqlite3
+import logging
+import calendar
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Banco de Dados compartilhado entre o coletor e o bot do Telegram
+DB_PATH = os.getenv(
+    "BLAZE_DB_PATH",
+    os.path.join(os.path.dirname(__file__), 'dist', 'data', 'blaze_double.db'),
+)
+
+TAMANHO_POOL = 4
+STATEMENTS_EM_CACHE = 128
+
+# Expressão SQL para o instante atual em milissegundos desde a época (UTC)
+AGORA_MS_SQL = "(CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER))"
+
+HORA_MS = 60 * 60 * 1000
+DIA_MS = 24 * HORA_MS
+
+
+def hora_sql(coluna):
+    """Expressão SQL com o início da hora (epoch ms) de uma coluna em epoch ms."""
+    return f"({coluna} - {coluna} % {HORA_MS})"
+
+
+def dia_local_sql(coluna):
+    """Expressão SQL com a meia-noite local (epoch ms) do dia de uma coluna, como inicio_do_dia_ms."""
+    return f"(CAST(strftime('%s', date({coluna} / 1000, 'unixepoch', 'localtime'), 'utc') AS INTEGER) * 1000)"
+
+# Conexão já retirada do pool pela thread/tarefa atual (permite chamadas aninhadas)
+_conexao_atual = ContextVar("conexao_atual", default=None)
+
+
+class PoolConexoes:
+    """Pool pequeno de conexões SQLite de longa duração em modo WAL.
+
+    Cada conexão mantém o cache de statements preparados do sqlite3, então as
+    consultas com o mesmo texto SQL são compiladas uma única vez por conexão.
+    A retirada é feita por thread/tarefa asyncio através de um ContextVar.
+    """
+
+    def __init__(self, caminho=DB_PATH, tamanho=TAMANHO_POOL):
+        self.caminho = caminho
+        self.tamanho = tamanho
+        self._livres = queue.LifoQueue()
+        self._todas = []
+        self._lock = threading.Lock()
+        self.conexoes_abertas = 0
+        self.retiradas = 0
+
+    def _nova_conexao(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.caminho)), exist_ok=True)
+        conn = sqlite3.connect(
+            self.caminho,
+            timeout=30,
+            check_same_thread=False,
+            cached_statements=STATEMENTS_EM_CACHE,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        self.conexoes_abertas += 1
+        self._todas.append(conn)
+        return conn
+
+    def _retirar(self):
+        try:
+            return self._livres.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._todas) < self.tamanho:
+                return self._nova_conexao()
+        # Pool cheio: espera uma conexão ser devolvida
+        return self._livres.get()
+
+    @contextmanager
+    def conexao(self):
+        """Retira uma conexão do pool e faz commit (ou rollback) ao final do bloco."""
+        atual = _conexao_atual.get()
+        if atual is not None:
+            # Chamada aninhada na mesma thread/tarefa: reaproveita a conexão e a transação
+            yield atual
+            return
+
+        conn = self._retirar()
+        self.retiradas += 1
+        token = _conexao_atual.set(conn)
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            _conexao_atual.reset(token)
+            self._livres.put(conn)
+
+    def estatisticas(self):
+        """Retorna os contadores de uso do pool."""
+        return {
+            "conexoes_abertas": self.conexoes_abertas,
+            "retiradas": self.retiradas,
+            "tamanho": self.tamanho,
+        }
+
+    def fechar(self):
+        """Fecha todas as conexões do pool."""
+        with self._lock:
+            for conn in self._todas:
+                try:
+                    conn.close()
+                except sqlite3.Error as e:
+                    logging.error(f"Erro ao fechar conexão: {e}")
+            self._todas.clear()
+            self._livres = queue.LifoQueue()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def obter_pool():
+    """Retorna o pool compartilhado do processo, criando-o na primeira chamada."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolConexoes()
+    return _pool
+
+
+def conexao():
+    """Atalho para `obter_pool().conexao()`."""
+    return obter_pool().conexao()
+
+
+def fechar_pool():
+    """Fecha o pool compartilhado (usado no encerramento do processo)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.fechar()
+            _pool = None
+
+
+# Funções de conversão dos timestamps (todas as datas são gravadas como epoch em milissegundos)
+def agora_ms():
+    """Instante atual em milissegundos desde a época."""
+    return time.time_ns() // 1_000_000
+
+
+def iso_para_ms(texto):
+    """Converte uma data ISO da API em UTC ("2025-01-01T00:00:00.123Z") para epoch ms."""
+    dt = datetime.strptime(texto, "%Y-%m-%dT%H:%M:%S.%fZ")
+    return calendar.timegm(dt.timetuple()) * 1000 + dt.microsecond // 1000
+
+
+def ms_para_texto(ms, formato="%Y-%m-%d %H:%M:%S"):
+    """Formata um epoch ms no horário local (só para exibição)."""
+    return datetime.fromtimestamp(ms / 1000).strftime(formato)
+
+
+def inicio_do_dia_ms(dia=None):
+    """Epoch ms da meia-noite local do dia informado (hoje por padrão)."""
+    dia = dia or datetime.now()
+    return int(dia.replace(hour=0, minute=0, second=0, microsecond=0).timestamp() * 1000)
+
+
+def inicio_da_hora_ms(ms=None):
+    """Epoch ms do início da hora de `ms` (agora por padrão)."""
+    ms = agora_ms() if ms is None else ms
+    return ms - ms % HORA_MS
@@ -0,0 +1,100 @@
+import threading
+from array import array
+
+from src import consultas
+from src.banco import conexao
+from src.metricas import cronometrado
+from src.modelo import CORES_VALIDAS
+
+
+class BufferResultados:
+    """Buffer circular de tamanho fixo com as últimas rodadas e contagens por cor.
+
+    As cores e números ficam em arrays compactos; a contagem de cada cor é
+    atualizada em O(1) a cada rodada adicionada (e a mais antiga removida).
+    """
+
+    def __init__(self, capacidade=100):
+        self.capacidade = capacidade
+        self._cores = array('b', [-1] * capacidade)
+        self._numeros = array('b', [-1] * capacidade)
+        self._proximo = 0
+        self.tamanho = 0
+        self.contagem = [0, 0, 0]
+        self.ultimo_id = 0
+        self.ultimo_created_at = None
+        self._lock = threading.Lock()
+
+    def adicionar(self, numero, cor, id_resultado=None, created_at=None):
+        """Adiciona uma rodada (cor como código da API), removendo a mais antiga quando o buffer está cheio."""
+        codigo = cor if cor in CORES_VALIDAS else -1
+        with self._lock:
+            if created_at is not None:
+                if self.ultimo_created_at is not None and created_at <= self.ultimo_created_at:
+                    # Rodada antiga (ex.: vinda de um backfill): não entra no buffer
+                    if id_resultado is not None and id_resultado > self.ultimo_id:
+                        self.ultimo_id = id_resultado
+                    return
+                self.ultimo_created_at = created_at
+
+            if self.tamanho == self.capacidade:
+                antiga = self._cores[self._proximo]
+                if antiga >= 0:
+                    self.contagem[antiga] -= 1
+            else:
+                self.tamanho += 1
+
+            self._cores[self._proximo] = codigo
+            self._numeros[self._proximo] = numero if isinstance(numero, int) else -1
+            if codigo >= 0:
+                self.contagem[codigo] += 1
+            self._proximo = (self._proximo + 1) % self.capacidade
+
+            if id_resultado is not None and id_resultado > self.ultimo_id:
+                self.ultimo_id = id_resultado
+
+    def probabilidades(self):
+        """Retorna a frequência de (branco, vermelho, preto) no buffer."""
+        if self.tamanho == 0:
+            return 0.0, 0.0, 0.0
+        return tuple(c / self.tamanho for c in self.contagem)
+
+    def cores_recentes(self, quantidade=None):
+        """Retorna os códigos de cor do mais recente para o mais antigo."""
+        quantidade = self.tamanho if quantidade is None else min(quantidade, self.tamanho)
+        return [self._cores[(self._proximo - 1 - i) % self.capacidade] for i in range(quantidade)]
+
+    @cronometrado()
+    def sincronizar(self):
+        """Traz do banco apenas as rodadas com id maior que o último visto (busca pela chave primária).
+
+        Rodadas inseridas fora de ordem (backfill) com `created_at` anterior ao
+        mais recente do buffer são ignoradas.
+        """
+        with conexao() as conn:
+            if self.ultimo_id == 0:
+                linhas = conn.execute(consultas.RESULTADOS_RECENTES, (self.capacidade,)).fetchall()
+                linhas.reverse()
+                maior_id = conn.execute(consultas.MAIOR_ID_RESULTADO).fetchone()[0] or 0
+            else:
+                linhas = conn.execute(consultas.RESULTADOS_APOS_ID, (self.ultimo_id,)).fetchall()
+                maior_id = 0
+
+        for id_resultado, numero, cor, created_at in linhas:
+            self.adicionar(numero, cor, id_resultado, created_at)
+        self.ultimo_id = max(self.ultimo_id, maior_id)
+        return len(linhas)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def obter_buffer():
+    """Retorna o buffer de resultados compartilhado do processo."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = BufferResultados()
+    return _buffer
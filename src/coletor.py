@@ -1,27 +1,73 @@
-import requests
 import sqlite3
-import os
 import time
-from datetime import datetime
+import os
+import sys
+
+# Adicionando a raiz do projeto ao sys.path para importar o pacote "src"
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# Criar diretório se não existir
-os.makedirs("data", exist_ok=True)
+from src import consultas
+from src.banco import agora_ms, conexao, iso_para_ms, ms_para_texto
+from src.buffer_resultados import obter_buffer
+from src.escrita import obter_escritor
+from src.metricas import cronometrado, metricas
+from src.modelo import CORES_VALIDAS, DURACAO_RODADA_MS, Rodada, nome_cor
+from src.migracoes import aplicar_migracoes
 
-# Função para criar a tabela no banco de dados
+# Função para criar (ou migrar) as tabelas no banco de dados
 def criar_tabela():
-    conn = sqlite3.connect("data/blaze_double.db")
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS resultados (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            numero INTEGER,
-            cor TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            created_at TEXT UNIQUE
-        )
-    """)
-    conn.commit()
-    conn.close()
+    aplicar_migracoes()
+
+# Funções avisadas a cada rodada gravada por este processo (ex.: liquidação das apostas)
+ouvintes_rodada = []
+
+def ao_salvar_rodada(funcao):
+    ouvintes_rodada.append(funcao)
+    return funcao
+
+# Funções que recebem as rodadas (numero, cor, created_at) gravadas, em ordem (ex.: índice de padrões)
+ouvintes_gravadas = []
+
+def ao_gravar_rodadas(funcao):
+    if funcao not in ouvintes_gravadas:
+        ouvintes_gravadas.append(funcao)
+    return funcao
+
+def _notificar_ouvintes(rodadas=()):
+    for funcao in ouvintes_gravadas:
+        try:
+            funcao(rodadas)
+        except Exception as e:
+            print(f"Erro ao repassar as rodadas gravadas: {e}")
+    for funcao in ouvintes_rodada:
+        try:
+            funcao()
+        except Exception as e:
+            print(f"Erro ao notificar nova rodada: {e}")
+
+# Rodada mais nova gravada por este processo (métricas de atraso e de rodadas perdidas)
+_ultima_gravada = None
+
+def _registrar_gravacao(created_ats):
+    """Atualiza as métricas com os `created_at` (em ordem) das rodadas gravadas agora.
+
+    Só rodadas mais novas que a última gravada contam: páginas antigas de um
+    backfill não distorcem o atraso nem as lacunas.
+    """
+    global _ultima_gravada
+    novas = [t for t in created_ats if _ultima_gravada is None or t > _ultima_gravada]
+    if not novas:
+        return
+    if _ultima_gravada is not None:
+        # Lacunas desde a última rodada gravada (na primeira gravação do processo não há referência)
+        anterior = _ultima_gravada
+        for created_at in novas:
+            perdidas = round((created_at - anterior) / DURACAO_RODADA_MS) - 1
+            if perdidas > 0:
+                metricas.incrementar("blaze_rodadas_perdidas_total", perdidas)
+            anterior = created_at
+    _ultima_gravada = novas[-1]
+    metricas.observar("blaze_rodada_gravacao_segundos", max(0, agora_ms() - _ultima_gravada) / 1000)
 
 # Configuração dos Headers para a API da Blaze
 headers = {
@@ -30,81 +76,168 @@ headers = {
 }
 
 # Função para obter o último `created_at` salvo no banco
+@cronometrado()
 def obter_ultimo_created_at():
-    conn = sqlite3.connect("data/blaze_double.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT created_at FROM resultados ORDER BY created_at DESC LIMIT 1")
-    ultimo = cursor.fetchone()
-    conn.close()
+    with conexao() as conn:
+        ultimo = conn.execute(consultas.ULTIMO_CREATED_AT).fetchone()
     return ultimo[0] if ultimo else None
 
-# Função para coletar os resultados do jogo Double da Blaze via API
-def coletar_resultados():
-    url = "https://blaze.bet.br/api/singleplayer-originals/originals/roulette_games/recent/1"
-    
+# Endpoint com as rodadas mais recentes do Double
+URL_RECENTES = "https://blaze.bet.br/api/singleplayer-originals/originals/roulette_games/recent/1"
+
+# Função para converter um resultado da API para uma Rodada (a cor fica com o código da API)
+def converter_resultado(result):
+    numero = result.get("roll")
+    cor = result.get("color")
+    created_at = result.get("created_at", "")
+
+    # Convertendo a data da API (UTC) para epoch em milissegundos
+    if created_at:
+        try:
+            created_at = iso_para_ms(created_at)
+        except ValueError:
+            created_at = None
+    else:
+        created_at = None
+
+    return Rodada(
+        numero if isinstance(numero, int) else None,
+        cor if cor in CORES_VALIDAS else None,
+        created_at,
+    )
+
+# Sessão reaproveitada pelas consultas síncronas (backfill e preenchimento de lacunas do stream),
+# criada no primeiro uso: quem não consulta a API síncrona não importa o requests
+_sessao_http = None
+TIMEOUT_HTTP = (3, 10)
+
+def obter_sessao_http():
+    global _sessao_http
+    if _sessao_http is None:
+        import requests
+
+        _sessao_http = requests.Session()
+        _sessao_http.headers.update(headers)
+    return _sessao_http
+
+# Função para buscar a página de resultados recentes (do mais novo para o mais antigo)
+def buscar_recentes(url=URL_RECENTES):
+    import requests
+
     try:
-        response = requests.get(url, headers=headers)
+        inicio = time.perf_counter()
+        response = obter_sessao_http().get(url, timeout=TIMEOUT_HTTP)
         response.raise_for_status()
-        data = response.json()
-
-        for result in data:
-            numero = result.get("roll", "Desconhecido")
-            cor_codigo = result.get("color", -1)
-            created_at = result.get("created_at", "")
-
-            # Convertendo a data da API para um formato sem fração de segundos
-            if created_at:
-                try:
-                    created_at = datetime.strptime(created_at, "%Y-%m-%dT%H:%M:%S.%fZ").strftime("%Y-%m-%d %H:%M:%S")
-                except ValueError:
-                    created_at = None
-
-            # Mapeamento das cores baseado no código
-            cores = {2: "Preto", 1: "Vermelho", 0: "Branco"}
-            cor = cores.get(cor_codigo, "Desconhecido")
-
-            return (numero, cor, created_at)  # Retorna apenas o mais recente
-
-        return None
+        metricas.observar("blaze_api_consulta_segundos", time.perf_counter() - inicio, cliente="requests")
+        return [converter_resultado(result) for result in response.json()]
     except requests.exceptions.RequestException as e:
+        metricas.incrementar("blaze_api_erros_total", cliente="requests")
         print(f"Erro na requisição: {e}")
         return None
 
-# Função para salvar um novo resultado no banco
-def salvar_resultado(numero, cor, created_at):
-    conn = sqlite3.connect("data/blaze_double.db")
-    cursor = conn.cursor()
+# Função para coletar os resultados do jogo Double da Blaze via API
+def coletar_resultados(url=URL_RECENTES):
+    resultados = buscar_recentes(url)
+    return resultados[0] if resultados else None  # Retorna apenas o mais recente
 
+# Função para salvar um novo resultado no banco. A rodada vai para o escritor em lote como
+# urgente: é gravada logo, na mesma transação das apostas e bancas que estiverem pendentes
+@cronometrado()
+def salvar_resultado(numero, cor, created_at):
+    # Sem horário a rodada não tem posição no histórico (como em salvar_resultados_em_lote)
+    if created_at is None:
+        print(f"⚠️ Rodada sem horário ignorada: Número {numero}, Cor {nome_cor(cor)}")
+        return
     try:
-        cursor.execute("INSERT INTO resultados (numero, cor, created_at) VALUES (?, ?, ?)", (numero, cor, created_at))
-        conn.commit()
-        print(f"🔥 Novo resultado salvo: Número {numero}, Cor {cor}, Hora {created_at}")
+        id_resultado = obter_escritor().enviar(consultas.INSERIR_RESULTADO, (numero, cor, created_at), urgente=True).result()
+        metricas.incrementar("blaze_rodadas_gravadas_total")
+        _registrar_gravacao((created_at,))
+        # Mantém o buffer de rodadas recentes atualizado sem reconsultar o banco
+        obter_buffer().adicionar(numero, cor, id_resultado, created_at)
+        _notificar_ouvintes((Rodada(numero, cor, created_at),))
+        print(f"🔥 Novo resultado salvo: Número {numero}, Cor {nome_cor(cor)}, Hora {ms_para_texto(created_at)}")
     except sqlite3.IntegrityError:
-        print(f"⚠️ Resultado já estava no banco: Número {numero}, Cor {cor}, Hora {created_at}")
-    finally:
-        conn.close()
+        print(f"⚠️ Resultado já estava no banco: Número {numero}, Cor {nome_cor(cor)}, Hora {ms_para_texto(created_at)}")
+
+# Função para salvar uma página inteira de resultados em uma única transação
+@cronometrado()
+def salvar_resultados_em_lote(resultados):
+    """Insere os resultados com um único executemany, ignorando `created_at` já gravados.
+
+    Retorna a quantidade de rodadas realmente inseridas.
+    """
+    vistos = set()
+    linhas = []
+    for rodada in sorted((r for r in resultados if r[2] is not None), key=lambda r: r[2]):
+        if rodada[2] not in vistos:
+            vistos.add(rodada[2])
+            linhas.append(rodada)
+    if not linhas:
+        return 0
+
+    # rowcount não inclui as linhas alteradas pelos triggers dos agregados (total_changes incluiria)
+    inseridos = obter_escritor().enviar("INSERT OR IGNORE INTO resultados (numero, cor, created_at) VALUES (?, ?, ?)",
+                                        linhas, muitos=True, urgente=True).result()
+
+    if inseridos:
+        metricas.incrementar("blaze_rodadas_gravadas_total", inseridos)
+        _registrar_gravacao([created_at for _, _, created_at in linhas])
+        # O buffer só incorpora as rodadas mais novas que as que ele já tem
+        obter_buffer().sincronizar()
+        # Vão todas as linhas do lote; as que já estavam no banco têm created_at já visto pelos ouvintes
+        _notificar_ouvintes(linhas)
+    return inseridos
+
+# Função para salvar as rodadas recentes que ainda não estão no banco (ex.: após uma reconexão)
+def preencher_lacunas(url=URL_RECENTES):
+    resultados = buscar_recentes(url)
+    if not resultados:
+        return 0
+    return salvar_resultados_em_lote(resultados)
 
 # Função principal para monitorar os novos resultados
 def coletar_e_salvar_continuamente():
-    print("🎰 Iniciando monitoramento da Blaze Double...")
-    while True:
-        ultimo_created_at = obter_ultimo_created_at()
-        resultado = coletar_resultados()
-
-        if resultado:
-            numero, cor, created_at = resultado
-
-            # Se não há registros ou se o novo é mais recente, salvamos
-            if ultimo_created_at is None or created_at > ultimo_created_at:
-                salvar_resultado(numero, cor, created_at)
-            else:
-                print("⏳ Nenhum novo resultado detectado.")
-
-        print("🔄 Aguardando 15 segundos para a próxima verificação...\n")
-        time.sleep(15)  # Aguarda 10 segundos antes da próxima consulta
-
-# Criar a tabela se não existir
-criar_tabela()
-
-# Iniciar a coleta contínua dos resultados
-coletar_e_salvar_continuamente()
+    # Consultas assíncronas com keep-alive, agendadas pela cadência das rodadas (src/coletor_http.py)
+    import asyncio
+    from src.coletor_http import coletar_via_http
+    asyncio.run(coletar_via_http())
+
+# Cria a tabela e roda o coletor no modo escolhido; cada modo importa só o próprio cliente
+def run(modo="polling", dias=1, jogos=None):
+    criar_tabela()
+
+    if modo == "jogos":
+        # Vários jogos ao mesmo tempo (src/jogos.py); sem `jogos`, todos os registrados.
+        # O supervisor registra pelo logging (com o jogo em cada registro), mostrado no terminal
+        import asyncio
+        import logging
+        from src.jogos import coletar_jogos
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+        try:
+            asyncio.run(coletar_jogos(jogos))
+        finally:
+            obter_escritor().parar()
+    elif modo == "stream":
+        import asyncio
+        from src.coletor_stream import coletar_via_stream
+        asyncio.run(coletar_via_stream())
+    elif modo == "backfill":
+        from src.backfill import executar_backfill
+        executar_backfill(dias=dias)
+    else:
+        coletar_e_salvar_continuamente()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Coletor de resultados da Blaze Double")
+    parser.add_argument("--modo", choices=["polling", "stream", "backfill", "jogos"], default="polling",
+                        help="polling consulta a API no ritmo das rodadas; stream recebe as rodadas pelo websocket; "
+                             "backfill recupera o histórico e encerra; jogos acompanha vários jogos ao mesmo tempo")
+    parser.add_argument("--dias", type=float, default=1,
+                        help="quantos dias de histórico recuperar no modo backfill")
+    parser.add_argument("--jogos", type=lambda texto: [nome.strip() for nome in texto.split(",") if nome.strip()],
+                        help="jogos do modo jogos, separados por vírgula (ex.: double,crash); padrão: todos")
+    args = parser.parse_args()
+
+    run(args.modo, args.dias, args.jogos)
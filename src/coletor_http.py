@@ -0,0 +1,226 @@
+import time
+import asyncio
+import statistics
+from collections import deque
+
+import aiohttp
+
+from src.coletor import (
+    URL_RECENTES,
+    converter_resultado,
+    criar_tabela,
+    headers,
+    obter_ultimo_created_at,
+    salvar_resultados_em_lote,
+)
+from src.metricas import metricas
+
+# Conexões mantidas abertas com a API (keep-alive) e limites de tempo de cada consulta
+CONEXOES_HTTP = 4
+TIMEOUT_TOTAL = 10
+TIMEOUT_CONEXAO = 3
+TIMEOUT_LEITURA = 5
+
+# Agenda adaptativa (valores para rodadas de ~30 s)
+CADENCIA_PADRAO_MS = 30_000
+INTERVALO_RAPIDO = 0.5    # intervalo entre consultas quando a rodada esperada ainda não apareceu
+INTERVALO_MAXIMO = 15     # teto do backoff quando a rodada atrasa (ex.: jogo pausado)
+ACERTO_PRIMEIRA = 0.9     # fração das rodadas que devem ser vistas já na primeira consulta
+PASSO_DEFASAGEM = 0.005   # ajuste do momento da consulta, em fração da cadência
+AMOSTRAS_CADENCIA = 20
+
+
+def criar_sessao(conexoes=CONEXOES_HTTP):
+    """Sessão aiohttp com pool keep-alive, cache de DNS e timeouts explícitos."""
+    return aiohttp.ClientSession(
+        headers=headers,
+        connector=aiohttp.TCPConnector(limit=conexoes, keepalive_timeout=60, ttl_dns_cache=300),
+        timeout=aiohttp.ClientTimeout(total=TIMEOUT_TOTAL, connect=TIMEOUT_CONEXAO, sock_read=TIMEOUT_LEITURA),
+    )
+
+
+class ConsultaRecentes:
+    """Consulta condicional do endpoint de rodadas recentes.
+
+    Guarda o ETag / Last-Modified da última resposta e os reenvia; um 304 (ou
+    uma página cuja rodada mais nova já foi vista) conta como "nada mudou" e
+    não é convertida nem gravada. `converter` transforma cada item da página
+    em uma tupla com o `created_at` no último campo (padrão: rodada do Double);
+    `rotulos` vão para as métricas das consultas.
+    """
+
+    def __init__(self, sessao, url=URL_RECENTES, converter=converter_resultado, **rotulos):
+        self.sessao = sessao
+        self.url = url
+        self.converter = converter
+        self.rotulos = {"cliente": "aiohttp", **rotulos}
+        self.etag = None
+        self.last_modified = None
+        self.ultimo_created_at = None
+        self.requisicoes = 0
+        self.nao_modificadas = 0
+        self.erros = 0
+
+    async def buscar(self):
+        """Retorna as rodadas novas (do mais antigo ao mais novo); lista vazia se nada mudou."""
+        cabecalhos = {}
+        if self.etag:
+            cabecalhos["If-None-Match"] = self.etag
+        if self.last_modified:
+            cabecalhos["If-Modified-Since"] = self.last_modified
+
+        self.requisicoes += 1
+        inicio = time.perf_counter()
+        async with self.sessao.get(self.url, headers=cabecalhos) as resposta:
+            if resposta.status == 304:
+                metricas.observar("blaze_api_consulta_segundos", time.perf_counter() - inicio, **self.rotulos)
+                self.nao_modificadas += 1
+                return []
+            resposta.raise_for_status()
+            self.etag = resposta.headers.get("ETag", self.etag)
+            self.last_modified = resposta.headers.get("Last-Modified", self.last_modified)
+            pagina = await resposta.json(content_type=None)
+        metricas.observar("blaze_api_consulta_segundos", time.perf_counter() - inicio, **self.rotulos)
+
+        if not pagina:
+            return []
+        # A página vem do mais novo para o mais antigo: para na primeira rodada já vista
+        novos = []
+        for resultado in pagina:
+            rodada = self.converter(resultado)
+            created_at = rodada[-1]
+            if created_at is None:
+                continue
+            if self.ultimo_created_at is not None and created_at <= self.ultimo_created_at:
+                break
+            novos.append(rodada)
+        if not novos:
+            self.nao_modificadas += 1
+            return []
+        novos.reverse()
+        self.ultimo_created_at = novos[-1][-1]
+        return novos
+
+
+class AgendaAdaptativa:
+    """Decide quanto esperar até a próxima consulta a partir da cadência das rodadas.
+
+    A cadência é a mediana dos intervalos entre `created_at` consecutivos. A
+    defasagem é quanto tempo depois do `created_at` a rodada costuma aparecer
+    na API (inclui a diferença de relógio com o servidor). Depois de cada
+    rodada a agenda dorme até `created_at + cadência + defasagem` e faz uma
+    consulta só: se ela já encontra a rodada, a defasagem diminui um passo;
+    se não, aumenta o bastante para que ~90% das rodadas saiam na primeira
+    consulta. Sem a rodada, consulta a cada INTERVALO_RAPIDO e, se ela
+    atrasar mais de meia cadência, o intervalo dobra até INTERVALO_MAXIMO.
+    """
+
+    def __init__(self, cadencia_padrao_ms=CADENCIA_PADRAO_MS, intervalo_rapido=INTERVALO_RAPIDO,
+                 intervalo_maximo=INTERVALO_MAXIMO, acerto_primeira=ACERTO_PRIMEIRA, passo=PASSO_DEFASAGEM):
+        self.cadencia_padrao_ms = cadencia_padrao_ms
+        self.intervalo_rapido = intervalo_rapido
+        self.intervalo_maximo = intervalo_maximo
+        self.acerto_primeira = acerto_primeira
+        self.passo = passo
+        self._intervalos = deque(maxlen=AMOSTRAS_CADENCIA)
+        self.defasagem_ms = None
+        self.ultimo_created_at = None
+        self.consultas_vazias = 0
+
+    @property
+    def cadencia_ms(self):
+        return statistics.median(self._intervalos) if self._intervalos else self.cadencia_padrao_ms
+
+    def registrar_vazia(self):
+        """Consulta que não trouxe rodada nova."""
+        self.consultas_vazias += 1
+
+    def registrar(self, created_ats, agora_ms=None):
+        """Registra as rodadas novas (em ordem cronológica) vistas em `agora_ms`."""
+        if not created_ats:
+            self.registrar_vazia()
+            return
+        agora_ms = agora_ms if agora_ms is not None else time.time() * 1000
+        for created_at in created_ats:
+            if self.ultimo_created_at is not None and created_at > self.ultimo_created_at:
+                self._intervalos.append(created_at - self.ultimo_created_at)
+            self.ultimo_created_at = created_at
+
+        passo_ms = self.passo * self.cadencia_ms
+        observada = agora_ms - created_ats[-1]
+        if self.defasagem_ms is None:
+            self.defasagem_ms = observada
+        elif self.consultas_vazias == 0:
+            # Achou de primeira: tenta consultar um pouco mais cedo na próxima
+            self.defasagem_ms = min(self.defasagem_ms - passo_ms, observada)
+        else:
+            # Precisou de novas consultas: recua o suficiente para errar só 1 - ACERTO_PRIMEIRA das vezes
+            self.defasagem_ms += passo_ms * self.acerto_primeira / (1 - self.acerto_primeira)
+        self.consultas_vazias = 0
+
+    def proxima_espera(self, agora_ms=None):
+        """Segundos até a próxima consulta."""
+        if self.ultimo_created_at is None or self.defasagem_ms is None:
+            return self.intervalo_rapido
+        agora_ms = agora_ms if agora_ms is not None else time.time() * 1000
+        esperada_ms = self.ultimo_created_at + self.cadencia_ms + self.defasagem_ms
+        faltam = (esperada_ms - agora_ms) / 1000
+
+        if faltam > 0:
+            # Rodada recém-saída: dorme até o momento esperado da próxima
+            return faltam
+        atraso = -faltam
+        meia_cadencia = self.cadencia_ms / 2000
+        if atraso <= meia_cadencia:
+            return self.intervalo_rapido
+        # Rodada atrasada: consulta cada vez menos até o teto
+        return min(self.intervalo_rapido * 2 ** (atraso / meia_cadencia), self.intervalo_maximo)
+
+
+async def coletar_via_http(url=URL_RECENTES, agenda=None, ao_salvar=None, parar=None, sessao=None, destino=None):
+    """Consulta a API com agenda adaptativa e grava as rodadas novas em lote.
+
+    `ao_salvar(rodadas_novas)` é chamada após cada gravação; `parar` é um
+    asyncio.Event opcional para encerrar o laço. Com `destino`
+    (asyncio.Queue), as rodadas vão para a fila em vez de serem gravadas.
+    """
+    print("🎰 Iniciando monitoramento da Blaze Double (HTTP adaptativo)...")
+    await asyncio.to_thread(criar_tabela)
+    agenda = agenda or AgendaAdaptativa()
+    parar = parar or asyncio.Event()
+
+    propria = sessao is None
+    sessao = sessao or criar_sessao()
+    consulta = ConsultaRecentes(sessao, url)
+    consulta.ultimo_created_at = await asyncio.to_thread(obter_ultimo_created_at)
+    try:
+        while not parar.is_set():
+            try:
+                novos = await consulta.buscar()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                consulta.erros += 1
+                metricas.incrementar("blaze_api_erros_total", cliente="aiohttp")
+                print(f"Erro na requisição: {e}")
+                novos = []
+                espera = agenda.intervalo_maximo
+            else:
+                agenda.registrar([created_at for _, _, created_at in novos])
+                if novos and destino is not None:
+                    for rodada in novos:
+                        await destino.put(rodada)
+                elif novos:
+                    inseridos = await asyncio.to_thread(salvar_resultados_em_lote, novos)
+                    if inseridos:
+                        print(f"🔥 {inseridos} novo(s) resultado(s) salvo(s).")
+                    if ao_salvar is not None:
+                        ao_salvar(novos)
+                espera = agenda.proxima_espera()
+
+            try:
+                await asyncio.wait_for(parar.wait(), timeout=espera)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        if propria:
+            await sessao.close()
+    return consulta
@@ -0,0 +1,138 @@
+import json
+import random
+import asyncio
+
+from websockets.asyncio.client import connect
+from websockets.exceptions import WebSocketException
+
+from src.coletor import (
+    URL_RECENTES,
+    converter_resultado,
+    criar_tabela,
+    preencher_lacunas,
+    salvar_resultado,
+)
+
+# Feed em tempo real da Blaze (socket.io / Engine.IO v3 sobre websocket)
+URL_STREAM = "wss://api-gaming.blaze.bet.br/replication/?EIO=3&transport=websocket"
+SALA_DOUBLE = "double_room_1"
+
+# Status do "double.tick" em que o número da rodada já é conhecido
+STATUS_COM_RESULTADO = ("rolling", "complete")
+
+BACKOFF_INICIAL = 1
+BACKOFF_MAXIMO = 60
+INTERVALO_PING_PADRAO = 25
+
+
+def mensagem_inscricao(sala=SALA_DOUBLE):
+    """Monta o pacote socket.io para se inscrever na sala do jogo."""
+    return "421" + json.dumps(["cmd", {"id": "subscribe", "payload": {"room": sala}}])
+
+
+def interpretar_mensagem(texto):
+    """Extrai o payload de um evento "double.tick" com resultado; retorna None para os demais pacotes."""
+    if not texto.startswith("42"):
+        return None
+    try:
+        evento, dados = json.loads(texto[2:])[:2]
+    except (ValueError, TypeError):
+        return None
+
+    if evento != "data" or not isinstance(dados, dict) or dados.get("id") != "double.tick":
+        return None
+
+    payload = dados.get("payload") or {}
+    if payload.get("status") not in STATUS_COM_RESULTADO or payload.get("roll") is None:
+        return None
+    return payload
+
+
+async def _manter_vivo(ws, intervalo):
+    """Envia o ping do Engine.IO v3 (o cliente é quem pinga nesta versão do protocolo)."""
+    while True:
+        await asyncio.sleep(intervalo)
+        await ws.send("2")
+
+
+async def _consumir(ws, vistos, ao_salvar, url_api, destino=None):
+    """Lê os pacotes do websocket e salva cada rodada assim que é publicada.
+
+    Com `destino` (asyncio.Queue), a rodada é entregue à fila em vez de gravada.
+    """
+    ping = None
+    try:
+        async for texto in ws:
+            if texto.startswith("0"):
+                # Pacote de abertura: informa o intervalo de ping
+                try:
+                    intervalo = json.loads(texto[1:]).get("pingInterval", INTERVALO_PING_PADRAO * 1000) / 1000
+                except ValueError:
+                    intervalo = INTERVALO_PING_PADRAO
+                if ping is None:
+                    ping = asyncio.create_task(_manter_vivo(ws, intervalo))
+                continue
+            if texto == "40":
+                await ws.send(mensagem_inscricao())
+                # Já inscrito: busca pela API o que foi sorteado enquanto estávamos desconectados
+                recuperados = await asyncio.to_thread(preencher_lacunas, url_api)
+                print(f"🔌 Conectado ao feed em tempo real ({recuperados} rodada(s) recuperada(s)).")
+                continue
+
+            payload = interpretar_mensagem(texto)
+            if payload is None:
+                continue
+
+            # Cada rodada chega mais de uma vez (rolling e complete); salva só a primeira
+            chave = payload.get("id") or payload.get("created_at")
+            if chave in vistos:
+                continue
+            vistos.add(chave)
+            if len(vistos) > 1000:
+                vistos.clear()
+                vistos.add(chave)
+
+            rodada = converter_resultado(payload)
+            if destino is not None:
+                # Fila limitada: se a gravação atrasar, a leitura do feed espera
+                await destino.put(rodada)
+                continue
+            await asyncio.to_thread(salvar_resultado, *rodada)
+            if ao_salvar is not None:
+                ao_salvar(*rodada)
+    finally:
+        if ping is not None:
+            ping.cancel()
+
+
+async def coletar_via_stream(url=URL_STREAM, url_api=URL_RECENTES, ao_salvar=None, max_conexoes=None, destino=None):
+    """Coleta as rodadas pelo feed em tempo real, reconectando com backoff exponencial.
+
+    A cada (re)conexão as rodadas recentes são buscadas pela API HTTP para
+    cobrir o intervalo em que o websocket ficou desconectado. Com `destino`,
+    as rodadas vão para a fila (ex.: orquestrador) em vez de serem gravadas.
+    """
+    print("🎰 Iniciando monitoramento da Blaze Double em tempo real...")
+    await asyncio.to_thread(criar_tabela)
+
+    backoff = BACKOFF_INICIAL
+    conexoes = 0
+    vistos = set()
+    while max_conexoes is None or conexoes < max_conexoes:
+        conexoes += 1
+        try:
+            async with connect(url, open_timeout=10, ping_interval=None) as ws:
+                backoff = BACKOFF_INICIAL
+                await _consumir(ws, vistos, ao_salvar, url_api, destino)
+            print("⚠️ Feed encerrado pelo servidor.")
+        except (OSError, asyncio.TimeoutError, WebSocketException) as e:
+            print(f"⚠️ Erro no feed em tempo real: {e}")
+
+        if max_conexoes is not None and conexoes >= max_conexoes:
+            break
+
+        # Backoff exponencial com jitter antes de reconectar
+        espera = backoff * random.uniform(0.5, 1.5)
+        print(f"🔄 Reconectando em {espera:.1f} segundos...")
+        await asyncio.sleep(espera)
+        backoff = min(backoff * 2, BACKOFF_MAXIMO)
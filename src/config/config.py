@@ -8,6 +8,8 @@ load_dotenv()
 TOKEN = os.getenv("TELEGRAM_TOKEN")  # Usa a variável de ambiente
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")  # Usa a variável de ambiente
 
-# Exemplo de como verificar se as variáveis estão corretas
-if TOKEN is None or CHAT_ID is None:
-    raise ValueError("Por favor, defina as variáveis TELEGRAM_TOKEN e TELEGRAM_CHAT_ID no arquivo .env")
+
+# Verificada ao iniciar o bot (não na importação): coletor, backtest e stats não precisam do Telegram
+def verificar_configuracao():
+    if not TOKEN or not CHAT_ID:
+        raise ValueError("Por favor, defina as variáveis TELEGRAM_TOKEN e TELEGRAM_CHAT_ID no arquivo .env")
@@ -0,0 +1,98 @@
+# Consultas SQL dos caminhos quentes do coletor e do bot.
+# Ficam centralizadas aqui para que `src.migracoes.verificar_planos` confira,
+# via EXPLAIN QUERY PLAN, que todas usam índice e nenhuma varre a tabela.
+
+# resultados.created_at e apostas.data são epoch em milissegundos (INTEGER)
+ULTIMO_CREATED_AT = "SELECT MAX(created_at) FROM resultados"
+
+RESULTADOS_RECENTES = "SELECT id, numero, cor, created_at FROM resultados ORDER BY created_at DESC LIMIT ?"
+
+RESULTADOS_APOS_ID = "SELECT id, numero, cor, created_at FROM resultados WHERE id > ? ORDER BY id"
+
+RESULTADOS_APOS_CREATED_AT = "SELECT id, numero, cor, created_at FROM resultados WHERE created_at > ? ORDER BY created_at"
+
+# Histórico para o analisador em colunas inteiras (-1 nos campos nulos), pronto para virar array
+HISTORICO_COMPLETO = """
+    SELECT COALESCE(numero, -1), COALESCE(cor, -1), COALESCE(created_at, 0)
+    FROM resultados ORDER BY created_at
+"""
+
+HISTORICO_APOS = """
+    SELECT COALESCE(numero, -1), COALESCE(cor, -1), created_at
+    FROM resultados WHERE created_at > ? ORDER BY created_at
+"""
+
+# Rodadas frias (anteriores ao corte) que vão para o arquivo colunar (src/arquivo.py)
+HISTORICO_ATE = """
+    SELECT COALESCE(numero, -1), COALESCE(cor, -1), created_at
+    FROM resultados WHERE created_at < ? ORDER BY created_at
+"""
+
+REMOVER_RESULTADOS_ATE = "DELETE FROM resultados WHERE created_at < ?"
+
+PRIMEIRO_CREATED_AT = "SELECT MIN(created_at) FROM resultados"
+
+MAIOR_ID_RESULTADO = "SELECT MAX(id) FROM resultados"
+
+# Agregados mantidos por triggers (migração 3); "dia" é a meia-noite local em epoch ms
+SALDO_DO_DIA = "SELECT COALESCE(SUM(saldo), 0) FROM apostas_por_usuario_dia WHERE dia = ?"
+
+APOSTAS_DO_USUARIO_NO_DIA = """
+    SELECT apostas, vitorias, derrotas, pendentes, valor_apostado, saldo
+    FROM apostas_por_usuario_dia WHERE dia = ? AND usuario_id = ?
+"""
+
+HISTORICO_DO_USUARIO = """
+    SELECT dia, apostas, vitorias, derrotas, valor_apostado, saldo
+    FROM apostas_por_usuario_dia WHERE usuario_id = ? AND dia >= ? ORDER BY dia DESC
+"""
+
+CORES_DO_DIA = "SELECT cor, quantidade FROM resultados_por_dia WHERE dia = ?"
+
+CORES_POR_HORA = "SELECT hora, cor, quantidade FROM resultados_por_hora WHERE hora >= ? ORDER BY hora"
+
+# Distribuição de cores de todo o histórico (uma linha por dia e cor, inclusive dos períodos arquivados);
+# percorre o índice (cor, quantidade), já na ordem do GROUP BY
+CORES_HISTORICAS = "SELECT cor, SUM(quantidade) FROM resultados_por_dia GROUP BY cor"
+
+# Escritas agrupadas pelo escritor em lote (src/escrita.py); as atualizações são pela chave primária
+INSERIR_RESULTADO = "INSERT INTO resultados (numero, cor, created_at) VALUES (?, ?, ?)"
+
+INSERIR_APOSTA = "INSERT INTO apostas (data, valor, resultado, usuario_id) VALUES (?, ?, ?, ?)"
+
+ATUALIZAR_RESULTADO_APOSTA = "UPDATE apostas SET resultado = ? WHERE id = ?"
+
+ATUALIZAR_BANCA = "UPDATE usuarios SET banca = ?, data_ultima_edicao = CURRENT_TIMESTAMP WHERE id = ?"
+
+# Usuários (src/usuarios.py): o nome tem índice único e a senha é conferida fora do SQL, pelo hash
+USUARIO_POR_NOME = "SELECT id, senha, banca FROM usuarios WHERE nome = ?"
+
+BANCA_POR_ID = "SELECT banca FROM usuarios WHERE id = ?"
+
+INSERIR_USUARIO = "INSERT INTO usuarios (nome, senha, banca) VALUES (?, ?, ?)"
+
+ATUALIZAR_SENHA = "UPDATE usuarios SET senha = ?, data_ultima_edicao = CURRENT_TIMESTAMP WHERE id = ?"
+
+# Consulta -> parâmetros de exemplo usados na verificação dos planos
+CONSULTAS_QUENTES = {
+    "ULTIMO_CREATED_AT": (ULTIMO_CREATED_AT, ()),
+    "RESULTADOS_RECENTES": (RESULTADOS_RECENTES, (100,)),
+    "RESULTADOS_APOS_ID": (RESULTADOS_APOS_ID, (0,)),
+    "RESULTADOS_APOS_CREATED_AT": (RESULTADOS_APOS_CREATED_AT, (0,)),
+    "HISTORICO_COMPLETO": (HISTORICO_COMPLETO, ()),
+    "HISTORICO_APOS": (HISTORICO_APOS, (0,)),
+    "HISTORICO_ATE": (HISTORICO_ATE, (0,)),
+    "REMOVER_RESULTADOS_ATE": (REMOVER_RESULTADOS_ATE, (0,)),
+    "PRIMEIRO_CREATED_AT": (PRIMEIRO_CREATED_AT, ()),
+    "MAIOR_ID_RESULTADO": (MAIOR_ID_RESULTADO, ()),
+    "SALDO_DO_DIA": (SALDO_DO_DIA, (0,)),
+    "APOSTAS_DO_USUARIO_NO_DIA": (APOSTAS_DO_USUARIO_NO_DIA, (0, 1)),
+    "HISTORICO_DO_USUARIO": (HISTORICO_DO_USUARIO, (1, 0)),
+    "CORES_DO_DIA": (CORES_DO_DIA, (0,)),
+    "CORES_POR_HORA": (CORES_POR_HORA, (0,)),
+    "CORES_HISTORICAS": (CORES_HISTORICAS, ()),
+    "ATUALIZAR_RESULTADO_APOSTA": (ATUALIZAR_RESULTADO_APOSTA, ("win", 0)),
+    "ATUALIZAR_BANCA": (ATUALIZAR_BANCA, (0.0, 0)),
+    "USUARIO_POR_NOME": (USUARIO_POR_NOME, ("nome",)),
+    "BANCA_POR_ID": (BANCA_POR_ID, (1,)),
+}
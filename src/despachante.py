@@ -0,0 +1,210 @@
+import time
+import asyncio
+import logging
+from collections import deque
+
+from telegram.error import BadRequest, NetworkError, RetryAfter, TimedOut
+
+# Limites da Bot API: ~30 mensagens/s no total e ~1 mensagem/s por chat (com pequenas rajadas)
+TAXA_GLOBAL = 30
+RAJADA_GLOBAL = 30
+TAXA_POR_CHAT = 1
+RAJADA_POR_CHAT = 3
+TRABALHADORES = 8
+TENTATIVAS = 5
+AMOSTRAS_LATENCIA = 2000
+
+
+class BaldeDeFichas:
+    """Token bucket: `taxa` fichas por segundo, acumulando até `capacidade`."""
+
+    __slots__ = ("taxa", "capacidade", "fichas", "atualizado_em")
+
+    def __init__(self, taxa, capacidade):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.fichas = capacidade
+        self.atualizado_em = time.monotonic()
+
+    def _repor(self):
+        agora = time.monotonic()
+        self.fichas = min(self.capacidade, self.fichas + (agora - self.atualizado_em) * self.taxa)
+        self.atualizado_em = agora
+
+    def espera(self):
+        """Segundos até haver uma ficha disponível (0 se já houver)."""
+        self._repor()
+        return 0.0 if self.fichas >= 1 else (1 - self.fichas) / self.taxa
+
+    def consumir(self):
+        self.fichas -= 1
+
+    def pausar(self, segundos):
+        """Esvazia o balde por `segundos` (usado quando o Telegram responde 429)."""
+        self._repor()
+        self.fichas = -segundos * self.taxa
+
+
+class MensagemSaida:
+    """Mensagem na fila de saída. Com `chave`, envios seguintes viram edição da mesma mensagem."""
+
+    __slots__ = ("chat_id", "texto", "chave", "ultima", "futuro", "enfileirada_em", "tentativas")
+
+    def __init__(self, chat_id, texto, chave, ultima, futuro):
+        self.chat_id = chat_id
+        self.texto = texto
+        self.chave = chave
+        self.ultima = ultima
+        self.futuro = futuro
+        self.enfileirada_em = time.perf_counter()
+        self.tentativas = 0
+
+
+class Despachante:
+    """Fila de saída para o Telegram com limites de taxa global e por chat.
+
+    Mensagens com a mesma `chave` são agrupadas: se a anterior ainda está na
+    fila, só o texto é trocado; se já foi enviada, a nova vira um
+    editMessageText. Respostas 429 respeitam o `retry_after` do Telegram.
+    """
+
+    def __init__(self, bot, taxa_global=TAXA_GLOBAL, rajada_global=RAJADA_GLOBAL,
+                 taxa_por_chat=TAXA_POR_CHAT, rajada_por_chat=RAJADA_POR_CHAT, trabalhadores=TRABALHADORES):
+        self.bot = bot
+        self.fila = asyncio.Queue()
+        self.trabalhadores = trabalhadores
+        self._balde_global = BaldeDeFichas(taxa_global, rajada_global)
+        self._taxa_por_chat = (taxa_por_chat, rajada_por_chat)
+        self._baldes_chat = {}
+        self._travas_chat = {}
+        self._na_fila = {}        # chave -> MensagemSaida ainda não enviada
+        self._enviadas = {}       # chave -> message_id já entregue
+        self._tarefas = []
+        self._latencias = deque(maxlen=AMOSTRAS_LATENCIA)
+        self.contadores = {"enviadas": 0, "editadas": 0, "agrupadas": 0, "repetidas_429": 0,
+                           "novas_tentativas": 0, "falhas": 0}
+
+    def iniciar(self):
+        self._tarefas = [asyncio.create_task(self._trabalhar()) for _ in range(self.trabalhadores)]
+        return self._tarefas
+
+    async def parar(self, esvaziar=True):
+        """Encerra os trabalhadores, esperando a fila esvaziar por padrão."""
+        if esvaziar:
+            await self.fila.join()
+        for tarefa in self._tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*self._tarefas, return_exceptions=True)
+        self._tarefas = []
+
+    def enviar(self, chat_id, texto, chave=None, ultima=False):
+        """Enfileira a mensagem e retorna um futuro com o message_id entregue.
+
+        `ultima=True` indica que a chave não terá mais edições depois desta.
+        """
+        if chave is not None and chave in self._na_fila:
+            # A versão anterior ainda não saiu: basta trocar o texto
+            pendente = self._na_fila[chave]
+            pendente.texto = texto
+            pendente.ultima = pendente.ultima or ultima
+            self.contadores["agrupadas"] += 1
+            return pendente.futuro
+
+        mensagem = MensagemSaida(chat_id, texto, chave, ultima, asyncio.get_running_loop().create_future())
+        if chave is not None:
+            self._na_fila[chave] = mensagem
+        self.fila.put_nowait(mensagem)
+        return mensagem.futuro
+
+    def metricas(self):
+        latencias = sorted(self._latencias)
+
+        def percentil(p):
+            return latencias[min(len(latencias) - 1, int(len(latencias) * p))] if latencias else 0.0
+
+        return {
+            "fila": self.fila.qsize(),
+            **self.contadores,
+            "latencia_p50_ms": round(percentil(0.5) * 1000, 1),
+            "latencia_p95_ms": round(percentil(0.95) * 1000, 1),
+            "latencia_max_ms": round((latencias[-1] if latencias else 0.0) * 1000, 1),
+        }
+
+    def _balde_chat(self, chat_id):
+        balde = self._baldes_chat.get(chat_id)
+        if balde is None:
+            balde = self._baldes_chat[chat_id] = BaldeDeFichas(*self._taxa_por_chat)
+            self._travas_chat[chat_id] = asyncio.Lock()
+        return balde
+
+    async def _aguardar_fichas(self, balde_chat):
+        while True:
+            espera = max(balde_chat.espera(), self._balde_global.espera())
+            if espera <= 0:
+                balde_chat.consumir()
+                self._balde_global.consumir()
+                return
+            await asyncio.sleep(espera)
+
+    async def _trabalhar(self):
+        while True:
+            mensagem = await self.fila.get()
+            try:
+                balde_chat = self._balde_chat(mensagem.chat_id)
+                async with self._travas_chat[mensagem.chat_id]:
+                    await self._entregar(mensagem, balde_chat)
+            except Exception as e:
+                self.contadores["falhas"] += 1
+                logging.error(f"Erro ao enviar mensagem para o chat {mensagem.chat_id}: {e}")
+                if not mensagem.futuro.done():
+                    mensagem.futuro.set_exception(e)
+            finally:
+                self.fila.task_done()
+
+    async def _entregar(self, mensagem, balde_chat):
+        while True:
+            await self._aguardar_fichas(balde_chat)
+            # A partir daqui o texto não muda mais: novos envios com a chave serão edições
+            if mensagem.chave is not None:
+                self._na_fila.pop(mensagem.chave, None)
+            id_anterior = self._enviadas.get(mensagem.chave) if mensagem.chave is not None else None
+            try:
+                if id_anterior is not None:
+                    try:
+                        await self.bot.edit_message_text(
+                            chat_id=mensagem.chat_id, message_id=id_anterior, text=mensagem.texto)
+                    except BadRequest as e:
+                        if "not modified" not in str(e).lower():
+                            raise
+                    self.contadores["editadas"] += 1
+                    id_mensagem = id_anterior
+                else:
+                    resposta = await self.bot.send_message(chat_id=mensagem.chat_id, text=mensagem.texto)
+                    self.contadores["enviadas"] += 1
+                    id_mensagem = resposta.message_id
+            except RetryAfter as e:
+                # O Telegram pediu para esperar: pausa só este chat pelo tempo indicado
+                espera = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else e.retry_after
+                self.contadores["repetidas_429"] += 1
+                balde_chat.pausar(espera)
+                if mensagem.chave is not None:
+                    self._na_fila.setdefault(mensagem.chave, mensagem)
+                continue
+            except (TimedOut, NetworkError):
+                mensagem.tentativas += 1
+                if mensagem.tentativas >= TENTATIVAS:
+                    raise
+                self.contadores["novas_tentativas"] += 1
+                await asyncio.sleep(min(2 ** mensagem.tentativas, 30))
+                continue
+
+            if mensagem.chave is not None:
+                if mensagem.ultima:
+                    self._enviadas.pop(mensagem.chave, None)
+                else:
+                    self._enviadas[mensagem.chave] = id_mensagem
+            self._latencias.append(time.perf_counter() - mensagem.enfileirada_em)
+            if not mensagem.futuro.done():
+                mensagem.futuro.set_result(id_mensagem)
+            logging.debug(f"Mensagem entregue ao chat {mensagem.chat_id} ({len(mensagem.texto)} caracteres).")
+            return
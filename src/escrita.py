@@ -0,0 +1,219 @@
+import atexit
+import sqlite3
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+
+from src.banco import conexao
+from src.metricas import metricas
+
+# Espera máxima para juntar escritas em um lote (as urgentes não esperam)
+INTERVALO_ESCRITA = 0.01
+# Escritas por transação
+TAMANHO_LOTE = 5_000
+
+
+class _Escrita:
+    __slots__ = ("sql", "parametros", "muitos", "chave", "futuros")
+
+    def __init__(self, sql, parametros, muitos, chave, futuro):
+        self.sql = sql
+        self.parametros = parametros
+        self.muitos = muitos
+        self.chave = chave
+        self.futuros = [futuro]
+
+
+class EscritorEmLote:
+    """Write-behind: junta INSERTs e UPDATEs de várias threads e tarefas em uma transação por lote.
+
+    Cada escrita devolve um Future com o `lastrowid` (INSERT) ou o `rowcount`
+    (UPDATE, executemany). Uma thread própria grava tudo o que estiver
+    pendente quando passa o intervalo, quando o lote enche ou logo em seguida
+    para escritas urgentes (a rodada do coletor), em ordem de chegada.
+
+    Escritas com a mesma `chave` ainda pendentes são agrupadas: só a última
+    vai para o banco (ex.: a banca de um usuário atualizada várias vezes no
+    mesmo lote). Se o lote falhar, as escritas são refeitas uma a uma para que
+    só a que falhou receba o erro. `parar()` (e a saída do processo) grava o
+    que estiver pendente.
+    """
+
+    def __init__(self, intervalo=INTERVALO_ESCRITA, tamanho_lote=TAMANHO_LOTE):
+        self.intervalo = intervalo
+        self.tamanho_lote = tamanho_lote
+        self._pendentes = []
+        self._por_chave = {}
+        self._urgente = False
+        self._parando = False
+        self._condicao = threading.Condition()
+        self._thread = None
+        self._parar_na_saida = False
+        self.lotes = 0
+        self.escritas = 0
+
+    def iniciar(self):
+        with self._condicao:
+            if self._thread is None or not self._thread.is_alive():
+                self._parando = False
+                self._thread = threading.Thread(target=self._executar, name="escritor", daemon=True)
+                self._thread.start()
+                # Um só gancho de saída por escritor, mesmo que ele seja reiniciado várias vezes
+                if not self._parar_na_saida:
+                    atexit.register(self.parar)
+                    self._parar_na_saida = True
+        return self
+
+    def parar(self):
+        """Grava as escritas pendentes e encerra a thread."""
+        with self._condicao:
+            thread = self._thread
+            self._parando = True
+            self._condicao.notify()
+        if thread is not None:
+            thread.join()
+        self._thread = None
+        self.descarregar()
+
+    @property
+    def pendentes(self):
+        return len(self._pendentes)
+
+    def enviar(self, sql, parametros=(), muitos=False, chave=None, urgente=False):
+        """Enfileira a escrita (de qualquer thread) e retorna um concurrent.futures.Future."""
+        return self._enfileirar(Future(), sql, parametros, muitos, chave, urgente)
+
+    async def executar(self, sql, parametros=(), muitos=False, chave=None, urgente=False):
+        """Versão para o event loop: espera o lote com a escrita ser gravado.
+
+        O futuro é do próprio loop e o lote inteiro é resolvido com um único
+        `call_soon_threadsafe`, sem encadear um concurrent.futures.Future por escrita.
+        """
+        futuro = asyncio.get_running_loop().create_future()
+        return await self._enfileirar(futuro, sql, parametros, muitos, chave, urgente)
+
+    def _enfileirar(self, futuro, sql, parametros, muitos, chave, urgente):
+        with self._condicao:
+            anterior = self._por_chave.get(chave) if chave is not None else None
+            if anterior is not None:
+                anterior.sql, anterior.parametros, anterior.muitos = sql, parametros, muitos
+                anterior.futuros.append(futuro)
+            else:
+                escrita = _Escrita(sql, parametros, muitos, chave, futuro)
+                self._pendentes.append(escrita)
+                if chave is not None:
+                    self._por_chave[chave] = escrita
+            self._urgente = self._urgente or urgente
+            if urgente or len(self._pendentes) >= self.tamanho_lote or len(self._pendentes) == 1:
+                self._condicao.notify()
+        if self._thread is None:
+            # Sem a thread (ex.: scripts e testes), grava na hora
+            self.descarregar()
+        return futuro
+
+    def _executar(self):
+        while True:
+            with self._condicao:
+                while not self._pendentes and not self._parando:
+                    self._condicao.wait()
+                if self._parando:
+                    return
+                # Espera o lote encher por até `intervalo`, a menos que haja uma escrita urgente
+                if not self._urgente and len(self._pendentes) < self.tamanho_lote:
+                    self._condicao.wait(self.intervalo)
+            self.descarregar()
+
+    def _retirar_lote(self):
+        with self._condicao:
+            lote = self._pendentes[:self.tamanho_lote]
+            del self._pendentes[:self.tamanho_lote]
+            if not self._pendentes:
+                self._urgente = False
+            # Escritas que já saíram da fila não recebem mais as da mesma chave
+            for escrita in lote:
+                if escrita.chave is not None and self._por_chave.get(escrita.chave) is escrita:
+                    del self._por_chave[escrita.chave]
+        return lote
+
+    def descarregar(self):
+        """Grava agora tudo o que está pendente, em lotes de até `tamanho_lote` escritas por transação."""
+        while True:
+            lote = self._retirar_lote()
+            if not lote:
+                return
+            with metricas.cronometrar("blaze_escrita_lote_segundos"):
+                try:
+                    resultados = self._gravar(lote)
+                except sqlite3.Error as e:
+                    if len(lote) == 1:
+                        resultados = [e]
+                    else:
+                        logging.warning(f"Lote de {len(lote)} escritas falhou ({e}); refazendo uma a uma")
+                        resultados = [self._gravar_isolada(escrita) for escrita in lote]
+            self.lotes += 1
+            self.escritas += len(lote)
+            metricas.incrementar("blaze_escritas_total", len(lote))
+            self._resolver(lote, resultados)
+
+    @staticmethod
+    def _resolver(lote, resultados):
+        por_loop = {}
+        for escrita, resultado in zip(lote, resultados):
+            for futuro in escrita.futuros:
+                if isinstance(futuro, Future):
+                    _definir(futuro, resultado)
+                else:
+                    por_loop.setdefault(futuro.get_loop(), []).append((futuro, resultado))
+        for loop, itens in por_loop.items():
+            try:
+                loop.call_soon_threadsafe(_definir_todos, itens)
+            except RuntimeError:
+                pass  # loop já encerrado: ninguém mais espera por essas escritas
+
+    @staticmethod
+    def _aplicar(conn, escrita):
+        if escrita.muitos:
+            return conn.executemany(escrita.sql, escrita.parametros).rowcount
+        cursor = conn.execute(escrita.sql, escrita.parametros)
+        return cursor.lastrowid if escrita.sql.lstrip()[:6].upper() == "INSERT" else cursor.rowcount
+
+    def _gravar(self, lote):
+        with conexao() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            return [self._aplicar(conn, escrita) for escrita in lote]
+
+    def _gravar_isolada(self, escrita):
+        try:
+            with conexao() as conn:
+                return self._aplicar(conn, escrita)
+        except sqlite3.Error as e:
+            return e
+
+
+def _definir(futuro, resultado):
+    if futuro.done():
+        return
+    if isinstance(resultado, Exception):
+        futuro.set_exception(resultado)
+    else:
+        futuro.set_result(resultado)
+
+
+def _definir_todos(itens):
+    for futuro, resultado in itens:
+        _definir(futuro, resultado)
+
+
+_escritor = None
+_escritor_lock = threading.Lock()
+
+
+def obter_escritor():
+    """Escritor compartilhado do processo (a thread é iniciada no primeiro uso)."""
+    global _escritor
+    if _escritor is None:
+        with _escritor_lock:
+            if _escritor is None:
+                _escritor = EscritorEmLote().iniciar()
+    return _escritor
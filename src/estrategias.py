@@ -0,0 +1,413 @@
+import time
+import inspect
+import logging
+import threading
+
+from src import consultas
+from src.analisador import JANELAS_PADRAO, REGRAS, SEM_APOSTA
+from src.banco import conexao
+from src.metricas import metricas
+from src.modelo import BRANCO, CORES_VALIDAS, PAGAMENTO_BRANCO, PAGAMENTO_COR, PRETO, VERMELHO
+from src.padroes import MINIMO_AMOSTRAS, TAMANHO_MAXIMO_PADRAO, VANTAGEM_MINIMA, IndicePadroes, cor_prevista
+
+# Rodadas do banco usadas para preparar o estado (janelas e padrões) ao iniciar, sem contar nos placares
+AQUECIMENTO = 1000
+
+
+class EstadoRodadas:
+    """Features das últimas rodadas mantidas em O(1) por rodada, para as estratégias em modo sombra.
+
+    As contagens de cada janela são atualizadas com a rodada que entra e a
+    que sai (buffer circular). O que seguiu cada sequência das últimas 1 a
+    `tamanho_padrao` cores vem de um IndicePadroes (src/padroes.py): com
+    `indice`, o índice informado é só lido (no bot, o de obter_indice(), o
+    mesmo do sinal e do /padrao, alimentado pelo próprio ouvinte); sem ele,
+    o estado monta um índice próprio com as rodadas que recebe, sem ver o
+    futuro (replay e benchmarks). Como na reserva do sinal, o padrão atual
+    começa depois da última cor desconhecida.
+    """
+
+    def __init__(self, janelas=JANELAS_PADRAO, tamanho_padrao=TAMANHO_MAXIMO_PADRAO, indice=None):
+        self._indice_proprio = indice is None
+        self.indice = IndicePadroes(tamanho_padrao) if indice is None else indice
+        tamanho_padrao = self.indice.tamanho_maximo
+        self.capacidade = max(janelas)
+        self._cores = [SEM_APOSTA] * self.capacidade
+        self._proximo = 0
+        self.rodadas = 0
+        self.janelas = {janela: [0, 0, 0] for janela in janelas}
+        self.ultima = None
+        self.sequencia = 0
+        self.desde_branco = 0
+        # Cores válidas seguidas desde a última desconhecida (tamanho do padrão atual)
+        self.consecutivas = 0
+        # Código (base 3) das últimas k cores para cada k e as linhas do índice já lidas nesta rodada
+        self.codigos = [0] * (tamanho_padrao + 1)
+        self._proximas = {}
+
+    def adicionar(self, cor, created_at=None):
+        """Atualiza o estado com a rodada; uma cor desconhecida só interrompe o padrão atual."""
+        if self._indice_proprio:
+            self.indice.adicionar(cor, created_at)
+        self._proximas.clear()
+        if cor not in CORES_VALIDAS:
+            self.consecutivas = 0
+            return
+
+        cores = self._cores
+        for janela, contagem in self.janelas.items():
+            if self.rodadas >= janela:
+                contagem[cores[(self._proximo - janela) % self.capacidade]] -= 1
+            contagem[cor] += 1
+        cores[self._proximo] = cor
+        self._proximo = (self._proximo + 1) % self.capacidade
+        for k in range(1, len(self.codigos)):
+            self.codigos[k] = (self.codigos[k] * 3 + cor) % 3 ** k
+        self.consecutivas += 1
+
+        self.sequencia = self.sequencia + 1 if cor == self.ultima else 1
+        self.desde_branco = 0 if cor == BRANCO else self.desde_branco + 1
+        self.ultima = cor
+        self.rodadas += 1
+
+    def proxima(self, k):
+        """Contagem (branco, vermelho, preto) do que saiu depois das últimas `k` cores.
+
+        Lida do índice uma vez por rodada e guardada como lista: as estratégias
+        de padrão consultam os mesmos tamanhos a cada rodada.
+        """
+        if self.consecutivas < k:
+            return None
+        contagem = self._proximas.get(k)
+        if contagem is None:
+            contagem = self._proximas[k] = self.indice.contagens[k][self.codigos[k]].tolist()
+        return contagem
+
+
+# Cada estratégia recebe o EstadoRodadas logo após a rodada e devolve a cor a apostar
+# na seguinte (ou SEM_APOSTA). Só lê o estado: o custo por rodada tem de ser O(1).
+ESTRATEGIAS = {}
+
+
+def registrar_estrategia(nome, funcao):
+    ESTRATEGIAS[nome] = funcao
+    return funcao
+
+
+def parametros_da_regra(nome):
+    """Parâmetros padrão de uma regra do analisador (os que o backtest e o sinal usam)."""
+    parametros = inspect.signature(REGRAS[nome]).parameters.values()
+    return {p.name: p.default for p in parametros if p.default is not inspect.Parameter.empty}
+
+
+# As fábricas abaixo são as regras do analisador em versão incremental, com os mesmos parâmetros
+
+def tendencia(janela, vantagem):
+    """Aposta na cor (vermelho/preto) mais frequente na janela, se a diferença passar de `vantagem`."""
+    def avaliar(estado):
+        contagem = estado.janelas[janela]
+        total = max(sum(contagem), 1)
+        diferenca = contagem[VERMELHO] / total - contagem[PRETO] / total
+        if diferenca >= vantagem:
+            return VERMELHO
+        if diferenca <= -vantagem:
+            return PRETO
+        return SEM_APOSTA
+    return avaliar
+
+
+def contra_tendencia(janela, vantagem):
+    """Aposta na cor (vermelho/preto) menos frequente na janela, se a diferença passar de `vantagem`."""
+    seguir = tendencia(janela, vantagem)
+
+    def avaliar(estado):
+        cor = seguir(estado)
+        return SEM_APOSTA if cor == SEM_APOSTA else (PRETO if cor == VERMELHO else VERMELHO)
+    return avaliar
+
+
+def quebra_de_sequencia(minimo):
+    """Depois de `minimo` cores iguais seguidas, aposta na oposta."""
+    def avaliar(estado):
+        if estado.sequencia >= minimo and estado.ultima != BRANCO:
+            return PRETO if estado.ultima == VERMELHO else VERMELHO
+        return SEM_APOSTA
+    return avaliar
+
+
+def seguir_sequencia(minimo, maximo):
+    """Acompanha sequências de `minimo` a `maximo` cores iguais."""
+    def avaliar(estado):
+        if minimo <= estado.sequencia <= maximo and estado.ultima != BRANCO:
+            return estado.ultima
+        return SEM_APOSTA
+    return avaliar
+
+
+def branco_atrasado(atraso):
+    """Aposta no branco quando ele não sai há pelo menos `atraso` rodadas."""
+    def avaliar(estado):
+        return BRANCO if estado.desde_branco >= atraso else SEM_APOSTA
+    return avaliar
+
+
+def desequilibrio(janela, limite):
+    """Aposta contra a cor dominante quando a frequência dela na janela passa de `limite`."""
+    def avaliar(estado):
+        contagem = estado.janelas[janela]
+        minimo = limite * max(sum(contagem), 1)
+        if contagem[VERMELHO] >= minimo:
+            return PRETO
+        if contagem[PRETO] >= minimo:
+            return VERMELHO
+        return SEM_APOSTA
+    return avaliar
+
+
+def padrao(k, minimo=10):
+    """Aposta na cor (vermelho/preto) que mais seguiu as últimas `k` cores (com `minimo` ocorrências)."""
+    def avaliar(estado):
+        seguintes = estado.proxima(k)
+        if seguintes is None or seguintes[VERMELHO] + seguintes[PRETO] < minimo:
+            return SEM_APOSTA
+        return VERMELHO if seguintes[VERMELHO] >= seguintes[PRETO] else PRETO
+    return avaliar
+
+
+def padrao_historico(estado, minimo_amostras=MINIMO_AMOSTRAS, vantagem=VANTAGEM_MINIMA):
+    """A reserva do sinal (sinal_do_indice): o maior sufixo das últimas cores com amostras suficientes."""
+    for k in range(min(estado.consecutivas, estado.indice.tamanho_maximo), 0, -1):
+        contagem = estado.proxima(k)
+        if sum(contagem) >= minimo_amostras:
+            cor = cor_prevista(contagem, vantagem)
+            return SEM_APOSTA if cor is None else cor
+    return SEM_APOSTA
+
+
+def constante(cor):
+    return lambda estado: cor
+
+
+def repetir_ultima(estado):
+    return estado.ultima if estado.ultima in (VERMELHO, PRETO) else SEM_APOSTA
+
+
+# Estratégias padrão: primeiro as regras do analisador, com os mesmos nomes e parâmetros
+# (o ranking compara o que o backtest e o sinal usam), depois variações dos parâmetros
+_TENDENCIA = parametros_da_regra("tendencia_100")
+_QUEBRA = parametros_da_regra("quebra_de_sequencia")
+_SEGUIR = parametros_da_regra("seguir_sequencia")
+_BRANCO = parametros_da_regra("branco_atrasado")
+_DESEQUILIBRIO = parametros_da_regra("desequilibrio_curto")
+
+registrar_estrategia("tendencia_100", tendencia(**_TENDENCIA))
+registrar_estrategia("quebra_de_sequencia", quebra_de_sequencia(**_QUEBRA))
+registrar_estrategia("seguir_sequencia", seguir_sequencia(**_SEGUIR))
+registrar_estrategia("branco_atrasado", branco_atrasado(**_BRANCO))
+registrar_estrategia("desequilibrio_curto", desequilibrio(**_DESEQUILIBRIO))
+registrar_estrategia("padrao_historico", padrao_historico)
+
+for _janela in JANELAS_PADRAO:
+    if _janela != _TENDENCIA["janela"]:
+        registrar_estrategia(f"tendencia_{_janela}", tendencia(_janela, _TENDENCIA["vantagem"]))
+    registrar_estrategia(f"contra_tendencia_{_janela}", contra_tendencia(_janela, _TENDENCIA["vantagem"]))
+for _minimo in range(2, 10):
+    if _minimo != _QUEBRA["minimo"]:
+        registrar_estrategia(f"quebra_de_sequencia_{_minimo}", quebra_de_sequencia(_minimo))
+for _minimo in range(1, 7):
+    if (_minimo, _minimo + 1) != (_SEGUIR["minimo"], _SEGUIR["maximo"]):
+        registrar_estrategia(f"seguir_sequencia_{_minimo}_{_minimo + 1}", seguir_sequencia(_minimo, _minimo + 1))
+for _atraso in range(10, 101, 10):
+    if _atraso != _BRANCO["atraso"]:
+        registrar_estrategia(f"branco_atrasado_{_atraso}", branco_atrasado(_atraso))
+for _janela in (10, 25, 50):
+    for _limite in (0.6, 0.65, 0.7, 0.75, 0.8):
+        if (_janela, _limite) != (_DESEQUILIBRIO["janela"], _DESEQUILIBRIO["limite"]):
+            registrar_estrategia(f"desequilibrio_{_janela}_{int(_limite * 100)}", desequilibrio(_janela, _limite))
+for _k in range(1, TAMANHO_MAXIMO_PADRAO + 1):
+    registrar_estrategia(f"padrao_{_k}", padrao(_k))
+registrar_estrategia("sempre_vermelho", constante(VERMELHO))
+registrar_estrategia("sempre_preto", constante(PRETO))
+registrar_estrategia("repetir_ultima", repetir_ultima)
+
+
+class Placar:
+    """Resultado em papel de uma estratégia (1 unidade por aposta), atualizado em O(1) por rodada."""
+
+    __slots__ = ("nome", "aposta", "apostas", "vitorias", "lucro", "sequencia",
+                 "maior_sequencia_vitorias", "maior_sequencia_derrotas")
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.aposta = SEM_APOSTA
+        self.apostas = 0
+        self.vitorias = 0
+        self.lucro = 0.0
+        # Positiva: vitórias seguidas; negativa: derrotas seguidas
+        self.sequencia = 0
+        self.maior_sequencia_vitorias = 0
+        self.maior_sequencia_derrotas = 0
+
+    @property
+    def taxa_acerto(self):
+        return self.vitorias / self.apostas if self.apostas else 0.0
+
+    def liquidar(self, cor):
+        aposta = self.aposta
+        if aposta == SEM_APOSTA:
+            return
+        self.apostas += 1
+        if aposta == cor:
+            self.vitorias += 1
+            self.lucro += (PAGAMENTO_BRANCO if cor == BRANCO else PAGAMENTO_COR) - 1
+            self.sequencia = self.sequencia + 1 if self.sequencia > 0 else 1
+            if self.sequencia > self.maior_sequencia_vitorias:
+                self.maior_sequencia_vitorias = self.sequencia
+        else:
+            self.lucro -= 1
+            self.sequencia = self.sequencia - 1 if self.sequencia < 0 else -1
+            if -self.sequencia > self.maior_sequencia_derrotas:
+                self.maior_sequencia_derrotas = -self.sequencia
+
+    def resumo(self):
+        return {
+            "estrategia": self.nome,
+            "apostas": self.apostas,
+            "vitorias": self.vitorias,
+            "taxa_acerto": self.taxa_acerto,
+            "lucro": self.lucro,
+            "sequencia": self.sequencia,
+            "maior_sequencia_vitorias": self.maior_sequencia_vitorias,
+            "maior_sequencia_derrotas": self.maior_sequencia_derrotas,
+        }
+
+
+class ExecutorSombra:
+    """Avalia todas as estratégias registradas em cada rodada nova, sem apostar (modo sombra).
+
+    A cada rodada: liquida a aposta que cada estratégia fez para ela,
+    atualiza o estado incremental e pede a aposta da próxima. O custo por
+    rodada é O(estratégias), sem reler o histórico. Rodadas fora de ordem
+    (backfill) são ignoradas e as de cor desconhecida anulam as apostas.
+    `indice` é repassado ao EstadoRodadas.
+    """
+
+    def __init__(self, estrategias=None, indice=None):
+        estrategias = ESTRATEGIAS if estrategias is None else estrategias
+        self.estado = EstadoRodadas(indice=indice)
+        self._indice = indice
+        self.placares = [Placar(nome) for nome in estrategias]
+        self._avaliadores = list(estrategias.values())
+        self.rodadas = 0
+        self.ultimo_created_at = None
+        self.desde = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.placares)
+
+    def aquecer(self, rodadas):
+        """Prepara o estado com rodadas (cor, created_at) antigas, em ordem, sem contar nos placares."""
+        with self._lock:
+            for cor, created_at in rodadas:
+                self.estado.adicionar(cor, created_at)
+
+    def adicionar(self, cor, created_at=None):
+        with self._lock:
+            if created_at is not None:
+                if self.ultimo_created_at is not None and created_at <= self.ultimo_created_at:
+                    return False
+                self.ultimo_created_at = created_at
+            if self.desde is None:
+                self.desde = created_at if created_at is not None else int(time.time() * 1000)
+            inicio = time.perf_counter()
+            placares = self.placares
+            estado = self.estado
+            if cor not in CORES_VALIDAS:
+                estado.adicionar(cor, created_at)
+                for placar in placares:
+                    placar.aposta = SEM_APOSTA
+                return True
+            for placar in placares:
+                placar.liquidar(cor)
+            estado.adicionar(cor, created_at)
+            for placar, avaliar in zip(placares, self._avaliadores):
+                placar.aposta = avaliar(estado)
+            self.rodadas += 1
+        metricas.observar("blaze_estrategias_segundos", time.perf_counter() - inicio)
+        return True
+
+    def registrar(self, rodadas):
+        """Avalia rodadas (numero, cor, created_at) recém-gravadas, em ordem cronológica (ouvinte do coletor)."""
+        for _, cor, created_at in rodadas:
+            self.adicionar(cor, created_at)
+
+    def sincronizar(self):
+        """Avalia as rodadas gravadas depois da última vista (ex.: por um coletor em outro processo)."""
+        if self._indice is not None:
+            # O índice compartilhado primeiro: as estratégias de padrão leem as rodadas novas nele
+            self._indice.sincronizar()
+        with conexao() as conn:
+            linhas = conn.execute(consultas.HISTORICO_APOS, (self.ultimo_created_at or 0,)).fetchall()
+        self.registrar(linhas)
+        return len(linhas)
+
+    def ranking(self, quantidade=10, minimo_apostas=1):
+        """As `quantidade` estratégias com maior lucro (empates pela taxa de acerto)."""
+        with self._lock:
+            placares = [placar.resumo() for placar in self.placares if placar.apostas >= minimo_apostas]
+        placares.sort(key=lambda placar: (placar["lucro"], placar["taxa_acerto"]), reverse=True)
+        return placares[:quantidade]
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def obter_executor():
+    """Executor do processo: aquecido com as últimas rodadas do banco e ligado ao coletor deste processo.
+
+    Os padrões vêm do índice do processo (obter_indice), registrado no
+    coletor antes do executor: a rodada nova já está no índice quando as
+    estratégias são avaliadas.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                from src.coletor import ao_gravar_rodadas
+                from src.padroes import obter_indice
+
+                executor = ExecutorSombra(indice=obter_indice())
+                with conexao() as conn:
+                    linhas = conn.execute(consultas.RESULTADOS_RECENTES, (AQUECIMENTO,)).fetchall()
+                executor.aquecer((cor, created_at) for _, _, cor, created_at in reversed(linhas))
+                executor.ultimo_created_at = linhas[0][3] if linhas else None
+                ao_gravar_rodadas(executor.registrar)
+                logging.info(f"{len(executor)} estratégia(s) em modo sombra, aquecidas com {len(linhas)} rodada(s)")
+                _executor = executor
+    return _executor
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.analisador import Historico
+
+    parser = argparse.ArgumentParser(description="Replay do histórico pelas estratégias em modo sombra")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    # Índice próprio, montado durante o replay: cada rodada só vê os padrões anteriores a ela
+    historico = Historico.completo()
+    executor = ExecutorSombra()
+    inicio = time.perf_counter()
+    for cor, created_at in zip(historico.cores.tolist(), historico.created_at.tolist()):
+        executor.adicionar(cor, created_at)
+    duracao = time.perf_counter() - inicio
+    print(f"{executor.rodadas} rodadas x {len(executor)} estratégias em {duracao:.2f} s "
+          f"({duracao / max(executor.rodadas, 1) * 1e6:.0f} µs por rodada)")
+    for posicao, placar in enumerate(executor.ranking(args.top), start=1):
+        print(f"{posicao:2d}. {placar['estrategia']:28s} lucro {placar['lucro']:+8.0f} | "
+              f"{placar['apostas']:6d} apostas, acerto {placar['taxa_acerto']:.1%} | "
+              f"maior sequência de derrotas {placar['maior_sequencia_derrotas']}")
@@ -0,0 +1,229 @@
+import time
+import sqlite3
+import asyncio
+import logging
+from typing import Callable, NamedTuple
+
+import aiohttp
+
+from src.banco import agora_ms, conexao, iso_para_ms
+from src.coletor import URL_RECENTES, converter_resultado, criar_tabela, salvar_resultados_em_lote
+from src.coletor_http import (
+    CONEXOES_HTTP,
+    INTERVALO_MAXIMO,
+    INTERVALO_RAPIDO,
+    AgendaAdaptativa,
+    ConsultaRecentes,
+    criar_sessao,
+)
+from src.escrita import obter_escritor
+from src.metricas import metricas
+from src.modelo import DURACAO_RODADA_MS, RodadaCrash
+
+
+class Jogo(NamedTuple):
+    """Um feed de rodadas: endpoint de recentes, conversão de cada item e tabela de destino.
+
+    `converter` devolve uma tupla com as `colunas` da tabela, `created_at`
+    (epoch ms) sempre por último. Com `salvar`, as rodadas vão por essa
+    função (síncrona, recebe a lista e retorna quantas inseriu) em vez da
+    inserção genérica pelo escritor em lote.
+    """
+
+    nome: str
+    url: str
+    converter: Callable
+    tabela: str
+    colunas: tuple
+    cadencia_ms: int = DURACAO_RODADA_MS
+    salvar: Callable | None = None
+
+    @property
+    def sql_insercao(self):
+        return (f"INSERT OR IGNORE INTO {self.tabela} ({', '.join(self.colunas)}) "
+                f"VALUES ({', '.join('?' * len(self.colunas))})")
+
+    @property
+    def sql_ultimo_created_at(self):
+        return f"SELECT MAX(created_at) FROM {self.tabela}"
+
+
+URL_RECENTES_CRASH = "https://blaze.bet.br/api/singleplayer-originals/originals/crash_games/recent/1"
+
+
+def converter_crash(result):
+    """Item da API do Crash ({"crash_point": "2.15", "created_at": ...}) para RodadaCrash."""
+    try:
+        ponto = float(result.get("crash_point"))
+    except (TypeError, ValueError):
+        ponto = None
+    try:
+        created_at = iso_para_ms(result["created_at"]) if result.get("created_at") else None
+    except ValueError:
+        created_at = None
+    return RodadaCrash(ponto, created_at)
+
+
+# Jogos conhecidos; um jogo novo precisa só da entrada aqui e da tabela (migração)
+JOGOS = {}
+
+
+def registrar_jogo(jogo):
+    JOGOS[jogo.nome] = jogo
+    return jogo
+
+
+# O Double continua passando por salvar_resultados_em_lote: buffer, ouvintes e métricas do coletor
+registrar_jogo(Jogo("double", URL_RECENTES, converter_resultado, "resultados", ("numero", "cor", "created_at"),
+                    salvar=salvar_resultados_em_lote))
+registrar_jogo(Jogo("crash", URL_RECENTES_CRASH, converter_crash, "resultados_crash", ("ponto", "created_at")))
+
+
+class Feed:
+    """Estado e estatísticas de um jogo acompanhado pelo supervisor."""
+
+    def __init__(self, jogo, sessao):
+        self.jogo = jogo
+        self.consulta = ConsultaRecentes(sessao, jogo.url, jogo.converter, jogo=jogo.nome)
+        self.agenda = AgendaAdaptativa(cadencia_padrao_ms=jogo.cadencia_ms)
+        self.iniciado = False
+        self.rodadas = 0
+        self.erros = 0
+        self.falhas_seguidas = 0
+        self.atraso_ms = None
+
+    def metricas(self):
+        return {
+            "rodadas": self.rodadas,
+            "erros": self.erros,
+            "falhas_seguidas": self.falhas_seguidas,
+            "requisicoes": self.consulta.requisicoes,
+            "nao_modificadas": self.consulta.nao_modificadas,
+            "atraso_ms": self.atraso_ms if self.atraso_ms is not None else -1,
+            "cadencia_ms": self.agenda.cadencia_ms,
+        }
+
+
+def _ultimo_created_at(jogo):
+    with conexao() as conn:
+        return conn.execute(jogo.sql_ultimo_created_at).fetchone()[0]
+
+
+class SupervisorJogos:
+    """Acompanha vários jogos ao mesmo tempo, uma tarefa por feed.
+
+    Os feeds compartilham a sessão HTTP (pool keep-alive) e gravam pelo
+    escritor em lote, então rodadas de jogos diferentes que saem juntas
+    vão na mesma transação. Cada feed tem a própria agenda adaptativa e
+    as próprias métricas (rótulo `jogo`). Um erro em um feed (API fora,
+    resposta inválida, falha na gravação) só atrasa aquele feed: ele tenta
+    de novo com backoff, e uma tarefa que morrer é reiniciada.
+    """
+
+    def __init__(self, nomes=None, sessao=None):
+        nomes = list(nomes or JOGOS)
+        desconhecidos = [nome for nome in nomes if nome not in JOGOS]
+        if desconhecidos:
+            raise ValueError(f"Jogo(s) desconhecido(s): {', '.join(desconhecidos)}. Disponíveis: {', '.join(JOGOS)}")
+        self.jogos = [JOGOS[nome] for nome in nomes]
+        self.sessao = sessao
+        self.feeds = {}
+
+    def metricas(self):
+        return {nome: feed.metricas() for nome, feed in self.feeds.items()}
+
+    def _medidas(self):
+        return {f"blaze_feed_{nome}_{chave}": valor
+                for nome, estatisticas in self.metricas().items() for chave, valor in estatisticas.items()}
+
+    async def executar(self, parar=None):
+        """Roda todos os feeds até `parar` (asyncio.Event opcional) ou o cancelamento."""
+        parar = parar or asyncio.Event()
+        await asyncio.to_thread(criar_tabela)
+        propria = self.sessao is None
+        sessao = self.sessao or criar_sessao(conexoes=CONEXOES_HTTP * len(self.jogos))
+        self.feeds = {jogo.nome: Feed(jogo, sessao) for jogo in self.jogos}
+        metricas.medir(self._medidas)
+        logging.info(f"Acompanhando {len(self.feeds)} jogo(s): {', '.join(self.feeds)}",
+                     extra={"jogos": list(self.feeds)})
+
+        tarefas = {asyncio.create_task(self._acompanhar(feed, parar)): feed for feed in self.feeds.values()}
+        try:
+            while tarefas:
+                prontas, _ = await asyncio.wait(tarefas, return_when=asyncio.FIRST_COMPLETED)
+                for tarefa in prontas:
+                    feed = tarefas.pop(tarefa)
+                    if parar.is_set():
+                        continue
+                    erro = tarefa.exception()
+                    logging.warning(f"Feed {feed.jogo.nome} encerrou ({erro!r}); reiniciando.",
+                                    extra={"jogo": feed.jogo.nome})
+                    tarefas[asyncio.create_task(self._acompanhar(feed, parar, atraso=INTERVALO_MAXIMO))] = feed
+        finally:
+            for tarefa in tarefas:
+                tarefa.cancel()
+            await asyncio.gather(*tarefas, return_exceptions=True)
+            metricas.remover_medidor(self._medidas)
+            if propria:
+                await sessao.close()
+        return self.metricas()
+
+    async def _acompanhar(self, feed, parar, atraso=0):
+        nome = feed.jogo.nome
+        espera = atraso
+        while True:
+            if espera:
+                try:
+                    await asyncio.wait_for(parar.wait(), timeout=espera)
+                except asyncio.TimeoutError:
+                    pass
+            if parar.is_set():
+                return
+            try:
+                if not feed.iniciado:
+                    feed.consulta.ultimo_created_at = await asyncio.to_thread(_ultimo_created_at, feed.jogo)
+                    feed.iniciado = True
+                anterior = feed.consulta.ultimo_created_at
+                novos = await feed.consulta.buscar()
+                feed.agenda.registrar([rodada[-1] for rodada in novos])
+                if novos:
+                    try:
+                        await self._gravar(feed, novos)
+                    except sqlite3.Error:
+                        # Sem a gravação, a próxima consulta precisa trazer as mesmas rodadas de novo
+                        feed.consulta.ultimo_created_at = anterior
+                        feed.consulta.etag = feed.consulta.last_modified = None
+                        raise
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, OSError, sqlite3.Error) as e:
+                feed.erros += 1
+                feed.falhas_seguidas += 1
+                metricas.incrementar("blaze_api_erros_total", cliente="aiohttp", jogo=nome)
+                espera = min(INTERVALO_RAPIDO * 2 ** feed.falhas_seguidas, INTERVALO_MAXIMO)
+                logging.error(f"Erro no feed {nome}: {e}; nova consulta em {espera:.1f} s",
+                              extra={"jogo": nome, "falhas_seguidas": feed.falhas_seguidas})
+                continue
+            feed.falhas_seguidas = 0
+            espera = feed.agenda.proxima_espera()
+
+    async def _gravar(self, feed, novos):
+        jogo = feed.jogo
+        inicio = time.perf_counter()
+        if jogo.salvar is not None:
+            inseridos = await asyncio.to_thread(jogo.salvar, novos)
+        else:
+            inseridos = await obter_escritor().executar(jogo.sql_insercao, novos, muitos=True)
+        metricas.observar("blaze_feed_gravacao_segundos", time.perf_counter() - inicio, jogo=jogo.nome)
+        agora = agora_ms()
+        for rodada in novos:
+            metricas.observar("blaze_feed_atraso_segundos", max(0, agora - rodada[-1]) / 1000, jogo=jogo.nome)
+        feed.atraso_ms = max(0, agora - novos[-1][-1])
+        if inseridos:
+            feed.rodadas += inseridos
+            metricas.incrementar("blaze_feed_rodadas_total", inseridos, jogo=jogo.nome)
+            logging.info(f"{jogo.nome}: {inseridos} nova(s) rodada(s) salva(s).",
+                         extra={"jogo": jogo.nome, "rodadas": inseridos})
+
+
+async def coletar_jogos(nomes=None, parar=None):
+    """Acompanha os jogos `nomes` (padrão: todos os registrados) até `parar` ou o cancelamento."""
+    return await SupervisorJogos(nomes).executar(parar)
@@ -0,0 +1,128 @@
+import heapq
+import asyncio
+import logging
+import itertools
+
+from src import consultas
+from src.banco import agora_ms, conexao
+from src.escrita import obter_escritor
+from src.metricas import cronometrado
+
+# Sem notificação do coletor (processo separado), o banco é consultado neste intervalo
+INTERVALO_VERIFICACAO = 2
+
+
+class ApostaPendente:
+    """Aposta aguardando a primeira rodada sorteada depois da entrada."""
+
+    __slots__ = ("id_aposta", "horario_entrada", "cor", "valor", "futuro")
+
+    def __init__(self, id_aposta, horario_entrada, cor, valor, futuro):
+        self.id_aposta = id_aposta
+        self.horario_entrada = horario_entrada
+        self.cor = cor
+        self.valor = valor
+        self.futuro = futuro
+
+
+@cronometrado()
+def _buscar_rodadas(desde):
+    with conexao() as conn:
+        if desde is None:
+            return [], conn.execute(consultas.ULTIMO_CREATED_AT).fetchone()[0]
+        return conn.execute(consultas.RESULTADOS_APOS_CREATED_AT, (desde,)).fetchall(), None
+
+
+class AgendadorLiquidacao:
+    """Liquida as apostas pendentes assim que o coletor grava uma nova rodada.
+
+    As apostas ficam em um heap ordenado pelo horário de entrada (a rodada
+    esperada é a primeira com `created_at` posterior). Cada nova rodada
+    liquida de uma vez todas as apostas que ela resolve. As leituras rodam
+    no executor e as escritas vão para o escritor em lote (src/escrita.py),
+    que junta as apostas de todos os usuários em uma transação.
+    """
+
+    def __init__(self, intervalo=INTERVALO_VERIFICACAO):
+        self.intervalo = intervalo
+        self._heap = []
+        self._sequencia = itertools.count()
+        self._evento = asyncio.Event()
+        self._loop = None
+        self._tarefa = None
+        self._ultimo_created_at = None
+
+    @property
+    def pendentes(self):
+        return len(self._heap)
+
+    def iniciar(self):
+        """Inicia a tarefa de liquidação no event loop atual."""
+        self._loop = asyncio.get_running_loop()
+        self._tarefa = asyncio.create_task(self._executar())
+        return self._tarefa
+
+    async def parar(self):
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+
+    def notificar_rodada(self, *_):
+        """Avisa que uma rodada foi gravada. Pode ser chamada de qualquer thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._evento.set)
+
+    async def agendar(self, cor, valor, horario_entrada=None, usuario_id=None):
+        """Registra a aposta (cor como código da API) como pendente e retorna (id_aposta, futuro com o resultado)."""
+        horario_entrada = horario_entrada or agora_ms()
+        id_aposta = await obter_escritor().executar(consultas.INSERIR_APOSTA,
+                                                    (horario_entrada, valor, "pendente", usuario_id))
+        futuro = asyncio.get_running_loop().create_future()
+        aposta = ApostaPendente(id_aposta, horario_entrada, cor, valor, futuro)
+        heapq.heappush(self._heap, (horario_entrada, next(self._sequencia), aposta))
+        return id_aposta, futuro
+
+    async def _executar(self):
+        await self.liquidar()
+        while True:
+            try:
+                await asyncio.wait_for(self._evento.wait(), timeout=self.intervalo)
+            except asyncio.TimeoutError:
+                pass
+            self._evento.clear()
+            try:
+                await self.liquidar()
+            except Exception as e:
+                logging.error(f"Erro ao liquidar apostas: {e}")
+
+    async def liquidar(self):
+        """Busca as rodadas novas e liquida em lote as apostas resolvidas por elas."""
+        rodadas, maximo = await asyncio.to_thread(_buscar_rodadas, self._ultimo_created_at)
+        if self._ultimo_created_at is None:
+            # Primeira execução: só rodadas posteriores a este ponto liquidam apostas
+            self._ultimo_created_at = maximo or 0
+            return 0
+        if not rodadas or not self._heap:
+            if rodadas:
+                self._ultimo_created_at = rodadas[-1][3]
+            return 0
+
+        liquidadas = []
+        for _, numero, cor, created_at in rodadas:
+            while self._heap and self._heap[0][0] <= created_at:
+                _, _, aposta = heapq.heappop(self._heap)
+                resultado = "win" if aposta.cor == cor else "loss"
+                liquidadas.append((aposta, resultado, (numero, cor, created_at)))
+        self._ultimo_created_at = rodadas[-1][3]
+
+        if liquidadas:
+            await obter_escritor().executar(consultas.ATUALIZAR_RESULTADO_APOSTA,
+                                            [(r, a.id_aposta) for a, r, _ in liquidadas], muitos=True)
+            for aposta, resultado, rodada in liquidadas:
+                if not aposta.futuro.done():
+                    aposta.futuro.set_result((resultado, rodada))
+            logging.info(f"{len(liquidadas)} aposta(s) liquidada(s) com a rodada de {rodadas[-1][3]}.")
+        return len(liquidadas)
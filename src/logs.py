@@ -0,0 +1,230 @@
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+from datetime import datetime
+
+# Arquivo de log em JSON lines, gravado por uma thread própria (o event loop só enfileira o registro)
+CAMINHO_LOGS = os.path.join(os.path.dirname(__file__), 'dist', 'data', 'logs.txt')
+NIVEL_LOGS = os.getenv("BLAZE_LOG_NIVEL", "INFO")
+
+# Rotação por tamanho ("tamanho") ou à meia-noite ("tempo"), mantendo BACKUPS arquivos antigos
+ROTACAO = os.getenv("BLAZE_LOG_ROTACAO", "tamanho")
+TAMANHO_MAXIMO = int(os.getenv("BLAZE_LOG_MAX_MB", "10")) * 1024 * 1024
+BACKUPS = 5
+TAMANHO_FILA = 50_000
+TAMANHO_LOTE = 5_000
+# A thread espera este tempo depois do primeiro registro para gravar o lote de uma vez, fora das
+# rajadas do fan-out (formatar disputa o GIL com o event loop)
+INTERVALO_ESCRITA = 0.1
+
+# Eventos de alto volume (um por sessão a cada rodada): só 1 a cada N registros abaixo de WARNING
+# vai para o arquivo. Chave "módulo" ou "módulo.função"; BLAZE_LOG_AMOSTRAGEM="modulo.funcao=N,..."
+AMOSTRAGEM_PADRAO = {
+    "telegram_bot.registrar_aposta_e_verificar_resultado": 20,
+    "telegram_bot.enviar_sinal_para": 20,
+    "despachante": 50,
+}
+
+# O httpx registra cada requisição à Bot API (uma por mensagem enviada) em INFO
+NIVEIS_BIBLIOTECAS = {"httpx": logging.WARNING}
+
+# Atributos que todo LogRecord tem; o resto veio de `extra=` e entra como campo do JSON
+_ATRIBUTOS_PADRAO = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+def _ler_amostragem(texto):
+    taxas = {}
+    for item in filter(None, (parte.strip() for parte in texto.split(","))):
+        chave, _, taxa = item.partition("=")
+        try:
+            taxas[chave.strip()] = max(1, int(taxa))
+        except ValueError:
+            pass
+    return taxas
+
+
+class FormatadorJson(logging.Formatter):
+    """Um objeto JSON por linha: horário, nível, módulo, função, mensagem e os campos de `extra=`."""
+
+    def format(self, record):
+        campos = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "modulo": record.module,
+            "funcao": record.funcName,
+            "mensagem": record.getMessage(),
+        }
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_PADRAO:
+                campos[chave] = valor
+        if record.exc_info:
+            campos["excecao"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            campos["excecao"] = record.exc_text
+        return json.dumps(campos, ensure_ascii=False, default=_como_texto)
+
+
+def _como_texto(valor):
+    # Campos de `extra=` são formatados depois, na thread de escrita: um weakref.proxy
+    # (ex.: a conexão do websockets) pode já ter sido coletado
+    try:
+        return str(valor)
+    except Exception:
+        return f"<{type(valor).__name__}>"
+
+
+class FiltroAmostragem(logging.Filter):
+    """Deixa passar 1 a cada N registros de INFO/DEBUG das origens configuradas.
+
+    Avisos e erros passam sempre. O registro que passa leva o campo
+    `amostragem` com N, para quem lê o log poder reescalar as contagens.
+    """
+
+    def __init__(self, taxas):
+        super().__init__()
+        self.taxas = dict(taxas)
+        self._contagens = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.taxas:
+            return True
+        chave = f"{record.module}.{record.funcName}"
+        taxa = self.taxas.get(chave)
+        if taxa is None:
+            chave = record.module
+            taxa = self.taxas.get(chave)
+            if taxa is None:
+                return True
+        with self._lock:
+            contagem = self._contagens.get(chave, 0)
+            self._contagens[chave] = contagem + 1
+        if contagem % taxa:
+            return False
+        record.amostragem = taxa
+        return True
+
+
+class _HandlerFila(logging.handlers.QueueHandler):
+    """QueueHandler que descarta (em vez de bloquear o event loop) quando a fila enche."""
+
+    descartados = 0
+
+    def prepare(self, record):
+        # Só este handler recebe o registro: dispensa a cópia e a formatação do QueueHandler,
+        # resolvendo apenas a mensagem (os argumentos podem mudar depois do enfileiramento)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+class _EscritorLogs(threading.Thread):
+    """Thread que esvazia a fila em lotes: formata, grava, dá um flush por lote e faz a rotação."""
+
+    def __init__(self, fila, arquivo):
+        super().__init__(name="logs", daemon=True)
+        self.fila = fila
+        self.arquivo = arquivo
+
+    def run(self):
+        while True:
+            registros = [self.fila.get()]
+            if registros[0] is not None:
+                time.sleep(INTERVALO_ESCRITA)
+            while len(registros) < TAMANHO_LOTE:
+                try:
+                    registros.append(self.fila.get_nowait())
+                except queue.Empty:
+                    break
+            fim = None in registros
+            registros = [registro for registro in registros if registro is not None]
+            if registros:
+                self._gravar(registros)
+            if fim:
+                return
+
+    def _gravar(self, registros):
+        arquivo = self.arquivo
+        try:
+            linhas = [arquivo.format(registro) for registro in registros]
+            arquivo.stream.write("\n".join(linhas) + "\n")
+            arquivo.stream.flush()
+            if arquivo.shouldRollover(registros[-1]):
+                arquivo.doRollover()
+        except Exception:
+            arquivo.handleError(registros[-1])
+
+
+_escritor = None
+_handler = None
+
+
+def _criar_arquivo(caminho, rotacao):
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    if rotacao == "tempo":
+        return logging.handlers.TimedRotatingFileHandler(caminho, when="midnight", backupCount=BACKUPS,
+                                                         encoding="utf-8")
+    return logging.handlers.RotatingFileHandler(caminho, maxBytes=TAMANHO_MAXIMO, backupCount=BACKUPS,
+                                                encoding="utf-8")
+
+
+def configurar_logs(caminho=CAMINHO_LOGS, nivel=NIVEL_LOGS, rotacao=ROTACAO, amostragem=None):
+    """Liga o log do processo: fila no logger raiz e uma thread que grava o arquivo com rotação.
+
+    Idempotente: chamadas seguintes não fazem nada enquanto o log estiver ligado.
+    Retorna o handler da fila (com o contador `descartados`).
+    """
+    global _escritor, _handler
+    if _escritor is not None:
+        return _handler
+
+    if amostragem is None:
+        amostragem = {**AMOSTRAGEM_PADRAO, **_ler_amostragem(os.getenv("BLAZE_LOG_AMOSTRAGEM", ""))}
+
+    arquivo = _criar_arquivo(caminho, rotacao)
+    arquivo.setFormatter(FormatadorJson())
+
+    fila = queue.Queue(maxsize=TAMANHO_FILA)
+    _handler = _HandlerFila(fila)
+    _handler.addFilter(FiltroAmostragem(amostragem))
+    raiz = logging.getLogger()
+    raiz.setLevel(nivel)
+    raiz.addHandler(_handler)
+    for nome, nivel_biblioteca in NIVEIS_BIBLIOTECAS.items():
+        logging.getLogger(nome).setLevel(nivel_biblioteca)
+
+    _escritor = _EscritorLogs(fila, arquivo)
+    _escritor.start()
+    atexit.register(encerrar_logs)
+    return _handler
+
+
+def descartados():
+    """Registros perdidos porque a fila estava cheia."""
+    return _handler.descartados if _handler is not None else 0
+
+
+def encerrar_logs():
+    """Grava o que ainda está na fila, para a thread e remove o handler do logger raiz."""
+    global _escritor, _handler
+    if _escritor is None:
+        return
+    logging.getLogger().removeHandler(_handler)
+    _handler.queue.put(None)
+    _escritor.join()
+    _escritor.arquivo.close()
+    _escritor = _handler = None
@@ -0,0 +1,243 @@
+import os
+import time
+import bisect
+import asyncio
+import logging
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager
+
+# Servidor local das métricas (formato texto do Prometheus em /metrics); porta 0 desliga
+PORTA_METRICAS = int(os.getenv("BLAZE_METRICAS_PORTA", "9108"))
+HOST_METRICAS = os.getenv("BLAZE_METRICAS_HOST", "127.0.0.1")
+
+# Limites dos baldes dos histogramas, em segundos (de 1 ms a 1 min)
+LIMITES_PADRAO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Amostras guardadas por histograma para os percentis (os benchmarks de carga aumentam)
+AMOSTRAS_RECENTES = int(os.getenv("BLAZE_METRICAS_AMOSTRAS", "1000"))
+
+# Métricas de cada etapa do pipeline: nome -> (tipo, descrição)
+DEFINICOES = {
+    "blaze_api_consulta_segundos": ("histogram", "Latência das consultas à API de rodadas recentes"),
+    "blaze_api_erros_total": ("counter", "Consultas à API que falharam"),
+    "blaze_rodada_gravacao_segundos": ("histogram", "Tempo do created_at da rodada até a gravação no banco"),
+    "blaze_rodadas_gravadas_total": ("counter", "Rodadas novas gravadas no banco"),
+    "blaze_rodadas_perdidas_total": ("counter", "Rodadas que faltaram na sequência gravada (lacunas maiores que a cadência)"),
+    "blaze_analise_segundos": ("histogram", "Tempo do analisador para gerar o sinal"),
+    "blaze_sinal_entrega_segundos": ("histogram", "Tempo do sinal gerado até a mensagem entregue ao Telegram"),
+    "blaze_rodada_sinal_segundos": ("histogram", "Tempo do created_at da rodada até o sinal gerado por ela entregue ao Telegram"),
+    "blaze_rodada_liquidacao_segundos": ("histogram", "Tempo do created_at da rodada até o resultado da aposta liquidada por ela entregue ao Telegram"),
+    "blaze_banco_segundos": ("histogram", "Tempo de cada função de acesso ao banco"),
+    "blaze_escrita_lote_segundos": ("histogram", "Tempo de cada transação do escritor em lote"),
+    "blaze_risco_segundos": ("histogram", "Tempo de cada consulta ao motor de risco (com ou sem cache)"),
+    "blaze_estrategias_segundos": ("histogram", "Tempo para avaliar todas as estratégias em modo sombra a cada rodada"),
+    "blaze_escritas_total": ("counter", "Escritas gravadas pelo escritor em lote"),
+    "blaze_feed_rodadas_total": ("counter", "Rodadas novas gravadas por jogo (supervisor de jogos)"),
+    "blaze_feed_atraso_segundos": ("histogram", "Tempo do created_at de cada rodada até a gravação, por jogo"),
+    "blaze_feed_gravacao_segundos": ("histogram", "Tempo de gravação de cada página de rodadas novas, por jogo"),
+    "blaze_pipeline_falhas_total": ("counter", "Falhas de uma etapa do pipeline que foram registradas e contornadas, por etapa"),
+}
+
+
+class Histograma:
+    """Baldes cumulativos (para o Prometheus) e as últimas amostras (para os percentis do /metrics)."""
+
+    __slots__ = ("limites", "baldes", "soma", "contagem", "recentes")
+
+    def __init__(self, limites=LIMITES_PADRAO):
+        self.limites = limites
+        self.baldes = [0] * (len(limites) + 1)
+        self.soma = 0.0
+        self.contagem = 0
+        self.recentes = deque(maxlen=AMOSTRAS_RECENTES)
+
+    def observar(self, valor):
+        self.baldes[bisect.bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.contagem += 1
+        self.recentes.append(valor)
+
+    def percentil(self, p):
+        amostras = sorted(self.recentes)
+        return amostras[min(len(amostras) - 1, int(len(amostras) * p))] if amostras else 0.0
+
+
+def _formatar_rotulos(rotulos, extra=()):
+    pares = list(rotulos) + list(extra)
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{chave}="{valor}"' for chave, valor in pares) + "}"
+
+
+class RegistroMetricas:
+    """Contadores e histogramas do processo, com rótulos opcionais.
+
+    Pode ser usado de qualquer thread (as funções de banco rodam no executor).
+    Valores instantâneos (filas, pool de conexões, despachante) entram por
+    funções registradas com `medir`, chamadas só na hora da leitura.
+    """
+
+    def __init__(self, definicoes=DEFINICOES):
+        self.definicoes = dict(definicoes)
+        self._lock = threading.Lock()
+        self._contadores = {}
+        self._histogramas = {}
+        self._medidores = []
+
+    def incrementar(self, nome, valor=1, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def observar(self, nome, valor, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                histograma = self._histogramas[chave] = Histograma()
+            histograma.observar(valor)
+
+    @contextmanager
+    def cronometrar(self, nome, **rotulos):
+        """Observa no histograma `nome` a duração do bloco, em segundos."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nome, time.perf_counter() - inicio, **rotulos)
+
+    def medir(self, funcao):
+        """Registra uma função que devolve {nome: valor} com medidas instantâneas."""
+        if funcao not in self._medidores:
+            self._medidores.append(funcao)
+        return funcao
+
+    def remover_medidor(self, funcao):
+        if funcao in self._medidores:
+            self._medidores.remove(funcao)
+
+    def _medidas(self):
+        medidas = {}
+        for funcao in list(self._medidores):
+            try:
+                medidas.update(funcao())
+            except Exception as e:
+                logging.error(f"Erro ao ler medidas de {funcao}: {e}")
+        return medidas
+
+    def texto_prometheus(self):
+        """Todas as métricas no formato texto de exposição do Prometheus."""
+        linhas = []
+        with self._lock:
+            contadores = sorted(self._contadores.items())
+            histogramas = sorted(self._histogramas.items())
+
+        descritas = set()
+
+        def cabecalho(nome, tipo):
+            if nome not in descritas:
+                descritas.add(nome)
+                descricao = self.definicoes.get(nome, (tipo, nome))[1]
+                linhas.append(f"# HELP {nome} {descricao}")
+                linhas.append(f"# TYPE {nome} {tipo}")
+
+        for (nome, rotulos), valor in contadores:
+            cabecalho(nome, "counter")
+            linhas.append(f"{nome}{_formatar_rotulos(rotulos)} {valor}")
+        for (nome, rotulos), histograma in histogramas:
+            cabecalho(nome, "histogram")
+            acumulado = 0
+            for limite, quantidade in zip(histograma.limites + ("+Inf",), histograma.baldes):
+                acumulado += quantidade
+                linhas.append(f"{nome}_bucket{_formatar_rotulos(rotulos, [('le', limite)])} {acumulado}")
+            linhas.append(f"{nome}_sum{_formatar_rotulos(rotulos)} {histograma.soma}")
+            linhas.append(f"{nome}_count{_formatar_rotulos(rotulos)} {histograma.contagem}")
+        for nome, valor in sorted(self._medidas().items()):
+            cabecalho(nome, "gauge")
+            linhas.append(f"{nome} {valor}")
+        return "\n".join(linhas) + "\n"
+
+    def resumo(self):
+        """Resumo legível: contadores, p50/p95 dos histogramas e medidas instantâneas."""
+        with self._lock:
+            contadores = {nome + _formatar_rotulos(rotulos): valor
+                          for (nome, rotulos), valor in sorted(self._contadores.items())}
+            histogramas = {
+                nome + _formatar_rotulos(rotulos): {
+                    "contagem": h.contagem,
+                    "p50_ms": round(h.percentil(0.5) * 1000, 2),
+                    "p95_ms": round(h.percentil(0.95) * 1000, 2),
+                    "p99_ms": round(h.percentil(0.99) * 1000, 2),
+                }
+                for (nome, rotulos), h in sorted(self._histogramas.items())
+            }
+        return {"contadores": contadores, "histogramas": histogramas, "medidas": self._medidas()}
+
+    def limpar(self):
+        with self._lock:
+            self._contadores.clear()
+            self._histogramas.clear()
+
+
+# Registro compartilhado do processo
+metricas = RegistroMetricas()
+
+
+def cronometrado(nome="blaze_banco_segundos"):
+    """Decorador que observa a duração de cada chamada em `nome`, com o rótulo funcao=<nome da função>."""
+    def decorar(funcao):
+        rotulo = funcao.__name__
+        if asyncio.iscoroutinefunction(funcao):
+            @functools.wraps(funcao)
+            async def envolvida_async(*args, **kwargs):
+                with metricas.cronometrar(nome, funcao=rotulo):
+                    return await funcao(*args, **kwargs)
+            return envolvida_async
+
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with metricas.cronometrar(nome, funcao=rotulo):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorar
+
+
+async def iniciar_servidor(porta=PORTA_METRICAS, host=HOST_METRICAS, perfilador=None):
+    """Sobe o endpoint HTTP local: GET /metrics e, com o perfilador habilitado, GET /perfil?segundos=N.
+
+    Retorna o AppRunner (encerrar com `await runner.cleanup()`), ou None com a porta 0.
+    """
+    if not porta:
+        return None
+    from aiohttp import web
+
+    async def exibir_metricas(_):
+        return web.Response(text=metricas.texto_prometheus(), content_type="text/plain", charset="utf-8")
+
+    async def perfilar(requisicao):
+        if perfilador is None or not perfilador.habilitado:
+            return web.Response(status=404, text="Perfilador desabilitado (use --perfil ou BLAZE_PERFIL=1).\n")
+        from src.perfilador import SEGUNDOS_MAXIMO
+
+        try:
+            segundos = float(requisicao.query.get("segundos", perfilador.segundos_padrao))
+        except ValueError:
+            return web.Response(status=400, text="segundos inválido\n")
+        # inf prenderia a captura para sempre; nan e negativos não fazem sentido
+        if not 0 < segundos <= SEGUNDOS_MAXIMO:
+            return web.Response(status=400, text=f"segundos deve estar entre 0 e {SEGUNDOS_MAXIMO}\n")
+        caminho, mais_quentes = await perfilador.perfilar(segundos)
+        if caminho is None:
+            return web.Response(status=409, text="Já existe uma captura em andamento.\n")
+        corpo = "\n".join(f"{amostras:6d}  {funcao}" for funcao, amostras in mais_quentes)
+        return web.Response(text=f"Perfil salvo em {caminho}\n\n{corpo}\n")
+
+    aplicacao = web.Application()
+    aplicacao.router.add_get("/metrics", exibir_metricas)
+    aplicacao.router.add_get("/perfil", perfilar)
+    runner = web.AppRunner(aplicacao, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, porta).start()
+    logging.info(f"Métricas em http://{host}:{porta}/metrics")
+    return runner
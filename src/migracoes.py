@@ -0,0 +1,372 @@
+import sys
+import logging
+import threading
+
+from src.banco import AGORA_MS_SQL, conexao, dia_local_sql, hora_sql
+from src.consultas import CONSULTAS_QUENTES
+from src.agregados import reconstruir_agregados
+from src.usuarios import e_hash, gerar_hash
+
+# A versão do schema fica em PRAGMA user_version; cada migração roda uma única vez, em ordem.
+_lock = threading.Lock()
+_versao_aplicada = None
+
+
+def _v1_tabelas_iniciais(conn):
+    """Tabelas originais do coletor e do bot (texto nas datas)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS resultados (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            numero INTEGER,
+            cor TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            created_at TEXT UNIQUE
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS apostas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data TEXT,
+            valor REAL,
+            resultado TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            senha TEXT NOT NULL,
+            banca REAL NOT NULL,
+            data_criacao DATETIME DEFAULT CURRENT_TIMESTAMP,
+            data_ultima_edicao DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def _v2_timestamps_em_ms_e_indices(conn):
+    """Datas como epoch ms (INTEGER) e índices cobrindo as consultas quentes."""
+    # resultados.created_at vinha em UTC ("YYYY-MM-DD HH:MM:SS"); timestamp era CURRENT_TIMESTAMP (UTC)
+    conn.execute(f"""
+        CREATE TABLE resultados_v2 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            numero INTEGER,
+            cor TEXT,
+            timestamp INTEGER DEFAULT {AGORA_MS_SQL},
+            created_at INTEGER
+        )
+    """)
+    conn.execute("""
+        INSERT INTO resultados_v2 (id, numero, cor, timestamp, created_at)
+        SELECT id, numero, cor,
+               CAST(strftime('%s', timestamp) AS INTEGER) * 1000,
+               CAST(strftime('%s', created_at) AS INTEGER) * 1000
+        FROM resultados
+    """)
+    conn.execute("DROP TABLE resultados")
+    conn.execute("ALTER TABLE resultados_v2 RENAME TO resultados")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_resultados_created_at_unico ON resultados(created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_resultados_created_at ON resultados(created_at, cor, numero)")
+
+    # apostas.data era o horário local ("YYYY-MM-DD HH:MM:SS") da entrada
+    conn.execute("""
+        CREATE TABLE apostas_v2 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data INTEGER,
+            valor REAL,
+            resultado TEXT
+        )
+    """)
+    conn.execute("""
+        INSERT INTO apostas_v2 (id, data, valor, resultado)
+        SELECT id, CAST(strftime('%s', data, 'utc') AS INTEGER) * 1000, valor, resultado
+        FROM apostas
+    """)
+    conn.execute("DROP TABLE apostas")
+    conn.execute("ALTER TABLE apostas_v2 RENAME TO apostas")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_apostas_data ON apostas(data, resultado, valor)")
+
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_usuarios_nome ON usuarios(nome, senha)")
+
+
+def _criar_triggers_das_rodadas(conn):
+    """Rodadas: +1 na hora e no dia da rodada inserida, -1 na removida."""
+    for periodo, tabela, chave in (("hora", "resultados_por_hora", hora_sql),
+                                   ("dia", "resultados_por_dia", dia_local_sql)):
+        conn.execute(f"""
+            CREATE TRIGGER trg_{tabela}_insercao AFTER INSERT ON resultados
+            WHEN NEW.created_at IS NOT NULL AND NEW.cor IS NOT NULL
+            BEGIN
+                INSERT INTO {tabela} ({periodo}, cor, quantidade) VALUES ({chave("NEW.created_at")}, NEW.cor, 1)
+                ON CONFLICT ({periodo}, cor) DO UPDATE SET quantidade = quantidade + 1;
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER trg_{tabela}_remocao AFTER DELETE ON resultados
+            WHEN OLD.created_at IS NOT NULL AND OLD.cor IS NOT NULL
+            BEGIN
+                UPDATE {tabela} SET quantidade = quantidade - 1
+                WHERE {periodo} = {chave("OLD.created_at")} AND cor = OLD.cor;
+            END
+        """)
+
+
+def _v3_agregados(conn):
+    """Tabelas agregadas (rodadas por hora/dia e cor, apostas por usuário e dia) mantidas por triggers."""
+    conn.execute("ALTER TABLE apostas ADD COLUMN usuario_id INTEGER")
+
+    conn.execute("""
+        CREATE TABLE resultados_por_hora (
+            hora INTEGER NOT NULL,
+            cor TEXT NOT NULL,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (hora, cor)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE resultados_por_dia (
+            dia INTEGER NOT NULL,
+            cor TEXT NOT NULL,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, cor)
+        ) WITHOUT ROWID
+    """)
+    # usuario_id 0 agrupa as apostas sem usuário (anteriores a esta versão)
+    conn.execute("""
+        CREATE TABLE apostas_por_usuario_dia (
+            dia INTEGER NOT NULL,
+            usuario_id INTEGER NOT NULL,
+            apostas INTEGER NOT NULL DEFAULT 0,
+            vitorias INTEGER NOT NULL DEFAULT 0,
+            derrotas INTEGER NOT NULL DEFAULT 0,
+            pendentes INTEGER NOT NULL DEFAULT 0,
+            valor_apostado REAL NOT NULL DEFAULT 0,
+            saldo REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, usuario_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX idx_apostas_por_usuario_dia ON apostas_por_usuario_dia(usuario_id, dia)")
+    # Os resumos de apostas saem de apostas_por_usuario_dia: o índice da v2 só pesaria nas gravações
+    conn.execute("DROP INDEX IF EXISTS idx_apostas_data")
+
+    _criar_triggers_das_rodadas(conn)
+
+    # Apostas: a contribuição da linha antiga sai e a da nova entra (inserção, liquidação ou remoção)
+    def somar(linha, sinal):
+        valor = f"COALESCE({linha}.valor, 0)"
+        return f"""
+            INSERT INTO apostas_por_usuario_dia
+                (dia, usuario_id, apostas, vitorias, derrotas, pendentes, valor_apostado, saldo)
+            VALUES (
+                {dia_local_sql(f"{linha}.data")}, COALESCE({linha}.usuario_id, 0),
+                {sinal}1,
+                {sinal}({linha}.resultado IS 'win'),
+                {sinal}({linha}.resultado IS 'loss'),
+                {sinal}({linha}.resultado IS 'pendente'),
+                {sinal}{valor},
+                {sinal}(CASE {linha}.resultado WHEN 'win' THEN {valor} WHEN 'loss' THEN -{valor} ELSE 0 END)
+            )
+            ON CONFLICT (dia, usuario_id) DO UPDATE SET
+                apostas = apostas + excluded.apostas,
+                vitorias = vitorias + excluded.vitorias,
+                derrotas = derrotas + excluded.derrotas,
+                pendentes = pendentes + excluded.pendentes,
+                valor_apostado = valor_apostado + excluded.valor_apostado,
+                saldo = saldo + excluded.saldo;
+        """
+
+    conn.execute(f"""
+        CREATE TRIGGER trg_apostas_por_usuario_dia_insercao AFTER INSERT ON apostas
+        WHEN NEW.data IS NOT NULL
+        BEGIN {somar("NEW", "+")} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_apostas_por_usuario_dia_atualizacao
+        AFTER UPDATE OF data, valor, resultado, usuario_id ON apostas
+        WHEN OLD.data IS NOT NULL AND NEW.data IS NOT NULL
+        BEGIN
+            {somar("OLD", "-")}
+            {somar("NEW", "+")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_apostas_por_usuario_dia_remocao AFTER DELETE ON apostas
+        WHEN OLD.data IS NOT NULL
+        BEGIN {somar("OLD", "-")} END
+    """)
+
+    # Preenche os agregados com o que já está no banco
+    reconstruir_agregados(conn)
+
+
+# Nome gravado até a versão 3 -> código da API (nomes desconhecidos viram NULL)
+_CODIGO_DA_COR_SQL = """
+    CASE lower(trim({coluna}))
+        WHEN 'branco' THEN 0 WHEN 'white' THEN 0 WHEN '0' THEN 0
+        WHEN 'vermelho' THEN 1 WHEN 'red' THEN 1 WHEN '1' THEN 1
+        WHEN 'preto' THEN 2 WHEN 'black' THEN 2 WHEN '2' THEN 2
+    END
+"""
+
+
+def _v4_cores_como_codigo(conn):
+    """Cores como o código inteiro da API (0 branco, 1 vermelho, 2 preto) em vez do nome."""
+    # resultados: nova tabela com cor INTEGER (a remoção da antiga leva os triggers junto)
+    conn.execute(f"""
+        CREATE TABLE resultados_v4 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            numero INTEGER,
+            cor INTEGER,
+            timestamp INTEGER DEFAULT {AGORA_MS_SQL},
+            created_at INTEGER
+        )
+    """)
+    conn.execute(f"""
+        INSERT INTO resultados_v4 (id, numero, cor, timestamp, created_at)
+        SELECT id, CASE WHEN typeof(numero) = 'integer' THEN numero END,
+               {_CODIGO_DA_COR_SQL.format(coluna="cor")}, timestamp, created_at
+        FROM resultados
+    """)
+    conn.execute("DROP TABLE resultados")
+    conn.execute("ALTER TABLE resultados_v4 RENAME TO resultados")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_resultados_created_at_unico ON resultados(created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_resultados_created_at ON resultados(created_at, cor, numero)")
+
+    # Agregados das rodadas: convertidos linha a linha (podem cobrir períodos já arquivados)
+    for periodo, tabela in (("hora", "resultados_por_hora"), ("dia", "resultados_por_dia")):
+        conn.execute(f"""
+            CREATE TABLE {tabela}_v4 (
+                {periodo} INTEGER NOT NULL,
+                cor INTEGER NOT NULL,
+                quantidade INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY ({periodo}, cor)
+            ) WITHOUT ROWID
+        """)
+        conn.execute(f"""
+            INSERT INTO {tabela}_v4 ({periodo}, cor, quantidade)
+            SELECT {periodo}, codigo, SUM(quantidade)
+            FROM (SELECT {periodo}, {_CODIGO_DA_COR_SQL.format(coluna="cor")} AS codigo, quantidade FROM {tabela})
+            WHERE codigo IS NOT NULL
+            GROUP BY {periodo}, codigo
+        """)
+        conn.execute(f"DROP TABLE {tabela}")
+        conn.execute(f"ALTER TABLE {tabela}_v4 RENAME TO {tabela}")
+
+    _criar_triggers_das_rodadas(conn)
+
+
+def _v5_resultados_crash(conn):
+    """Rodadas do Crash, gravadas pelo supervisor de jogos (src/jogos.py)."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS resultados_crash (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ponto REAL,
+            timestamp INTEGER DEFAULT {AGORA_MS_SQL},
+            created_at INTEGER
+        )
+    """)
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_resultados_crash_created_at ON resultados_crash(created_at)")
+
+
+def _v6_usuarios_unicos_e_senhas_com_hash(conn):
+    """Nome de usuário único (índice) e senhas guardadas como hash PBKDF2 com sal."""
+    # Nada impedia nomes repetidos: o primeiro cadastro fica com o nome e os outros ganham "#id"
+    renomeados = conn.execute("""
+        UPDATE usuarios SET nome = nome || '#' || id
+        WHERE id NOT IN (SELECT MIN(id) FROM usuarios GROUP BY nome)
+    """).rowcount
+    if renomeados:
+        logging.warning(f"{renomeados} usuário(s) com nome repetido renomeado(s) para nome#id")
+    conn.execute("DROP INDEX IF EXISTS idx_usuarios_nome")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_usuarios_nome_unico ON usuarios(nome)")
+
+    usuarios = conn.execute("SELECT id, senha FROM usuarios").fetchall()
+    conn.executemany("UPDATE usuarios SET senha = ? WHERE id = ?",
+                     [(gerar_hash(senha), usuario_id) for usuario_id, senha in usuarios if not e_hash(senha)])
+
+
+def _v7_cores_por_dia(conn):
+    """Índice (cor, quantidade) nos agregados diários: a distribuição histórica (/risco) sai dele, já agrupada."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_resultados_por_dia_cor ON resultados_por_dia(cor, quantidade)")
+
+
+def _v8_sem_indice_de_apostas_por_data(conn):
+    """Remove idx_apostas_data dos bancos que passaram da v3 antes dela removê-lo.
+
+    Nenhuma consulta lê `apostas` por data (os resumos vêm dos agregados); o índice só
+    custava uma escrita a mais em cada INSERIR_APOSTA e ATUALIZAR_RESULTADO_APOSTA.
+    """
+    conn.execute("DROP INDEX IF EXISTS idx_apostas_data")
+
+
+# Lista ordenada de (versão, migração). Novas migrações entram sempre no final.
+MIGRACOES = [
+    (1, _v1_tabelas_iniciais),
+    (2, _v2_timestamps_em_ms_e_indices),
+    (3, _v3_agregados),
+    (4, _v4_cores_como_codigo),
+    (5, _v5_resultados_crash),
+    (6, _v6_usuarios_unicos_e_senhas_com_hash),
+    (7, _v7_cores_por_dia),
+    (8, _v8_sem_indice_de_apostas_por_data),
+]
+
+
+def versao_atual(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def aplicar_migracoes():
+    """Aplica as migrações pendentes, cada uma em sua própria transação. Retorna a versão final."""
+    global _versao_aplicada
+    with _lock:
+        with conexao() as conn:
+            versao = versao_atual(conn)
+        if _versao_aplicada == versao == MIGRACOES[-1][0]:
+            return versao
+
+        for numero, migracao in MIGRACOES:
+            if numero <= versao:
+                continue
+            with conexao() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                # Outro processo pode ter migrado enquanto esperávamos o lock de escrita
+                if versao_atual(conn) >= numero:
+                    continue
+                migracao(conn)
+                conn.execute(f"PRAGMA user_version = {numero}")
+            logging.info(f"Migração do banco aplicada: versão {numero} ({migracao.__name__})")
+            versao = numero
+
+        _versao_aplicada = versao
+        return versao
+
+
+def verificar_planos(consultas=CONSULTAS_QUENTES):
+    """Roda EXPLAIN QUERY PLAN nas consultas quentes e retorna as que varrem alguma tabela.
+
+    Só "SCAN ... USING COVERING INDEX" é aceito: é o percurso do índice já
+    na ordem do ORDER BY (ou do GROUP BY), sem ler a tabela. Qualquer outro
+    SCAN (tabela ou índice comum) e TEMP B-TREE é problema. Retorna uma
+    lista de (nome, detalhe do plano), vazia quando tudo usa índice.
+    """
+    aplicar_migracoes()
+    problemas = []
+    with conexao() as conn:
+        for nome, (sql, params) in consultas.items():
+            for linha in conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall():
+                detalhe = linha[-1]
+                if (detalhe.startswith("SCAN") and "USING COVERING INDEX" not in detalhe) or "TEMP B-TREE" in detalhe:
+                    problemas.append((nome, detalhe))
+    return problemas
+
+
+if __name__ == "__main__":
+    versao = aplicar_migracoes()
+    print(f"Schema na versão {versao}.")
+    if "--verificar" in sys.argv:
+        problemas = verificar_planos()
+        for nome, detalhe in problemas:
+            print(f"❌ {nome}: {detalhe}")
+        if problemas:
+            sys.exit(1)
+        print(f"✅ {len(CONSULTAS_QUENTES)} consultas quentes usam índice.")
@@ -0,0 +1,72 @@
+from enum import IntEnum
+from typing import NamedTuple
+
+# Códigos de cor da API da Blaze (campo "color"): são eles que circulam do coletor ao
+# analisador e ficam gravados no banco. Nomes só aparecem na formatação das mensagens.
+BRANCO = 0
+VERMELHO = 1
+PRETO = 2
+
+# Intervalo nominal entre duas rodadas do Double
+DURACAO_RODADA_MS = 30_000
+
+# Multiplicador pago pela cor acertada (aposta incluída)
+PAGAMENTO_COR = 2
+PAGAMENTO_BRANCO = 14
+
+
+class Cor(IntEnum):
+    BRANCO = BRANCO
+    VERMELHO = VERMELHO
+    PRETO = PRETO
+
+    @property
+    def nome(self):
+        return NOMES_CORES[self]
+
+
+CORES_VALIDAS = frozenset(Cor)
+NOMES_CORES = {BRANCO: "Branco", VERMELHO: "Vermelho", PRETO: "Preto"}
+
+# Nomes aceitos na entrada (dados antigos, argumentos de linha de comando e dos comandos do bot)
+CODIGOS_COR = {
+    "branco": BRANCO, "white": BRANCO, "b": BRANCO,
+    "vermelho": VERMELHO, "red": VERMELHO, "v": VERMELHO,
+    "preto": PRETO, "black": PRETO, "p": PRETO,
+}
+
+
+class Rodada(NamedTuple):
+    """Uma rodada do Double: número (0-14), código da cor e `created_at` em epoch ms.
+
+    Campos desconhecidos ficam como None. Por ser uma tupla, a rodada vai
+    direto para o executemany e pode ser desempacotada como (numero, cor, created_at).
+    """
+
+    numero: int | None
+    cor: int | None
+    created_at: int | None
+
+
+class RodadaCrash(NamedTuple):
+    """Uma rodada do Crash: multiplicador em que o jogo parou e `created_at` em epoch ms."""
+
+    ponto: float | None
+    created_at: int | None
+
+
+def nome_cor(cor):
+    """Nome da cor para exibição ("Vermelho"), ou "Desconhecida"."""
+    return NOMES_CORES.get(cor, "Desconhecida")
+
+
+def codigo_cor(cor):
+    """Converte um nome de cor (ou o próprio código) para o código da API. Retorna -1 se desconhecida.
+
+    Só para dados de entrada; no caminho das rodadas as cores já chegam como código.
+    """
+    if isinstance(cor, int):
+        return cor if cor in CORES_VALIDAS else -1
+    if cor is None:
+        return -1
+    return CODIGOS_COR.get(str(cor).strip().lower(), -1)
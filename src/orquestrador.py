@@ -0,0 +1,159 @@
+import time
+import sqlite3
+import asyncio
+import logging
+from collections import deque
+
+from src import telegram_bot
+from src.coletor import URL_RECENTES, salvar_resultados_em_lote
+from src.metricas import PORTA_METRICAS, iniciar_servidor, metricas
+from src.perfilador import PerfiladorAmostragem
+
+# Filas limitadas entre as etapas: uma etapa lenta segura as anteriores (backpressure)
+TAMANHO_FILA_RODADAS = 100
+TAMANHO_FILA_SINAIS = 1
+AMOSTRAS_LATENCIA = 1000
+# Espera antes de tentar gravar de novo um lote que falhou (dobra a cada falha seguida)
+ESPERA_MINIMA_FALHA = 0.5
+ESPERA_MAXIMA_FALHA = 30.0
+
+
+class Orquestrador:
+    """Coletor, banco, analisador, sinal e despachante em um único processo asyncio.
+
+    coletor -> [rodadas] -> armazenamento -> [gravadas] -> analisador -> [sinais] -> sinal -> despachante
+
+    Cada etapa é uma tarefa ligada à seguinte por uma asyncio.Queue limitada.
+    O armazenamento grava em lote tudo o que estiver na fila; o analisador só
+    olha a rodada mais recente disponível, já que o sinal é sempre para a
+    próxima rodada.
+    """
+
+    def __init__(self, fonte="stream", url_stream=None, url_api=URL_RECENTES,
+                 tamanho_fila=TAMANHO_FILA_RODADAS, porta_metricas=PORTA_METRICAS, perfil=None):
+        self.fonte = fonte
+        self.porta_metricas = porta_metricas
+        self.perfilador = PerfiladorAmostragem(habilitado=perfil)
+        self.url_stream = url_stream
+        self.url_api = url_api
+        self.rodadas = asyncio.Queue(maxsize=tamanho_fila)
+        self.gravadas = asyncio.Queue(maxsize=tamanho_fila)
+        self.sinais = asyncio.Queue(maxsize=TAMANHO_FILA_SINAIS)
+        # Latência de cada rodada: recebida do coletor -> início do envio do sinal
+        self.latencias = deque(maxlen=AMOSTRAS_LATENCIA)
+        self.rodadas_gravadas = 0
+        self.sinais_enviados = 0
+
+    def metricas(self):
+        latencias = sorted(self.latencias)
+        return {
+            "fila_rodadas": self.rodadas.qsize(),
+            "fila_gravadas": self.gravadas.qsize(),
+            "fila_sinais": self.sinais.qsize(),
+            "rodadas_gravadas": self.rodadas_gravadas,
+            "sinais_enviados": self.sinais_enviados,
+            "latencia_p50_ms": round(latencias[len(latencias) // 2] * 1000, 2) if latencias else 0.0,
+            "latencia_max_ms": round(latencias[-1] * 1000, 2) if latencias else 0.0,
+        }
+
+    def _medidas(self):
+        return {f"blaze_pipeline_{chave}": valor for chave, valor in self.metricas().items()}
+
+    async def _coletar(self):
+        # Só o cliente da fonte escolhida é importado (websockets ou aiohttp)
+        if self.fonte == "stream":
+            from src.coletor_stream import URL_STREAM, coletar_via_stream
+            await coletar_via_stream(self.url_stream or URL_STREAM, self.url_api, destino=self.rodadas)
+        else:
+            from src.coletor_http import coletar_via_http
+            await coletar_via_http(self.url_api, destino=self.rodadas)
+
+    async def _armazenar(self):
+        lote = []
+        falhas_seguidas = 0
+        while True:
+            if not lote:
+                lote = [await self.rodadas.get()]
+                recebida_em = time.perf_counter()
+            while not self.rodadas.empty():
+                lote.append(self.rodadas.get_nowait())
+
+            # Grava, atualiza o buffer e avisa a liquidação das apostas (ouvintes do coletor)
+            try:
+                inseridos = await asyncio.to_thread(salvar_resultados_em_lote, lote)
+            except sqlite3.Error as e:
+                # O lote fica para a próxima tentativa, junto com as rodadas que chegarem até lá
+                falhas_seguidas += 1
+                espera = min(ESPERA_MINIMA_FALHA * 2 ** falhas_seguidas, ESPERA_MAXIMA_FALHA)
+                metricas.incrementar("blaze_pipeline_falhas_total", etapa="armazenamento")
+                logging.error(f"Erro ao gravar {len(lote)} rodada(s): {e}; nova tentativa em {espera:.1f} s",
+                              extra={"etapa": "armazenamento", "rodadas": len(lote)})
+                await asyncio.sleep(espera)
+                continue
+            falhas_seguidas = 0
+            self.rodadas_gravadas += inseridos
+            if inseridos:
+                await self.gravadas.put((lote[-1], recebida_em))
+            lote = []
+
+    async def _analisar(self):
+        while True:
+            rodada, recebida_em = await self.gravadas.get()
+            while not self.gravadas.empty():
+                rodada, recebida_em = self.gravadas.get_nowait()
+
+            # Uma análise que falha perde só o sinal desta rodada
+            try:
+                cor, _ = await asyncio.to_thread(telegram_bot.gerar_sinal_aposta)
+            except Exception as e:
+                metricas.incrementar("blaze_pipeline_falhas_total", etapa="analisador")
+                logging.error(f"Erro ao analisar a rodada: {e}", extra={"etapa": "analisador"})
+                continue
+            if cor is not None:
+                await self.sinais.put((cor, recebida_em, rodada[2]))
+
+    async def _sinalizar(self):
+        while True:
+            cor, recebida_em, created_at = await self.sinais.get()
+            self.latencias.append(time.perf_counter() - recebida_em)
+            # enviar_sinal enfileira as mensagens no despachante e só retorna
+            # depois que as apostas do sinal forem liquidadas pela próxima rodada
+            if await telegram_bot.enviar_sinal(cor, created_at):
+                self.sinais_enviados += 1
+
+    async def executar(self):
+        """Roda todas as etapas até uma delas falhar (ou a tarefa ser cancelada)."""
+        async with telegram_bot.bot_em_execucao():
+            metricas.medir(self._medidas)
+            try:
+                servidor = await iniciar_servidor(self.porta_metricas, perfilador=self.perfilador)
+            except OSError as e:
+                logging.error(f"Não foi possível abrir o endpoint de métricas na porta {self.porta_metricas}: {e}")
+                servidor = None
+            if self.perfilador.instalar_sinal():
+                logging.info("Perfilador habilitado: GET /perfil?segundos=N ou kill -USR1 para capturar")
+            etapas = [
+                asyncio.create_task(self._coletar(), name="coletor"),
+                asyncio.create_task(self._armazenar(), name="armazenamento"),
+                asyncio.create_task(self._analisar(), name="analisador"),
+                asyncio.create_task(self._sinalizar(), name="sinal"),
+            ]
+            try:
+                # Uma etapa que termina (erro ou não) derruba o pipeline inteiro
+                feitas, _ = await asyncio.wait(etapas, return_when=asyncio.FIRST_COMPLETED)
+                for etapa in feitas:
+                    if etapa.exception() is not None:
+                        logging.error(f"Etapa {etapa.get_name()} falhou: {etapa.exception()}")
+                        raise etapa.exception()
+            finally:
+                for etapa in etapas:
+                    etapa.cancel()
+                await asyncio.gather(*etapas, return_exceptions=True)
+                metricas.remover_medidor(self._medidas)
+                if servidor is not None:
+                    await servidor.cleanup()
+                logging.info(f"Pipeline encerrado: {self.metricas()}")
+
+
+async def executar(fonte="stream", **opcoes):
+    await Orquestrador(fonte, **opcoes).executar()
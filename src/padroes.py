@@ -0,0 +1,188 @@
+import threading
+from collections import deque
+
+import numpy as np
+
+from src import consultas
+from src.analisador import Historico
+from src.banco import conexao
+from src.metricas import cronometrado
+from src.modelo import BRANCO, CORES_VALIDAS, DURACAO_RODADA_MS, PRETO, VERMELHO
+
+# Maior sequência de cores indexada (3^8 padrões x 3 próximas cores no maior nível)
+TAMANHO_MAXIMO_PADRAO = 8
+# Intervalo acima do qual duas rodadas não são consideradas consecutivas (rodadas perdidas)
+LACUNA_MAXIMA_MS = DURACAO_RODADA_MS * 3 // 2
+# Ocorrências mínimas de um padrão para ele valer como previsão
+MINIMO_AMOSTRAS = 30
+# Vantagem mínima da cor prevista sobre a outra (vermelho/preto) para gerar sinal
+VANTAGEM_MINIMA = 0.05
+
+
+class IndicePadroes:
+    """Tabela de k-mers: para cada sequência de 1 a N cores, quantas vezes saiu cada cor em seguida.
+
+    `contagens[k]` tem forma (3^k, 3): a linha é o código da sequência em
+    base 3 (da cor mais antiga para a mais nova, como em Features.ngrama) e
+    as colunas são branco, vermelho e preto. `contagens[0]` é a distribuição
+    geral. Cores desconhecidas e lacunas na sequência de rodadas quebram os
+    padrões, que nunca atravessam rodadas perdidas.
+
+    Cada rodada nova atualiza N+1 contadores em O(N); a consulta com as
+    últimas k cores é O(k).
+    """
+
+    def __init__(self, tamanho_maximo=TAMANHO_MAXIMO_PADRAO):
+        self.tamanho_maximo = tamanho_maximo
+        self.contagens = [np.zeros((3 ** k, 3), dtype=np.int64) for k in range(tamanho_maximo + 1)]
+        # Últimas cores consecutivas (da mais antiga para a mais nova), para continuar os padrões
+        self._janela = deque(maxlen=tamanho_maximo)
+        self.ultimo_created_at = None
+        self.rodadas = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def do_historico(cls, historico, tamanho_maximo=TAMANHO_MAXIMO_PADRAO):
+        """Constrói o índice a partir de um Historico com uma passada vetorizada por tamanho de padrão."""
+        indice = cls(tamanho_maximo)
+        cores = historico.cores
+        n = len(cores)
+        if n == 0:
+            return indice
+
+        # Rodadas consecutivas válidas terminando em cada posição (0 para cor desconhecida)
+        valida = (cores >= 0) & (cores <= 2)
+        quebra = ~valida
+        quebra[1:] |= np.diff(historico.created_at) > LACUNA_MAXIMA_MS
+        indices = np.arange(n)
+        # Uma lacuna começa uma nova sequência na própria rodada; uma cor desconhecida, na seguinte
+        inicio = np.maximum.accumulate(np.where(quebra, np.where(valida, indices, indices + 1), 0))
+        consecutivas = np.where(valida, indices - inicio + 1, 0)
+
+        cores_validas = np.clip(cores, 0, 2).astype(np.int64)
+        indice.contagens[0][0] = np.bincount(cores_validas[valida], minlength=3)
+        codigos = np.zeros(n, dtype=np.int64)
+        for k in range(1, tamanho_maximo + 1):
+            if n <= k:
+                break
+            # codigos[j]: sequência de k cores começando em j; a próxima cor está em j + k
+            codigos = codigos[:n - k + 1] * 3 + cores_validas[k - 1:]
+            proximas = cores_validas[k:]
+            usar = consecutivas[k:] >= k + 1
+            indice.contagens[k] = np.bincount(codigos[:-1][usar] * 3 + proximas[usar],
+                                              minlength=3 ** k * 3).reshape(-1, 3)
+
+        final = int(consecutivas[-1])
+        indice._janela.extend(int(c) for c in cores[n - min(final, tamanho_maximo):])
+        indice.ultimo_created_at = int(historico.created_at[-1])
+        indice.rodadas = n
+        return indice
+
+    def adicionar(self, cor, created_at=None):
+        """Conta a rodada como continuação de cada padrão formado pelas últimas cores.
+
+        Rodadas com `created_at` anterior à última indexada (backfill) são
+        ignoradas; elas entram na próxima reconstrução do índice.
+        """
+        with self._lock:
+            if created_at is not None:
+                if self.ultimo_created_at is not None:
+                    if created_at <= self.ultimo_created_at:
+                        return False
+                    if created_at - self.ultimo_created_at > LACUNA_MAXIMA_MS:
+                        self._janela.clear()
+                self.ultimo_created_at = created_at
+            self.rodadas += 1
+            if cor not in CORES_VALIDAS:
+                self._janela.clear()
+                return True
+
+            self.contagens[0][0, cor] += 1
+            codigo = 0
+            for k, anterior in enumerate(reversed(self._janela), start=1):
+                codigo += anterior * 3 ** (k - 1)
+                self.contagens[k][codigo, cor] += 1
+            self._janela.append(cor)
+            return True
+
+    def registrar(self, rodadas):
+        """Indexa rodadas (numero, cor, created_at) recém-gravadas, em ordem cronológica."""
+        for _, cor, created_at in rodadas:
+            self.adicionar(cor, created_at)
+
+    @cronometrado()
+    def sincronizar(self):
+        """Indexa as rodadas gravadas depois da última indexada (ex.: por um coletor em outro processo)."""
+        with conexao() as conn:
+            linhas = conn.execute(consultas.HISTORICO_APOS, (self.ultimo_created_at or 0,)).fetchall()
+        for _, cor, created_at in linhas:
+            self.adicionar(cor, created_at)
+        return len(linhas)
+
+    def distribuicao(self, cores):
+        """Contagem (branco, vermelho, preto) da cor seguinte às últimas cores informadas.
+
+        `cores` vai da mais antiga para a mais nova; só as últimas N são usadas.
+        """
+        cores = list(cores)[-self.tamanho_maximo:]
+        codigo = 0
+        for cor in cores:
+            if cor not in CORES_VALIDAS:
+                raise ValueError(f"Cor inválida no padrão: {cor}")
+            codigo = codigo * 3 + cor
+        return self.contagens[len(cores)][codigo].copy()
+
+    def prever(self, cores, minimo_amostras=MINIMO_AMOSTRAS):
+        """Distribuição do maior sufixo das cores que já ocorreu ao menos `minimo_amostras` vezes.
+
+        Retorna (tamanho do padrão usado, contagem) ou (0, distribuição geral).
+        """
+        cores = list(cores)[-self.tamanho_maximo:]
+        for k in range(len(cores), 0, -1):
+            contagem = self.distribuicao(cores[-k:])
+            if contagem.sum() >= minimo_amostras:
+                return k, contagem
+        return 0, self.contagens[0][0].copy()
+
+
+def sinal_do_indice(indice, cores, minimo_amostras=MINIMO_AMOSTRAS, vantagem=VANTAGEM_MINIMA):
+    """Cor (vermelho/preto) que mais saiu depois do padrão atual, se a vantagem passar do mínimo.
+
+    Retorna (cor ou None, tamanho do padrão, contagem).
+    """
+    k, contagem = indice.prever(cores, minimo_amostras)
+    if k == 0:
+        return None, k, contagem
+    return cor_prevista(contagem, vantagem), k, contagem
+
+
+def cor_prevista(contagem, vantagem=VANTAGEM_MINIMA):
+    """Vermelho ou preto, o que mais saiu na contagem (branco, vermelho, preto), se passar da vantagem; senão None."""
+    total = int(contagem[BRANCO]) + int(contagem[VERMELHO]) + int(contagem[PRETO])
+    if total == 0:
+        return None
+    diferenca = (int(contagem[VERMELHO]) - int(contagem[PRETO])) / total
+    if abs(diferenca) < vantagem:
+        return None
+    return VERMELHO if diferenca > 0 else PRETO
+
+
+_indice = None
+_indice_lock = threading.Lock()
+
+
+def obter_indice():
+    """Índice do processo, construído na primeira chamada com o histórico completo (arquivo + banco).
+
+    A partir daí, as rodadas gravadas pelo coletor deste processo entram no índice na hora.
+    """
+    global _indice
+    if _indice is None:
+        with _indice_lock:
+            if _indice is None:
+                from src.coletor import ao_gravar_rodadas
+
+                indice = IndicePadroes.do_historico(Historico.completo())
+                ao_gravar_rodadas(indice.registrar)
+                _indice = indice
+    return _indice
@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import signal
+import asyncio
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+
+# Perfilador por amostragem, desligado por padrão (main.py --perfil ou BLAZE_PERFIL=1)
+INTERVALO_AMOSTRAGEM = 0.005
+SEGUNDOS_PADRAO = 10
+# Captura mais longa aceita pelo GET /perfil (uma captura em andamento bloqueia as outras)
+SEGUNDOS_MAXIMO = 300
+MAIS_QUENTES = 15
+PASTA_PERFIS = os.path.join(os.path.dirname(__file__), 'dist', 'data', 'perfis')
+
+
+def _nome_do_quadro(quadro):
+    codigo = quadro.f_code
+    return f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})"
+
+
+class PerfiladorAmostragem:
+    """Amostra a pilha de todas as threads em intervalos fixos enquanto captura.
+
+    Fora das capturas não custa nada. Cada captura gera um arquivo no formato
+    "pilhas colapsadas" (uma linha `thread;função;...;função amostras`,
+    aceito por flamegraph.pl e speedscope) e a lista das funções em que o
+    processo mais esteve executando.
+    """
+
+    def __init__(self, habilitado=None, intervalo=INTERVALO_AMOSTRAGEM, pasta=PASTA_PERFIS,
+                 segundos_padrao=SEGUNDOS_PADRAO):
+        self.habilitado = os.getenv("BLAZE_PERFIL") == "1" if habilitado is None else habilitado
+        self.intervalo = intervalo
+        self.pasta = pasta
+        self.segundos_padrao = segundos_padrao
+        self._capturando = threading.Lock()
+
+    def capturar(self, segundos):
+        """Amostra por `segundos` (bloqueante; roda em uma thread própria). Retorna Counter de pilhas."""
+        pilhas = Counter()
+        propria = threading.get_ident()
+        fim = time.monotonic() + segundos
+        while time.monotonic() < fim:
+            nomes = {t.ident: t.name for t in threading.enumerate()}
+            for ident, quadro in sys._current_frames().items():
+                if ident == propria:
+                    continue
+                funcoes = []
+                while quadro is not None:
+                    funcoes.append(_nome_do_quadro(quadro))
+                    quadro = quadro.f_back
+                funcoes.append(nomes.get(ident, str(ident)))
+                pilhas[";".join(reversed(funcoes))] += 1
+            time.sleep(self.intervalo)
+        return pilhas
+
+    def salvar(self, pilhas):
+        """Grava as pilhas colapsadas e retorna (caminho, [(função, amostras no topo da pilha)])."""
+        os.makedirs(self.pasta, exist_ok=True)
+        caminho = os.path.join(self.pasta, f"perfil-{datetime.now():%Y%m%d-%H%M%S}.folded")
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            for pilha, amostras in pilhas.most_common():
+                arquivo.write(f"{pilha} {amostras}\n")
+
+        no_topo = Counter()
+        for pilha, amostras in pilhas.items():
+            no_topo[pilha.rsplit(";", 1)[-1]] += amostras
+        return caminho, no_topo.most_common(MAIS_QUENTES)
+
+    async def perfilar(self, segundos=None):
+        """Captura sem bloquear o event loop. Retorna (caminho, mais quentes) ou (None, []) se já houver uma captura."""
+        if not self._capturando.acquire(blocking=False):
+            return None, []
+        try:
+            segundos = self.segundos_padrao if segundos is None else segundos
+            pilhas = await asyncio.to_thread(self.capturar, segundos)
+            caminho, mais_quentes = await asyncio.to_thread(self.salvar, pilhas)
+            logging.info(f"Perfil de {segundos:.0f} s salvo em {caminho} ({sum(pilhas.values())} amostras)")
+            return caminho, mais_quentes
+        finally:
+            self._capturando.release()
+
+    def instalar_sinal(self, loop=None):
+        """Com o perfilador habilitado, `kill -USR1 <pid>` dispara uma captura de `segundos_padrao`."""
+        if not self.habilitado or not hasattr(signal, "SIGUSR1"):
+            return False
+        loop = loop or asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGUSR1, lambda: loop.create_task(self.perfilar()))
+        return True
@@ -0,0 +1,228 @@
+import time
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+from src import consultas
+from src.banco import conexao
+from src.metricas import cronometrado
+from src.modelo import BRANCO, PRETO, VERMELHO
+from src.sessoes import PERCENTUAL_APOSTA, STOP_LOSS, STOP_WIN
+
+# Parâmetros padrão da simulação: cada caminho é uma banca seguida por `DIAS` dias
+# de até `APOSTAS_POR_DIA` sinais (cada sinal com o seu gale, se houver)
+BANCA_PADRAO = 100.0
+SIMULACOES = 10_000
+DIAS = 30
+APOSTAS_POR_DIA = 200
+# A banca está "quebrada" quando cai a essa fração da inicial (ou não cobre a próxima sequência)
+LIMITE_RUINA = 0.1
+# Caminhos simulados de uma vez e sinais sorteados por vez dentro do dia: como a maioria
+# dos dias para em um stop bem antes de APOSTAS_POR_DIA, só as bancas ainda apostando
+# recebem o trecho seguinte
+BLOCO = 10_000
+TRECHO = 16
+
+# Distribuição teórica do Double (1 branco, 7 vermelhos e 7 pretos), usada com pouco histórico
+DISTRIBUICAO_TEORICA = {BRANCO: 1 / 15, VERMELHO: 7 / 15, PRETO: 7 / 15}
+MINIMO_RODADAS = 500
+# Por quanto tempo a distribuição lida do banco é reaproveitada
+VALIDADE_DISTRIBUICAO_S = 600
+
+_distribuicao = None
+_lida_em = 0.0
+_trava = threading.Lock()
+
+
+def distribuicao_de_cores(forcar=False):
+    """Probabilidade empírica de cada cor em todo o histórico: ({cor: p}, rodadas).
+
+    Lê os agregados por dia (poucas linhas) e guarda o resultado por
+    VALIDADE_DISTRIBUICAO_S. As probabilidades são arredondadas a 4 casas
+    para que o cache das simulações não mude a cada rodada nova.
+    """
+    global _distribuicao, _lida_em
+    with _trava:
+        if not forcar and _distribuicao is not None and time.monotonic() - _lida_em < VALIDADE_DISTRIBUICAO_S:
+            return _distribuicao
+        with conexao() as conn:
+            contagem = dict(conn.execute(consultas.CORES_HISTORICAS).fetchall())
+        total = sum(contagem.get(cor, 0) for cor in DISTRIBUICAO_TEORICA)
+        if total < MINIMO_RODADAS:
+            probabilidades = dict(DISTRIBUICAO_TEORICA)
+        else:
+            probabilidades = {cor: contagem.get(cor, 0) / total for cor in DISTRIBUICAO_TEORICA}
+        _distribuicao = ({cor: round(p, 4) for cor, p in probabilidades.items()}, total)
+        _lida_em = time.monotonic()
+        return _distribuicao
+
+
+def probabilidade_vitoria(probabilidades, gales=0):
+    """Chance de uma sequência (aposta + `gales` dobras) acertar a cor em alguma tentativa.
+
+    O sinal é sempre vermelho ou preto, então a chance por tentativa é a
+    média das duas cores.
+    """
+    p = (probabilidades[VERMELHO] + probabilidades[PRETO]) / 2
+    return 1 - (1 - p) ** (gales + 1)
+
+
+def custo_sequencia(gales):
+    """Prejuízo, em apostas iniciais, de uma sequência que perde todas as tentativas (1 + 2 + 4 + ...)."""
+    return 2 ** (gales + 1) - 1
+
+
+@lru_cache(maxsize=256)
+def _simular(banca, percentual, gales, stop_win, stop_loss, p_vitoria, apostas_por_dia, dias, simulacoes, semente):
+    """Simulação vetorizada; os argumentos já vêm normalizados (ver simular_risco)."""
+    rng = np.random.default_rng(semente)
+    custo = custo_sequencia(gales)
+    limite = banca * LIMITE_RUINA
+    # Se uma sequência perdida leva a banca abaixo do limite, não há como apostar de novo
+    queda_maxima = percentual * custo
+
+    bancas_finais, lucros, drawdowns, ruinas = [], [], [], []
+    dias_stop_win = dias_stop_loss = 0
+    for inicio in range(0, simulacoes, BLOCO):
+        s = min(BLOCO, simulacoes - inicio)
+        banca_atual = np.full(s, banca)
+        pico = banca_atual.copy()
+        maior_queda = np.zeros(s)
+        quebrada = np.zeros(s, dtype=bool)
+        lucro_por_dia = np.empty((s, dias))
+
+        for dia in range(dias):
+            atual = banca_atual.copy()
+            # Bancas já quebradas não apostam mais; as outras apostam até o primeiro stop (ou a quebra) do dia
+            apostando = ~quebrada
+            for primeira in range(0, apostas_por_dia, TRECHO):
+                ativas = np.flatnonzero(apostando)
+                if not ativas.size:
+                    break
+                n = min(TRECHO, apostas_por_dia - primeira)
+                # Cada sequência rende +1 ou -custo apostas iniciais; a aposta é uma fração da banca
+                ganhou = rng.random((ativas.size, n)) < p_vitoria
+                caminho = atual[ativas, None] * np.cumprod(np.where(ganhou, 1 + percentual, 1 - queda_maxima), axis=1)
+                lucro = caminho - banca_atual[ativas, None]
+                parou = (lucro >= stop_win) | (lucro <= stop_loss) | (caminho * (1 - queda_maxima) < limite)
+                algum = parou.any(axis=1)
+                fim = np.where(algum, parou.argmax(axis=1), n - 1)
+                # Depois do stop a banca fica parada
+                caminho = np.where(np.arange(n)[None, :] > fim[:, None],
+                                   caminho[np.arange(ativas.size), fim][:, None], caminho)
+                picos = np.maximum(pico[ativas, None], np.maximum.accumulate(caminho, axis=1))
+                maior_queda[ativas] = np.maximum(maior_queda[ativas], ((picos - caminho) / picos).max(axis=1))
+                pico[ativas] = picos[:, -1]
+                atual[ativas] = caminho[:, -1]
+                apostando[ativas[algum]] = False
+
+            lucro_final = atual - banca_atual
+            dias_stop_win += int(np.count_nonzero(~quebrada & (lucro_final >= stop_win)))
+            dias_stop_loss += int(np.count_nonzero(~quebrada & (lucro_final <= stop_loss)))
+            quebrada |= atual * (1 - queda_maxima) < limite
+            lucro_por_dia[:, dia] = lucro_final
+            banca_atual = atual
+
+        bancas_finais.append(banca_atual)
+        lucros.append(lucro_por_dia)
+        drawdowns.append(maior_queda)
+        ruinas.append(quebrada)
+
+    bancas_finais = np.concatenate(bancas_finais)
+    lucros = np.concatenate(lucros)
+    drawdowns = np.concatenate(drawdowns)
+    p5, p50, p95 = np.percentile(bancas_finais, [5, 50, 95])
+    d50, d90, d95, d99 = np.percentile(drawdowns, [50, 90, 95, 99])
+    dias_simulados = simulacoes * dias
+    return {
+        "risco_ruina": float(np.concatenate(ruinas).mean()),
+        "lucro_diario_medio": float(lucros.mean()),
+        "lucro_diario_p5": float(np.percentile(lucros, 5)),
+        "lucro_diario_p95": float(np.percentile(lucros, 95)),
+        "dias_stop_win": dias_stop_win / dias_simulados,
+        "dias_stop_loss": dias_stop_loss / dias_simulados,
+        "banca_final_media": float(bancas_finais.mean()),
+        "banca_final_p5": float(p5),
+        "banca_final_p50": float(p50),
+        "banca_final_p95": float(p95),
+        # Maior queda em relação ao pico da banca, em fração do pico
+        "drawdown_p50": float(d50),
+        "drawdown_p90": float(d90),
+        "drawdown_p95": float(d95),
+        "drawdown_p99": float(d99),
+    }
+
+
+@cronometrado("blaze_risco_segundos")
+def simular_risco(banca=BANCA_PADRAO, percentual_aposta=PERCENTUAL_APOSTA, gales=0, stop_win=STOP_WIN,
+                  stop_loss=STOP_LOSS, probabilidades=None, apostas_por_dia=APOSTAS_POR_DIA, dias=DIAS,
+                  simulacoes=SIMULACOES, semente=0):
+    """Monte Carlo da banca com a gestão do bot: aposta fixa em % da banca, gales e stops diários.
+
+    Cada dia tem até `apostas_por_dia` sinais; o dia acaba no primeiro
+    stop (lucro/prejuízo do dia em R$, como em Sessao.limite_atingido).
+    Sem `probabilidades` ({cor: p}), usa a distribuição empírica do banco.
+    O resultado fica em cache pela tupla de parâmetros (com a banca em
+    centavos e as probabilidades arredondadas), então consultas repetidas
+    não simulam de novo. Retorna um dict com o risco de ruína, o lucro
+    diário esperado e os percentis da banca final e do drawdown.
+    """
+    if not 0 < percentual_aposta < 1:
+        raise ValueError("O percentual da aposta precisa estar entre 0 e 1.")
+    if gales < 0 or banca <= 0 or stop_win <= 0 or stop_loss >= 0:
+        raise ValueError("Use banca e stop win positivos, stop loss negativo e gales >= 0.")
+    if percentual_aposta * custo_sequencia(gales) >= 1:
+        raise ValueError(f"Com {gales} gale(s), uma sequência perdida consome a banca inteira.")
+    if probabilidades is None:
+        probabilidades, _ = distribuicao_de_cores()
+    p_vitoria = round(probabilidade_vitoria(probabilidades, gales), 6)
+    parametros = (round(float(banca), 2), round(float(percentual_aposta), 4), int(gales), round(float(stop_win), 2),
+                  round(float(stop_loss), 2), p_vitoria, int(apostas_por_dia), int(dias), int(simulacoes), semente)
+    resultado = dict(_simular(*parametros))
+    resultado.update(zip(("banca", "percentual_aposta", "gales", "stop_win", "stop_loss", "probabilidade_vitoria",
+                          "apostas_por_dia", "dias", "simulacoes"), parametros))
+    return resultado
+
+
+def limpar_cache():
+    global _distribuicao
+    _simular.cache_clear()
+    _distribuicao = None
+
+
+def resumo_risco(resultado):
+    """Texto do resultado de simular_risco (o mesmo do /risco)."""
+    return (
+        f"🎲 Risco com R${resultado['banca']:.2f}, aposta de {resultado['percentual_aposta']:.1%} da banca, "
+        f"{resultado['gales']} gale(s), stops +R${resultado['stop_win']:.2f} / R${resultado['stop_loss']:.2f}\n"
+        f"({resultado['simulacoes']} simulações de {resultado['dias']} dias, até {resultado['apostas_por_dia']} "
+        f"sinais por dia, acerto por sinal {resultado['probabilidade_vitoria']:.1%})\n\n"
+        f"💀 Risco de ruína: {resultado['risco_ruina']:.2%}\n"
+        f"📈 Lucro esperado por dia: R${resultado['lucro_diario_medio']:.2f} "
+        f"(5% a 95%: R${resultado['lucro_diario_p5']:.2f} a R${resultado['lucro_diario_p95']:.2f})\n"
+        f"🎯 Dias no stop win: {resultado['dias_stop_win']:.0%} | no stop loss: {resultado['dias_stop_loss']:.0%}\n"
+        f"🏦 Banca final: mediana R${resultado['banca_final_p50']:.2f} "
+        f"(5% a 95%: R${resultado['banca_final_p5']:.2f} a R${resultado['banca_final_p95']:.2f})\n"
+        f"📉 Drawdown máximo: mediana {resultado['drawdown_p50']:.0%}, p90 {resultado['drawdown_p90']:.0%}, "
+        f"p99 {resultado['drawdown_p99']:.0%}"
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Risco de ruína da gestão de banca (Monte Carlo)")
+    parser.add_argument("--banca", type=float, default=BANCA_PADRAO)
+    parser.add_argument("--percentual", type=float, default=PERCENTUAL_APOSTA, help="fração da banca por aposta")
+    parser.add_argument("--gales", type=int, default=0)
+    parser.add_argument("--stop-win", type=float, default=STOP_WIN)
+    parser.add_argument("--stop-loss", type=float, default=STOP_LOSS)
+    parser.add_argument("--apostas-por-dia", type=int, default=APOSTAS_POR_DIA)
+    parser.add_argument("--dias", type=int, default=DIAS)
+    parser.add_argument("--simulacoes", type=int, default=SIMULACOES)
+    args = parser.parse_args()
+
+    print(resumo_risco(simular_risco(args.banca, args.percentual, args.gales, args.stop_win, args.stop_loss,
+                                     apostas_por_dia=args.apostas_por_dia, dias=args.dias,
+                                     simulacoes=args.simulacoes)))
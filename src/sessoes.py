@@ -0,0 +1,138 @@
+import time
+import asyncio
+import logging
+from datetime import date
+
+from src.usuarios import bancas
+
+# Limites padrão de cada sessão (mesmos valores do bot)
+STOP_WIN = 5
+STOP_LOSS = -5
+PERCENTUAL_APOSTA = 0.02
+CONCORRENCIA_ENVIO = 64
+
+
+class Sessao:
+    """Estado em memória de um usuário logado em um chat do Telegram.
+
+    A senha só é conferida no /login e não fica na sessão. Com `usuario_id`,
+    a banca é a do cache por usuário (src/usuarios.py), compartilhada pelas
+    sessões do mesmo usuário; sem ele, fica na própria sessão.
+    """
+
+    __slots__ = (
+        "chat_id", "nome", "_banca", "saldo_dia", "apostas_realizadas",
+        "dia", "stop_win", "stop_loss", "percentual_aposta", "encerrada_hoje", "usuario_id",
+    )
+
+    def __init__(self, chat_id, nome, banca, stop_win=STOP_WIN, stop_loss=STOP_LOSS,
+                 percentual_aposta=PERCENTUAL_APOSTA, usuario_id=None):
+        self.chat_id = chat_id
+        self.usuario_id = usuario_id
+        self.nome = nome
+        self._banca = banca
+        if usuario_id is not None:
+            bancas.iniciar(usuario_id, banca)
+        self.saldo_dia = 0.0
+        self.apostas_realizadas = 0
+        self.dia = date.today()
+        self.stop_win = stop_win
+        self.stop_loss = stop_loss
+        self.percentual_aposta = percentual_aposta
+        self.encerrada_hoje = False
+
+    def virar_dia(self, hoje=None):
+        """Zera o saldo e os limites diários quando o dia muda."""
+        hoje = hoje or date.today()
+        if hoje != self.dia:
+            self.dia = hoje
+            self.saldo_dia = 0.0
+            self.apostas_realizadas = 0
+            self.encerrada_hoje = False
+
+    def limite_atingido(self):
+        """Retorna "win", "loss" ou None conforme os stops do dia."""
+        if self.saldo_dia >= self.stop_win:
+            return "win"
+        if self.saldo_dia <= self.stop_loss:
+            return "loss"
+        return None
+
+    @property
+    def banca(self):
+        if self.usuario_id is None:
+            return self._banca
+        return bancas.obter(self.usuario_id)
+
+    def valor_aposta(self):
+        return self.banca * self.percentual_aposta
+
+    def registrar_resultado(self, lucro):
+        """Aplica o lucro/prejuízo de uma aposta à banca e ao saldo do dia."""
+        if self.usuario_id is None:
+            self._banca += lucro
+        else:
+            bancas.somar(self.usuario_id, lucro)
+        self.saldo_dia += lucro
+        self.apostas_realizadas += 1
+
+
+class RegistroSessoes:
+    """Sessões ativas indexadas pelo id do chat do Telegram."""
+
+    def __init__(self):
+        self._sessoes = {}
+
+    def __len__(self):
+        return len(self._sessoes)
+
+    def __contains__(self, chat_id):
+        return chat_id in self._sessoes
+
+    def entrar(self, chat_id, nome, banca, **limites):
+        """Cria (ou substitui) a sessão do chat."""
+        sessao = Sessao(chat_id, nome, banca, **limites)
+        self._sessoes[chat_id] = sessao
+        return sessao
+
+    def sair(self, chat_id):
+        return self._sessoes.pop(chat_id, None)
+
+    def obter(self, chat_id):
+        return self._sessoes.get(chat_id)
+
+    def ativas(self):
+        """Sessões que ainda podem receber sinais hoje."""
+        hoje = date.today()
+        ativas = []
+        for sessao in self._sessoes.values():
+            sessao.virar_dia(hoje)
+            if not sessao.encerrada_hoje:
+                ativas.append(sessao)
+        return ativas
+
+
+async def distribuir(sessoes, enviar_para, concorrencia=CONCORRENCIA_ENVIO):
+    """Executa `enviar_para(sessao)` para todas as sessões de forma concorrente.
+
+    O número de envios simultâneos é limitado por um semáforo. Retorna a
+    lista de latências (s) de cada envio, na ordem das sessões; envios que
+    falharam ficam como None.
+    """
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async def _enviar(sessao):
+        async with semaforo:
+            inicio = time.perf_counter()
+            try:
+                await enviar_para(sessao)
+            except Exception as e:
+                logging.error(f"Erro ao enviar para o chat {sessao.chat_id}: {e}")
+                return None
+            return time.perf_counter() - inicio
+
+    return await asyncio.gather(*(_enviar(sessao) for sessao in sessoes))
+
+
+# Registro compartilhado pelo bot
+registro = RegistroSessoes()
@@ -1,241 +1,127 @@
 import os
 import sys
+import time
 import sqlite3
 import logging
 import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
-from telegram import Bot
-from telegram.ext import Updater, CommandHandler
-import random  # Apenas como exemplo, substitua por sua lógica real de análise
 
 # Adicionando o diretório "src" ao sys.path para evitar erros de importação
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Importando configurações do arquivo config.py
-from config.config import TOKEN, CHAT_ID
-
-# Banco de Dados
-db_path = os.path.join(os.path.dirname(__file__), 'dist', 'data', 'blaze_double.db')
-
-# Configuração de Logs
-log_path = os.path.join(os.path.dirname(__file__), 'dist', 'data', 'logs.txt')
-os.makedirs(os.path.dirname(log_path), exist_ok=True)
-
-saldo_dia = 0
-apostas_realizadas = 0
-usuario_logado = None
-
-logging.basicConfig(filename=log_path, level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
-
-if not TOKEN or not CHAT_ID:
-    raise ValueError("Erro: TOKEN do Telegram ou CHAT_ID não configurado corretamente. Verifique o config.py!")
-
-bot = Bot(token=TOKEN)
+from src.config.config import TOKEN, CHAT_ID, verificar_configuracao
+from src import agregados
+from src.banco import agora_ms, obter_pool
+from src.migracoes import aplicar_migracoes
+from src.buffer_resultados import obter_buffer
+from src.escrita import obter_escritor
+from src.sessoes import distribuir, registro
+from src.usuarios import autenticar, bancas, cadastrar
+from src.coletor import ao_salvar_rodada, ouvintes_rodada
+from src.liquidacao import AgendadorLiquidacao
+from src.modelo import BRANCO, CORES_VALIDAS, DURACAO_RODADA_MS, PRETO, VERMELHO, codigo_cor, nome_cor
+from src.metricas import cronometrado, metricas
+from src import logs
+
+# Configuração de Logs (feita ao iniciar o bot, não na importação); o arquivo é gravado fora do event loop
+log_path = logs.CAMINHO_LOGS
+
+def configurar_logs():
+    return logs.configurar_logs(log_path)
+
+# Pool de conexões HTTP com o Telegram grande o bastante para o envio em massa dos sinais
+CONEXOES_TELEGRAM = 64
+
+# Criados por init(): o Bot e a fila de saída com os limites de envio do Telegram (global e por chat)
+bot = None
+despachante = None
+
+def init():
+    """Valida a configuração e cria o Bot e o despachante (só os que ainda não existem).
+
+    A biblioteca do Telegram só é importada aqui, e não na importação do módulo.
+    """
+    global bot, despachante
+    verificar_configuracao()
+    if bot is None:
+        from telegram import Bot
+        from telegram.request import HTTPXRequest
+        bot = Bot(token=TOKEN, request=HTTPXRequest(connection_pool_size=CONEXOES_TELEGRAM))
+    if despachante is None:
+        from src.despachante import Despachante
+        despachante = Despachante(bot)
 
 STOP_WIN = 5
 STOP_LOSS = -5
 APOSTA_PADRAO = 2
 APOSTAS_MAX = 3
 
-saldo_dia = 0
-apostas_realizadas = 0
+# Apostas pendentes são liquidadas em lote quando a próxima rodada é gravada
+agendador = AgendadorLiquidacao()
 
-# Função de análise de apostas - Lógica aprimorada para análise de tendência
+# Função de análise de apostas: regras do analisador com o índice de padrões como reserva
+@cronometrado("blaze_analise_segundos")
 def gerar_sinal_aposta():
-    """Análise aprimorada baseada em resultados anteriores para gerar o sinal de aposta"""
-    resultados = obter_resultados_do_banco(100)  # Últimos 100 resultados
-    if not resultados:
+    """Gera o sinal para a próxima rodada com as regras do analisador sobre as últimas 100 rodadas.
+
+    Se nenhuma regra disparar, vale a cor que mais saiu depois das últimas
+    cores em todo o histórico (índice de padrões). Retorna (cor, valor) ou
+    (None, 0) quando não há aposta.
+    """
+    # O analisador e o índice de padrões (NumPy) só são carregados no primeiro sinal
+    from src.analisador import Historico, analisar_padroes
+    from src.padroes import obter_indice
+
+    # Buffer circular com as últimas 100 rodadas, trazidas do banco só quando há novas
+    buffer = obter_buffer()
+    indice = obter_indice()
+    try:
+        buffer.sincronizar()
+        indice.sincronizar()
+    except Exception as e:
+        logging.error(f"Erro ao sincronizar resultados recentes: {e}")
+    if buffer.tamanho == 0:
         return None, 0  # Se não houver dados, retorna "nenhuma aposta"
 
-    cor_contagem = {"vermelho": 0, "preto": 0}
-    for cor in resultados:
-        if cor in cor_contagem:
-            cor_contagem[cor] += 1
-
-    prob_red = cor_contagem["vermelho"] / len(resultados)
-    prob_black = cor_contagem["preto"] / len(resultados)
-
-    logging.info(f"Probabilidades: Vermelho {prob_red:.2%}, Preto {prob_black:.2%}")
+    regra, cor = analisar_padroes(Historico(buffer.cores_recentes()[::-1]), indice=indice)
+    if cor is None:
+        logging.info("Nenhuma regra disparou na última rodada.")
+        return None, 0
 
-    if prob_red > prob_black:
-        return "vermelho", APOSTA_PADRAO
-    else:
-        return "preto", APOSTA_PADRAO
+    logging.info(f"Sinal da regra {regra}: {nome_cor(cor)}", extra={"regra": regra, "cor": cor})
+    return cor, APOSTA_PADRAO
 
 # Funções de Banco de Dados
-def obter_resultados_do_banco(limite=100):
-    """Obtém os últimos resultados armazenados no banco de dados Blaze."""
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT cor FROM resultados ORDER BY datetime(created_at) DESC LIMIT ?", (limite,))
-        resultados = cursor.fetchall()
-        conn.close()
-        return [r[0] for r in resultados]  # Retorna uma lista de cores
-    except Exception as e:
-        logging.error(f"Erro ao buscar resultados do banco: {e}")
-        return []
-
 def criar_tabelas():
     """Cria as tabelas necessárias no banco de dados."""
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        # Criação da tabela 'apostas'
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS apostas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                data TEXT,
-                valor REAL,
-                resultado TEXT
-            )
-        """)
-        # Criação da tabela 'usuarios'
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS usuarios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nome TEXT NOT NULL,
-                senha TEXT NOT NULL,
-                banca REAL NOT NULL,
-                data_criacao DATETIME DEFAULT CURRENT_TIMESTAMP,
-                data_ultima_edicao DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        conn.commit()
-        conn.close()
+        # Cria as tabelas ou aplica as migrações pendentes do schema
+        aplicar_migracoes()
         logging.info("Tabelas verificadas ou criadas com sucesso.")
     except Exception as e:
         logging.error(f"Erro ao criar/verificar tabelas: {e}")
 
-def cadastrar_usuario(nome, senha, banca):
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO usuarios (nome, senha, banca) 
-            VALUES (?, ?, ?)
-        """, (nome, senha, banca))
-        conn.commit()
-        conn.close()
-        logging.info("Usuário cadastrado com sucesso!")
-        return "Cadastro realizado com sucesso!"
-    except Exception as e:
-        logging.error(f"Erro ao cadastrar usuário: {e}")
-        return "Erro ao cadastrar usuário."
-    
-def atualizar_banca(nome, senha, nova_banca):
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # Verifica se o nome e senha correspondem ao registro
-        cursor.execute("""
-            SELECT * FROM usuarios WHERE nome = ? AND senha = ?
-        """, (nome, senha))
-        usuario = cursor.fetchone()
-
-        if not usuario:
-            conn.close()
-            return "Nome ou senha incorretos. Atualização não realizada."
-
-        # Atualiza o valor da banca
-        cursor.execute("""
-            UPDATE usuarios
-            SET banca = ?, data_ultima_edicao = CURRENT_TIMESTAMP
-            WHERE nome = ? AND senha = ?
-        """, (nova_banca, nome, senha))
-        conn.commit()
-        conn.close()
-        logging.info(f"Banca do usuário {nome} atualizada para R${nova_banca:.2f}")
-        return "Banca atualizada com sucesso!"
-    except Exception as e:
-        logging.error(f"Erro ao atualizar banca: {e}")
-        return "Erro ao atualizar banca."
-    
-def obter_banca_atual(nome, senha):
-    """Busca o valor atual da banca do usuário com base no nome e senha."""
+# Usuários: a senha é conferida uma vez, no /login (src/usuarios.py); depois tudo é pelo id,
+# com a banca no cache em memória e as atualizações gravadas pelo escritor em lote
+def obter_usuario(nome, senha):
+    """Retorna (id, banca) do usuário com esse nome e senha, ou None."""
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # Localiza o usuário pelo nome e senha
-        cursor.execute("""
-            SELECT banca FROM usuarios WHERE nome = ? AND senha = ?
-        """, (nome, senha))
-        usuario = cursor.fetchone()
-        conn.close()
-
-        if usuario:
-            return usuario[0]  # Retorna o valor da banca
-        else:
+        usuario = autenticar(nome, senha)
+        if usuario is None:
             logging.warning("Usuário não encontrado ou credenciais inválidas.")
-            return None
+        return usuario
     except Exception as e:
-        logging.error(f"Erro ao obter a banca atual: {e}")
+        logging.error(f"Erro ao obter o usuário: {e}")
         return None
-    
-def exibir_dados_usuario(nome, senha):
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT * FROM usuarios WHERE nome = ? AND senha = ?
-        """, (nome, senha))
-        usuario = cursor.fetchone()
-        conn.close()
-        if usuario:
-            return {
-                "id": usuario[0],
-                "nome": usuario[1],
-                "banca": usuario[3],
-                "data_criacao": usuario[4],
-                "data_ultima_edicao": usuario[5]
-            }
-        else:
-            return "Usuário não encontrado ou senha incorreta."
-    except Exception as e:
-        logging.error(f"Erro ao exibir dados do usuário: {e}")
-        return "Erro ao buscar dados do usuário."
-
-def obter_saldo_do_dia():
-    """Retorna o saldo acumulado de apostas para o dia de hoje."""
-    global saldo_dia
-    try:
-        # Conectar ao banco de dados
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # Obter a soma dos resultados para o dia de hoje
-        hoje = datetime.now().strftime("%Y-%m-%d")
-        cursor.execute("SELECT SUM(resultado) FROM apostas WHERE data = ?", (hoje,))
-        resultado = cursor.fetchone()
-        conn.close()
-
-        # Atualizar o saldo diário global
-        saldo_dia = resultado[0] if resultado[0] is not None else 0
-        logging.info(f"Saldo do dia atualizado: R${saldo_dia:.2f}")
-        return saldo_dia
-
-    except Exception as e:
-        logging.error(f"Erro ao obter saldo do dia: {e}")
-        return 0
 
-def obter_saldo_do_dia():
-    """Retorna o saldo acumulado de apostas para o dia de hoje."""
-    global saldo_dia
+@cronometrado()
+def obter_saldo_do_dia(usuario_id=None):
+    """Retorna o saldo acumulado de apostas do dia de hoje (de um usuário ou de todos)."""
     try:
-        # Conectar ao banco de dados
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # Obter a soma dos resultados para o dia de hoje
-        hoje = datetime.now().strftime("%Y-%m-%d")
-        cursor.execute("SELECT SUM(resultado) FROM apostas WHERE data = ?", (hoje,))
-        resultado = cursor.fetchone()
-        conn.close()
-
-        # Atualizar o saldo diário global
-        saldo_dia = resultado[0] if resultado[0] is not None else 0
+        # Lido da tabela agregada por usuário e dia, mantida pelos triggers das apostas
+        saldo_dia = agregados.saldo_do_dia(usuario_id)
         logging.info(f"Saldo do dia atualizado: R${saldo_dia:.2f}")
         return saldo_dia
 
@@ -243,149 +129,84 @@ def obter_saldo_do_dia():
         logging.error(f"Erro ao obter saldo do dia: {e}")
         return 0
 
-def verificar_limites():
-    """Verifica se os limites de Stop Win ou Stop Loss foram atingidos e encerra apostas se necessário."""
-    global saldo_dia, usuario_logado
+async def verificar_limites(sessao):
+    """Verifica se os limites de Stop Win ou Stop Loss da sessão foram atingidos e encerra apostas se necessário."""
     try:
-        # Verificar se há um usuário logado
-        if usuario_logado is None:
-            logging.warning("Tentativa de verificar limites sem usuário logado.")
-            return False
+        if sessao.encerrada_hoje:
+            return True
 
         # Verificar limites de Stop Win e Stop Loss
-        if saldo_dia >= STOP_WIN:
-            enviar_mensagem(
-                f"🎉 Meta diária alcançada! Lucro de R${saldo_dia:.2f}. Encerrando as apostas por hoje! ✅"
+        limite = sessao.limite_atingido()
+        if limite == "win":
+            await enviar_mensagem(
+                f"🎉 Meta diária alcançada! Lucro de R${sessao.saldo_dia:.2f}. Encerrando as apostas por hoje! ✅",
+                sessao.chat_id,
             )
-            logging.info("STOP WIN atingido. Apostas encerradas.")
-            return True
-        elif saldo_dia <= STOP_LOSS:
-            enviar_mensagem(
-                f"⚠️ Stop-loss atingido! Prejuízo de R${saldo_dia:.2f}. Parando as apostas. ❌"
+            logging.info(f"STOP WIN atingido ({sessao.nome}). Apostas encerradas.")
+        elif limite == "loss":
+            await enviar_mensagem(
+                f"⚠️ Stop-loss atingido! Prejuízo de R${sessao.saldo_dia:.2f}. Parando as apostas. ❌",
+                sessao.chat_id,
             )
-            logging.warning("STOP LOSS atingido. Apostas encerradas.")
-            return True
+            logging.warning(f"STOP LOSS atingido ({sessao.nome}). Apostas encerradas.")
+        else:
+            # Limites não atingidos
+            return False
 
-        # Limites não atingidos
-        return False
+        sessao.encerrada_hoje = True
+        return True
     except Exception as e:
         logging.error(f"Erro ao verificar limites: {e}")
         return False
 
-def obter_resultado_do_jogo(horario_entrada):
-    """Busca o resultado baseado na hora de entrada registrada no banco."""
+# Função para registrar a aposta e verificar o resultado após a entrada
+async def registrar_aposta_e_verificar_resultado(sessao, cor, valor_aposta, mensagem_sinal="", chave=None):
+    """Agenda a aposta e acompanha a liquidação. Retorna False se a aposta nem chegou a ser agendada."""
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT cor FROM resultados WHERE datetime(created_at) >= datetime(?) ORDER BY created_at LIMIT 1", (horario_entrada,))
-        resultado = cursor.fetchone()
-        conn.close()
-
-        if resultado:
-            return "win" if resultado[0] == "vermelho" else "loss"  # Exemplo de lógica
-        else:
-            logging.warning(f"Nenhum resultado encontrado após {horario_entrada}")
-            return "pendente"
+        # Registrar a aposta como "pendente" e aguardar a liquidação pela próxima rodada gravada,
+        # sem bloquear o event loop (o agendador atualiza o resultado no banco em lote)
+        _, liquidacao = await agendador.agendar(cor, valor_aposta, usuario_id=sessao.usuario_id)
     except Exception as e:
-        logging.error(f"Erro ao buscar resultado do jogo: {e}")
-        return "erro"
+        logging.error(f"Erro ao agendar a aposta ({sessao.nome}): {e}")
+        return False
 
-# Função para registrar a aposta e verificar o resultado após a entrada
-async def registrar_aposta_e_verificar_resultado(cor, valor_aposta):
-    global saldo_dia, apostas_realizadas, usuario_logado
     try:
-        # Verificar se há um usuário logado
-        if usuario_logado is None:
-            await enviar_mensagem("❌ Você precisa fazer login para continuar. Use o comando /login Nome Senha.")
-            return
-
-        # Obter as credenciais do usuário logado
-        nome_usuario = usuario_logado["nome"]
-        senha_usuario = usuario_logado["senha"]
-
-        # Definir o horário de entrada
-        horario_entrada = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        # Registrar a aposta no banco com status "pendente"
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO apostas (data, valor, resultado) VALUES (?, ?, ?)", 
-                       (horario_entrada, valor_aposta, "pendente"))
-        conn.commit()
-        conn.close()
-
-        # Simular a espera para buscar o resultado
-        await asyncio.sleep(30)
-        resultado = obter_resultado_do_jogo(horario_entrada)  # Buscar o resultado da aposta
-
-        # Atualizar o resultado no banco de dados
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("UPDATE apostas SET resultado = ? WHERE data = ?", (resultado, horario_entrada))
-        conn.commit()
-        conn.close()
-
-        # Obter a banca atual antes de atualizar
-        banca_atual = obter_banca_atual(nome_usuario, senha_usuario)
-
-        if banca_atual is None:
-            logging.error("Não foi possível carregar a banca. Verifique seu cadastro.")
-            await enviar_mensagem("❌ Erro ao carregar a banca. Operação pausada!")
-            return
+        resultado, rodada = await liquidacao
 
         # Atualizar saldo e banca com base no resultado
         if resultado == "win":
-            saldo_dia += valor_aposta
-            nova_banca = banca_atual + valor_aposta
-            logging.info(f"Aposta WIN! Lucro de R${valor_aposta:.2f}.")
+            sessao.registrar_resultado(valor_aposta)
+            logging.info(f"Aposta WIN ({sessao.nome})! Lucro de R${valor_aposta:.2f}.")
         elif resultado == "loss":
-            saldo_dia -= valor_aposta
-            nova_banca = banca_atual - valor_aposta
-            logging.info(f"Aposta LOSS! Prejuízo de R${valor_aposta:.2f}.")
+            sessao.registrar_resultado(-valor_aposta)
+            logging.info(f"Aposta LOSS ({sessao.nome})! Prejuízo de R${valor_aposta:.2f}.")
         else:
             logging.warning("Resultado pendente ou erro. Nenhuma atualização realizada.")
-            return
+            return True
 
-        # Atualizar a banca no banco de dados
-        atualizar_banca(nome_usuario, senha_usuario, nova_banca)
+        # Gravar a banca (já atualizada no cache); o escritor em lote junta as bancas dos usuários
+        # liquidados pela mesma rodada em uma transação (e só a última de cada usuário é gravada)
+        if sessao.usuario_id is not None:
+            await bancas.gravar(sessao.usuario_id)
 
-        # Enviar mensagem no Telegram com o resultado
-        await enviar_mensagem(f"🎯 Resultado da aposta: {resultado.upper()} 💰\n"
-                               f"Valor apostado: R${valor_aposta:.2f}\n"
-                               f"Saldo do dia: R${saldo_dia:.2f}\n"
-                               f"Nova banca: R${nova_banca:.2f}")
+        # Enviar o resultado editando a mensagem do sinal (ou agrupado com ela, se ainda não saiu)
+        entrega = await enviar_mensagem(f"{mensagem_sinal}\n\n"
+                                        f"🎯 Resultado da aposta: {resultado.upper()} 💰\n"
+                                        f"Valor apostado: R${valor_aposta:.2f}\n"
+                                        f"Saldo do dia: R${sessao.saldo_dia:.2f}\n"
+                                        f"Nova banca: R${sessao.banca:.2f}",
+                                        sessao.chat_id, chave=chave, ultima=True)
+        if entrega is not None:
+            entrega.add_done_callback(lambda futuro: _registrar_liquidacao(futuro, rodada[2]))
 
-        # Incrementar número de apostas realizadas e verificar limites
-        apostas_realizadas += 1
-        verificar_limites()
+        # Verificar limites após a aposta
+        await verificar_limites(sessao)
 
     except Exception as e:
         logging.error(f"Erro ao registrar aposta ou verificar resultado: {e}")
+    return True
 
-# Função para obter o resultado da aposta no banco de dados baseado na hora de entrada
-def obter_resultado_por_hora(horario_entrada):
-    """Verifica se a aposta foi win ou loss com base no horário de entrada registrado no banco de dados."""
-    try:
-        # Conectar ao banco de dados
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # Buscar o resultado da aposta com base no horário de entrada
-        cursor.execute("SELECT resultado FROM apostas WHERE data = ?", (horario_entrada,))
-        resultado = cursor.fetchone()
-        conn.close()
-
-        # Processar o resultado retornado
-        if resultado:
-            return resultado[0]  # Retorna 'win' ou 'loss'
-        else:
-            logging.warning(f"Nenhum resultado encontrado para o horário de entrada: {horario_entrada}")
-            return "pendente"
-
-    except Exception as e:
-        logging.error(f"Erro ao buscar resultado da aposta: {e}")
-        return "erro"
-    
+@cronometrado()
 def cadastrar_usuario(nome, senha, banca):
     """Registra um usuário no banco de dados."""
     try:
@@ -397,17 +218,8 @@ def cadastrar_usuario(nome, senha, banca):
             logging.warning("Valor da banca inválido. Operação abortada.")
             return "❌ O valor da banca deve ser maior que 0."
 
-        # Conectar ao banco de dados
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # Inserir o usuário na tabela
-        cursor.execute("""
-            INSERT INTO usuarios (nome, senha, banca)
-            VALUES (?, ?, ?)
-        """, (nome, senha, banca))
-        conn.commit()
-        conn.close()
+        # Inserir o usuário na tabela (senha em hash; o nome tem índice único)
+        cadastrar(nome, senha, banca)
 
         logging.info(f"Usuário cadastrado com sucesso: Nome={nome}, Banca=R${banca:.2f}")
         return "✅ Cadastro realizado com sucesso!"
@@ -418,117 +230,435 @@ def cadastrar_usuario(nome, senha, banca):
         logging.error(f"Erro ao cadastrar usuário: {e}")
         return "❌ Ocorreu um erro inesperado ao cadastrar o usuário."
 
-def login_usuario(update, context):
-    global usuario_logado
+async def login_usuario(update, context):
     try:
         dados = context.args
         if len(dados) != 2:
-            update.message.reply_text(
+            await update.message.reply_text(
                 "❌ Formato inválido! Use: /login Nome Senha\n"
                 "Exemplo: /login pedro 1415"
             )
             return
 
         nome, senha = dados[0], dados[1]
-        banca_atual = obter_banca_atual(nome, senha)
-
-        if banca_atual is not None:
-            usuario_logado = {"nome": nome, "senha": senha}
-            update.message.reply_text(f"✅ Login realizado com sucesso!\n📊 Banca atual: R${banca_atual:.2f}")
+        # O hash da senha é lento de propósito: fora do event loop
+        usuario = await asyncio.to_thread(obter_usuario, nome, senha)
+
+        if usuario is not None:
+            usuario_id, banca_atual = usuario
+            # Cada chat tem a sua sessão; um novo login não derruba os demais usuários
+            registro.entrar(update.effective_chat.id, nome, banca_atual,
+                            stop_win=STOP_WIN, stop_loss=STOP_LOSS, usuario_id=usuario_id)
+            await update.message.reply_text(f"✅ Login realizado com sucesso!\n📊 Banca atual: R${banca_atual:.2f}")
         else:
-            update.message.reply_text("❌ Nome ou senha inválidos. Tente novamente.")
+            await update.message.reply_text("❌ Nome ou senha inválidos. Tente novamente.")
     except Exception as e:
         logging.error(f"Erro no login: {e}")
-        update.message.reply_text("❌ Erro ao fazer login.")
+        await update.message.reply_text("❌ Erro ao fazer login.")
+
+async def registrar_usuario(update, context):
+    dados = context.args
+    if len(dados) != 3:
+        await update.message.reply_text(
+            "❌ Formato inválido! Use: /registrar Nome Senha BancaInicial\n"
+            "Exemplo: /registrar pedro 1415 100.00"
+        )
+        return
+    try:
+        banca = float(dados[2].replace(",", "."))
+    except ValueError:
+        await update.message.reply_text("❌ O valor da banca deve ser um número.")
+        return
+    await update.message.reply_text(await asyncio.to_thread(cadastrar_usuario, dados[0], dados[1], banca))
+
+async def sair_usuario(update, context):
+    if registro.sair(update.effective_chat.id):
+        await update.message.reply_text("👋 Sessão encerrada. Você não receberá mais sinais.")
+    else:
+        await update.message.reply_text("❌ Você não está logado.")
+
+# Comandos de consulta: leem as tabelas agregadas (poucas linhas pela chave), sem varrer as apostas
+async def saldo_usuario(update, context):
+    sessao = registro.obter(update.effective_chat.id)
+    if sessao is None or sessao.usuario_id is None:
+        await update.message.reply_text("❌ Faça /login para ver o seu saldo.")
+        return
+    try:
+        resumo = await asyncio.to_thread(agregados.resumo_do_dia, sessao.usuario_id)
+    except Exception as e:
+        logging.error(f"Erro ao obter o saldo do usuário: {e}")
+        await update.message.reply_text("❌ Erro ao consultar o saldo.")
+        return
+    await update.message.reply_text(
+        f"📊 Hoje: {resumo['apostas']} aposta(s) - {resumo['vitorias']} ✅ / {resumo['derrotas']} ❌"
+        f" / {resumo['pendentes']} 🔄\n"
+        f"💵 Valor apostado: R${resumo['valor_apostado']:.2f}\n"
+        f"💰 Saldo do dia: R${resumo['saldo']:.2f}\n"
+        f"🏦 Banca atual: R${sessao.banca:.2f}"
+    )
+
+async def estatisticas(update, context):
+    try:
+        cores = await asyncio.to_thread(agregados.estatisticas_de_cores, None, 6)
+    except Exception as e:
+        logging.error(f"Erro ao obter estatísticas das cores: {e}")
+        await update.message.reply_text("❌ Erro ao consultar as estatísticas.")
+        return
+
+    linhas = [f"🎲 Rodadas de hoje: {agregados.resumo_de_cores(cores['dia'])}"]
+    for hora, contagem in sorted(cores["por_hora"].items(), reverse=True):
+        linhas.append(f"🕒 {datetime.fromtimestamp(hora / 1000):%H}h: {agregados.resumo_de_cores(contagem)}")
+    await update.message.reply_text("\n".join(linhas))
+
+async def historico_usuario(update, context):
+    sessao = registro.obter(update.effective_chat.id)
+    if sessao is None or sessao.usuario_id is None:
+        await update.message.reply_text("❌ Faça /login para ver o seu histórico.")
+        return
+    try:
+        dias = await asyncio.to_thread(agregados.historico_do_usuario, sessao.usuario_id, 7)
+    except Exception as e:
+        logging.error(f"Erro ao obter o histórico do usuário: {e}")
+        await update.message.reply_text("❌ Erro ao consultar o histórico.")
+        return
+    if not dias:
+        await update.message.reply_text("📅 Nenhuma aposta nos últimos 7 dias.")
+        return
+    linhas = ["📅 Últimos 7 dias:"]
+    for dia in dias:
+        linhas.append(f"{datetime.fromtimestamp(dia['dia'] / 1000):%d/%m}: {dia['apostas']} aposta(s), "
+                      f"{dia['vitorias']} ✅ / {dia['derrotas']} ❌, saldo R${dia['saldo']:.2f}")
+    await update.message.reply_text("\n".join(linhas))
+
+def _consultar_padrao(cores):
+    """Distribuição da próxima cor para cada sufixo do padrão (do maior para o menor)."""
+    # O índice (NumPy) só é carregado no primeiro /padrao
+    from src.padroes import obter_indice
+
+    indice = obter_indice()
+    indice.sincronizar()
+    if not cores:
+        # Sem argumentos: as últimas cores gravadas, até a última desconhecida
+        recentes = obter_buffer().cores_recentes(indice.tamanho_maximo)
+        for cor in recentes:
+            if cor not in CORES_VALIDAS:
+                break
+            cores.insert(0, cor)
+    cores = cores[-indice.tamanho_maximo:]
+    return cores, [(cores[-k:], indice.distribuicao(cores[-k:])) for k in range(len(cores), 0, -1)], indice.rodadas
+
+async def padrao(update, context):
+    argumentos = context.args or []
+    # Aceita "/padrao v p p", "/padrao vermelho preto" ou "/padrao vpp"
+    if len(argumentos) == 1 and len(argumentos[0]) > 1 and set(argumentos[0].lower()) <= set("vpb"):
+        argumentos = list(argumentos[0])
+    cores = [codigo_cor(argumento) for argumento in argumentos]
+    if -1 in cores:
+        await update.message.reply_text("❌ Use: /padrao v p p (v = vermelho, p = preto, b = branco).")
+        return
+    try:
+        cores, sufixos, rodadas = await asyncio.to_thread(_consultar_padrao, cores)
+    except Exception as e:
+        logging.error(f"Erro ao consultar o índice de padrões: {e}")
+        await update.message.reply_text("❌ Erro ao consultar os padrões.")
+        return
+    if not cores:
+        await update.message.reply_text("🔎 Ainda não há rodadas para montar o padrão.")
+        return
+
+    simbolos = {BRANCO: "⚪", VERMELHO: "🔴", PRETO: "⚫"}
+    linhas = [f"🔎 O que saiu depois de cada padrão em {rodadas} rodadas:"]
+    for sufixo, contagem in sufixos:
+        total = int(contagem.sum())
+        sequencia = "".join(simbolos[cor] for cor in sufixo)
+        if not total:
+            linhas.append(f"{sequencia}: nunca ocorreu")
+            continue
+        linhas.append(f"{sequencia} ({total}x): " + " | ".join(
+            f"{nome_cor(cor)} {contagem[cor] / total:.0%}" for cor in (VERMELHO, PRETO, BRANCO)))
+    await update.message.reply_text("\n".join(linhas))
+
+def _consultar_ranking(quantidade):
+    """Placares das estratégias em modo sombra (com as rodadas que outro processo tenha gravado)."""
+    from src.estrategias import obter_executor
+
+    executor = obter_executor()
+    executor.sincronizar()
+    return executor, executor.ranking(quantidade)
+
+async def ranking(update, context):
+    argumentos = context.args or []
+    try:
+        quantidade = min(max(int(argumentos[0]), 1), 30) if argumentos else 10
+    except ValueError:
+        await update.message.reply_text("❌ Use: /ranking [quantidade] (ex.: /ranking 5).")
+        return
+    try:
+        executor, placares = await asyncio.to_thread(_consultar_ranking, quantidade)
+    except Exception as e:
+        logging.error(f"Erro ao consultar o ranking das estratégias: {e}")
+        await update.message.reply_text("❌ Erro ao consultar o ranking.")
+        return
+    if not placares:
+        await update.message.reply_text(f"🏆 Nenhuma das {len(executor)} estratégias apostou ainda.")
+        return
+
+    desde = datetime.fromtimestamp(executor.desde / 1000)
+    linhas = [f"🏆 {len(executor)} estratégias em modo sombra, {executor.rodadas} rodada(s) desde {desde:%d/%m %H:%M} "
+              f"(1 unidade por aposta):"]
+    for posicao, placar in enumerate(placares, start=1):
+        sequencia = placar["sequencia"]
+        atual = f"{sequencia} ✅ seguidas" if sequencia > 0 else f"{-sequencia} ❌ seguidas"
+        linhas.append(f"{posicao}. {placar['estrategia']}: {placar['lucro']:+.0f} u | {placar['apostas']} aposta(s), "
+                      f"{placar['taxa_acerto']:.0%} de acerto | {atual}, pior {placar['maior_sequencia_derrotas']} ❌")
+    await update.message.reply_text("\n".join(linhas))
+
+def _numero(texto):
+    return float(texto.replace(",", ".").rstrip("%"))
+
+async def risco(update, context):
+    """/risco [percentual] [gales] [stop_win] [stop_loss]: Monte Carlo da gestão de banca.
+
+    Sem argumentos, usa a banca, o percentual e os stops da sessão (ou os
+    padrões, sem login). O percentual é em % da banca (ex.: /risco 5 1).
+    """
+    argumentos = context.args or []
+    sessao = registro.obter(update.effective_chat.id)
+    try:
+        parametros = {
+            "percentual_aposta": _numero(argumentos[0]) / 100 if len(argumentos) > 0 else None,
+            "gales": int(argumentos[1]) if len(argumentos) > 1 else 0,
+            "stop_win": _numero(argumentos[2]) if len(argumentos) > 2 else None,
+            "stop_loss": -abs(_numero(argumentos[3])) if len(argumentos) > 3 else None,
+        }
+    except ValueError:
+        await update.message.reply_text("❌ Use: /risco [percentual] [gales] [stop_win] [stop_loss]\n"
+                                        "Exemplo: /risco 2 1 5 5")
+        return
+    if sessao is not None:
+        parametros["banca"] = sessao.banca
+        for campo in ("percentual_aposta", "stop_win", "stop_loss"):
+            if parametros[campo] is None:
+                parametros[campo] = getattr(sessao, campo)
+    parametros = {campo: valor for campo, valor in parametros.items() if valor is not None}
+
+    # O motor (NumPy) só é carregado no primeiro /risco; consultas repetidas saem do cache
+    from src.risco import resumo_risco, simular_risco
 
-# Função para enviar o sinal de aposta via Telegram
-async def enviar_sinal():
-    global saldo_dia, usuario_logado
     try:
-        # Verificar se há um usuário logado
-        if usuario_logado is None:
-            await enviar_mensagem("❌ Você precisa fazer login para continuar. Use o comando /login Nome Senha.")
-            return
+        resultado = await asyncio.to_thread(simular_risco, **parametros)
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {e}")
+        return
+    except Exception as e:
+        logging.error(f"Erro ao simular o risco: {e}")
+        await update.message.reply_text("❌ Erro ao simular o risco.")
+        return
+    await update.message.reply_text(resumo_risco(resultado))
+
+async def exibir_metricas(update, context):
+    resumo = metricas.resumo()
+    linhas = ["📈 Métricas do processo"]
+    for nome, h in resumo["histogramas"].items():
+        linhas.append(f"⏱ {nome}: {h['contagem']}x, p50 {h['p50_ms']} ms, p95 {h['p95_ms']} ms")
+    for nome, valor in resumo["contadores"].items():
+        linhas.append(f"🔢 {nome}: {valor}")
+    for nome, valor in sorted(resumo["medidas"].items()):
+        linhas.append(f"📊 {nome}: {valor}")
+    # Limite de 4096 caracteres por mensagem do Telegram
+    await update.message.reply_text("\n".join(linhas)[:4000])
+
+# Medidas instantâneas do bot para o /metrics e o /metricas
+def _medidas_do_bot():
+    medidas = {f"blaze_despachante_{chave}": valor for chave, valor in despachante.metricas().items()}
+    medidas.update({f"blaze_pool_{chave}": valor for chave, valor in obter_pool().estatisticas().items()})
+    medidas["blaze_apostas_pendentes"] = agendador.pendentes
+    medidas["blaze_sessoes"] = len(registro)
+    medidas["blaze_logs_descartados"] = logs.descartados()
+    medidas["blaze_escritas_pendentes"] = obter_escritor().pendentes
+    medidas["blaze_bancas_em_cache"] = len(bancas)
+    return medidas
+
+def _registrar_entrega(futuro, gerado_em, created_at=None):
+    if not futuro.cancelled() and futuro.exception() is None:
+        if gerado_em is not None:
+            metricas.observar("blaze_sinal_entrega_segundos", time.perf_counter() - gerado_em)
+        if created_at is not None:
+            metricas.observar("blaze_rodada_sinal_segundos", max(0, agora_ms() - created_at) / 1000)
+
+def _registrar_liquidacao(futuro, created_at):
+    if not futuro.cancelled() and futuro.exception() is None and created_at is not None:
+        metricas.observar("blaze_rodada_liquidacao_segundos", max(0, agora_ms() - created_at) / 1000)
+
+# Função para enviar o sinal de uma sessão e acompanhar a aposta
+async def enviar_sinal_para(sessao, cor, horario_entrada, gerado_em=None, created_at=None):
+    """Envia o sinal à sessão e acompanha a aposta; retorna True se a aposta foi agendada."""
+    # Verificar limites antes de continuar
+    if await verificar_limites(sessao):
+        logging.info(f"Sinal para {sessao.nome} bloqueado devido a stop-win ou stop-loss.")
+        return False
 
-        # Obter informações do usuário logado
-        nome_usuario = usuario_logado["nome"]
-        senha_usuario = usuario_logado["senha"]
-        banca_atual = obter_banca_atual(nome_usuario, senha_usuario)
+    # Calcular o valor da aposta como uma porcentagem da banca
+    valor_aposta = sessao.valor_aposta()
 
-        # Verificar se a banca está configurada
-        if banca_atual is None:
-            logging.error("Banca não encontrada. Operações pausadas.")
-            await enviar_mensagem(
-                "❌ Banca não encontrada! Use o comando /registrar para criar uma conta com sua banca inicial:\n"
-                "Exemplo: /registrar pedro 1415 100.00"
-            )
-            return
+    # Criar e enviar mensagem sobre o sinal
+    mensagem = (
+        f"🎯 Sinal de Aposta: Apostar no **{nome_cor(cor).upper()}** 💰\n"
+        f"💵 Valor: R${valor_aposta:.2f}\n"
+        f"🕒 Hora da entrada: {horario_entrada}\n"
+        f"📊 Saldo do dia: R${sessao.saldo_dia:.2f}"
+    )
+    chave = f"sinal:{sessao.chat_id}:{horario_entrada}"
+    entrega = await enviar_mensagem(f"{mensagem}\n\n🔄 Aguardando o resultado da rodada...", sessao.chat_id, chave=chave)
+    if entrega is not None and (gerado_em is not None or created_at is not None):
+        entrega.add_done_callback(lambda futuro: _registrar_entrega(futuro, gerado_em, created_at))
 
-        # Verificar limites antes de continuar
-        if verificar_limites():
-            logging.info("Tentativa de envio de sinal bloqueada devido a stop-win ou stop-loss.")
-            return
+    # Registrar aposta no banco de dados e verificar o resultado
+    return await registrar_aposta_e_verificar_resultado(sessao, cor, valor_aposta, mensagem, chave)
 
-        # Calcular o valor da aposta como uma porcentagem da banca
-        percentual_aposta = 0.02  # 2% da banca
-        valor_aposta = banca_atual * percentual_aposta
+# Função para enviar o sinal de aposta via Telegram
+async def enviar_sinal(cor=None, created_at=None):
+    """Distribui o sinal (calculado uma única vez) para todas as sessões ativas.
+
+    Sem `cor`, o sinal é calculado aqui. `created_at` é o da rodada que gerou
+    o sinal (para a métrica rodada -> sinal entregue). Retorna True se alguma
+    sessão apostou (e a aposta já foi liquidada); False se não houve sinal,
+    sessão ativa ou aposta agendada.
+    """
+    try:
+        gerado_em = time.perf_counter()
+        sessoes = registro.ativas()
+        if not sessoes:
+            return False
 
         # Obter o sinal de aposta
-        cor, _ = gerar_sinal_aposta()  # Função para análise e geração do sinal
+        if cor is None:
+            cor, _ = await asyncio.to_thread(gerar_sinal_aposta)  # Função para análise e geração do sinal
+        if cor is None:
+            return False
         horario_entrada = datetime.now().strftime("%H:%M:%S")  # Hora do próximo sorteio
 
-        # Criar e enviar mensagem sobre o sinal
-        mensagem = (
-            f"🎯 Sinal de Aposta: Apostar no **{cor.upper()}** 💰\n"
-            f"💵 Valor: R${valor_aposta:.2f}\n"
-            f"🕒 Hora da entrada: {horario_entrada}\n"
-            f"📊 Saldo do dia: R${saldo_dia:.2f}\n\n"
-            "🔄 Aguardando o resultado da rodada..."
-        )
-        await enviar_mensagem(mensagem)
-        logging.info(f"Sinal enviado: {cor} - R${valor_aposta:.2f} - Hora: {horario_entrada}")
+        apostas = 0
+
+        async def enviar_e_contar(sessao):
+            nonlocal apostas
+            if await enviar_sinal_para(sessao, cor, horario_entrada, gerado_em, created_at):
+                apostas += 1
 
-        # Registrar aposta no banco de dados e verificar o resultado
-        await registrar_aposta_e_verificar_resultado(cor, valor_aposta)
+        latencias = await distribuir(sessoes, enviar_e_contar)
+        logging.info(f"Sinal enviado: {nome_cor(cor)} - {len(latencias)} sessão(ões), {apostas} aposta(s) - "
+                     f"Hora: {horario_entrada}",
+                     extra={"cor": cor, "sessoes": len(latencias), "apostas": apostas, "horario_entrada": horario_entrada})
+        return apostas > 0
 
     except Exception as e:
         logging.error(f"Erro ao enviar sinal: {e}")
+        return False
 
 # Função para enviar a mensagem no Telegram
-async def enviar_mensagem(texto):
+async def enviar_mensagem(texto, chat_id=CHAT_ID, chave=None, ultima=False):
+    """Coloca a mensagem na fila do despachante e retorna o futuro da entrega.
+
+    Mensagens com a mesma `chave` viram edições da primeira. O envio (limites
+    de taxa, 429 e novas tentativas) fica por conta do despachante.
+    """
     try:
-        if not TOKEN or not CHAT_ID:
+        if not TOKEN or not chat_id:
             raise ValueError("Erro: Telegram TOKEN ou CHAT_ID inválidos. Verifique suas configurações!")
+        if despachante is None:
+            raise RuntimeError("Bot não iniciado: chame init() antes de enviar mensagens.")
 
-        await bot.send_message(chat_id=CHAT_ID, text=texto)
-        logging.info(f"Mensagem enviada para o Telegram: {texto}")
+        return despachante.enviar(chat_id, texto, chave=chave, ultima=ultima)
     except Exception as e:
         logging.error(f"Erro ao enviar mensagem no Telegram: {e}")
 
-# Função principal para rodar o bot continuamente
-async def run_bot():
-    global usuario_logado  # Garantir que estamos usando a variável global
+# Inicia os comandos, a liquidação e o despachante; encerra tudo na saída do bloco
+@asynccontextmanager
+async def bot_em_execucao():
+    from telegram.ext import Application, CommandHandler
+
+    init()
+    configurar_logs()
+
+    # Criar tabelas necessárias no banco de dados
+    await asyncio.to_thread(criar_tabelas)
+
+    # Índice de padrões do sinal (reserva das regras), montado antes do primeiro sinal
+    from src.padroes import obter_indice
+    await asyncio.to_thread(obter_indice)
+    # Estratégias em modo sombra: avaliadas em cada rodada gravada, sem apostar (/ranking),
+    # com os padrões lidos do mesmo índice
+    from src.estrategias import obter_executor
+    await asyncio.to_thread(obter_executor)
+
+    # Comandos de cada usuário (as sessões são separadas por chat)
+    application = Application.builder().bot(bot).build()
+    application.add_handler(CommandHandler("login", login_usuario))
+    application.add_handler(CommandHandler("registrar", registrar_usuario))
+    application.add_handler(CommandHandler("sair", sair_usuario))
+    application.add_handler(CommandHandler("saldo", saldo_usuario))
+    application.add_handler(CommandHandler("stats", estatisticas))
+    application.add_handler(CommandHandler("historico", historico_usuario))
+    application.add_handler(CommandHandler("padrao", padrao))
+    application.add_handler(CommandHandler("risco", risco))
+    application.add_handler(CommandHandler("ranking", ranking))
+    application.add_handler(CommandHandler(["metricas", "metrics"], exibir_metricas))
+    metricas.medir(_medidas_do_bot)
+
+    # Liquidação das apostas: acordada pelo coletor (mesmo processo) ou pela verificação periódica do banco
+    agendador.iniciar()
+    obter_escritor().iniciar()
+    if agendador.notificar_rodada not in ouvintes_rodada:
+        ao_salvar_rodada(agendador.notificar_rodada)
+    despachante.iniciar()
+
     try:
-        # Criar tabelas necessárias no banco de dados
-        criar_tabelas()
-
-        # Enviar mensagem inicial ao Telegram pedindo login ou registro
-        await enviar_mensagem(
-            "👋 Bem-vindo ao bot de apostas!\n"
-            "Para começar, faça login ou registre-se:\n\n"
-            "1️⃣ Use **/login Nome Senha** para acessar sua conta.\n"
-            "2️⃣ Use **/registrar Nome Senha BancaInicial** para criar uma nova conta."
-        )
+        async with application:
+            await application.start()
+            await application.updater.start_polling()
+
+            # Enviar mensagem inicial ao Telegram pedindo login ou registro
+            await enviar_mensagem(
+                "👋 Bem-vindo ao bot de apostas!\n"
+                "Para começar, faça login ou registre-se:\n\n"
+                "1️⃣ Use **/login Nome Senha** para acessar sua conta.\n"
+                "2️⃣ Use **/registrar Nome Senha BancaInicial** para criar uma nova conta.\n\n"
+                "📊 Depois: /saldo (hoje), /historico (7 dias), /stats (cores das rodadas), "
+                "/padrao (o que costuma sair depois das últimas cores), "
+                "/risco (risco de ruína da sua gestão de banca) "
+                "e /ranking (estratégias avaliadas em modo sombra)."
+            )
+            try:
+                yield application
+            finally:
+                # Entrega o que ainda está na fila antes de desligar a conexão com o Telegram
+                await despachante.parar()
+                await application.updater.stop()
+                await application.stop()
+    finally:
+        metricas.remover_medidor(_medidas_do_bot)
+        await agendador.parar()
+        # Grava as apostas e bancas que ainda estão no escritor em lote
+        await asyncio.to_thread(obter_escritor().parar)
+
+# Função principal para rodar o bot sozinho (o coletor roda em outro processo)
+def run():
+    asyncio.run(run_bot())
 
-        # Iniciar o loop contínuo para envio de sinais
-        while True:
-            if usuario_logado:
-                await enviar_sinal()  # Envia o sinal apenas se o usuário estiver logado
-            else:
-                logging.info("Aguardando login do usuário antes de enviar sinais.")
-                await asyncio.sleep(30)  # Intervalo para verificar novamente
+async def run_bot():
+    try:
+        async with bot_em_execucao():
+            # Iniciar o loop contínuo para envio de sinais
+            while True:
+                # Um único sinal para todos os usuários logados
+                # Sem aposta agendada (ninguém logado, nenhuma regra disparou ou falha ao agendar),
+                # espera a próxima rodada em vez de tentar de novo na hora
+                if not await enviar_sinal():
+                    logging.info(f"Nenhuma aposta agendada; aguardando a próxima rodada. "
+                                 f"Sessões ativas: {len(registro.ativas())}. Despachante: {despachante.metricas()}")
+                    await asyncio.sleep(DURACAO_RODADA_MS / 1000)
     except Exception as e:
         logging.error(f"Erro ao rodar o bot: {e}")
 
 if __name__ == "__main__":
-    asyncio.run(run_bot())  # Executa o bot de forma assíncrona
+    run()  # Executa o bot de forma assíncrona
@@ -0,0 +1,144 @@
+import os
+import hmac
+import hashlib
+import logging
+import secrets
+import threading
+
+from src import consultas
+from src.banco import conexao
+from src.escrita import obter_escritor
+from src.metricas import cronometrado
+
+# Senhas guardadas como "pbkdf2_sha256$iterações$sal$hash" (sal e hash em hex). As iterações ficam
+# em cada registro, então dá para aumentá-las sem invalidar as senhas antigas (que são refeitas no login)
+ALGORITMO = "pbkdf2_sha256"
+ITERACOES = int(os.environ.get("BLAZE_HASH_ITERACOES", 200_000))
+TAMANHO_SAL = 16
+# Comparado quando o nome não existe (mesmo custo do PBKDF2; nenhuma senha tem esse hash)
+_HASH_FALSO = f"{ALGORITMO}${ITERACOES}${'00' * TAMANHO_SAL}${'00' * 32}"
+
+
+def gerar_hash(senha, iteracoes=None):
+    iteracoes = iteracoes or ITERACOES
+    sal = secrets.token_bytes(TAMANHO_SAL)
+    resumo = hashlib.pbkdf2_hmac("sha256", senha.encode(), sal, iteracoes)
+    return f"{ALGORITMO}${iteracoes}${sal.hex()}${resumo.hex()}"
+
+
+def e_hash(armazenada):
+    return armazenada.startswith(ALGORITMO + "$")
+
+
+def verificar_senha(senha, armazenada):
+    """Compara a senha com o hash guardado em tempo constante (aceita senhas antigas em texto puro)."""
+    if not e_hash(armazenada):
+        return hmac.compare_digest(senha.encode(), armazenada.encode())
+    try:
+        _, iteracoes, sal, resumo = armazenada.split("$")
+        calculado = hashlib.pbkdf2_hmac("sha256", senha.encode(), bytes.fromhex(sal), int(iteracoes))
+    except ValueError:
+        return False
+    return hmac.compare_digest(calculado.hex(), resumo)
+
+
+def precisa_refazer(armazenada):
+    """True para senhas em texto puro ou com menos iterações que as atuais."""
+    return not e_hash(armazenada) or int(armazenada.split("$")[1]) < ITERACOES
+
+
+class CacheBancas:
+    """Banca de cada usuário em memória, pelo id; toda atualização também vai para o banco.
+
+    A gravação é pelo escritor em lote com a chave ("banca", id), então
+    várias atualizações do mesmo usuário no mesmo lote viram um UPDATE só.
+    As sessões do mesmo usuário em chats diferentes leem a mesma banca.
+    """
+
+    def __init__(self):
+        self._bancas = {}
+        self._trava = threading.Lock()
+
+    def __len__(self):
+        return len(self._bancas)
+
+    def __contains__(self, usuario_id):
+        return usuario_id in self._bancas
+
+    def obter(self, usuario_id):
+        """Banca do usuário (lida do banco só na primeira vez), ou None se ele não existir."""
+        banca = self._bancas.get(usuario_id)
+        if banca is None:
+            with conexao() as conn:
+                linha = conn.execute(consultas.BANCA_POR_ID, (usuario_id,)).fetchone()
+            if linha is None:
+                return None
+            banca = self.iniciar(usuario_id, linha[0])
+        return banca
+
+    def iniciar(self, usuario_id, banca):
+        """Guarda a banca lida do banco, sem sobrescrever uma mais recente que já esteja em memória."""
+        with self._trava:
+            return self._bancas.setdefault(usuario_id, banca)
+
+    def somar(self, usuario_id, valor):
+        """Soma `valor` à banca em memória e retorna a nova banca (gravar com atualizar/gravar)."""
+        with self._trava:
+            self._bancas[usuario_id] = self._bancas.get(usuario_id, 0.0) + valor
+            return self._bancas[usuario_id]
+
+    def atualizar(self, usuario_id, banca):
+        """Define a banca e envia o UPDATE ao escritor; retorna o concurrent.futures.Future da escrita."""
+        with self._trava:
+            self._bancas[usuario_id] = banca
+        return obter_escritor().enviar(consultas.ATUALIZAR_BANCA, (banca, usuario_id), chave=("banca", usuario_id))
+
+    async def gravar(self, usuario_id):
+        """Grava a banca em memória do usuário e espera o lote do escritor."""
+        return await obter_escritor().executar(consultas.ATUALIZAR_BANCA, (self._bancas[usuario_id], usuario_id),
+                                               chave=("banca", usuario_id))
+
+    def esquecer(self, usuario_id=None):
+        with self._trava:
+            if usuario_id is None:
+                self._bancas.clear()
+            else:
+                self._bancas.pop(usuario_id, None)
+
+
+# Cache compartilhado pelo bot (sessões e comandos)
+bancas = CacheBancas()
+
+
+@cronometrado()
+def cadastrar(nome, senha, banca):
+    """Insere o usuário com a senha em hash e retorna o id (sqlite3.IntegrityError se o nome já existe)."""
+    senha_hash = gerar_hash(senha)
+    with conexao() as conn:
+        usuario_id = conn.execute(consultas.INSERIR_USUARIO, (nome, senha_hash, banca)).lastrowid
+    bancas.iniciar(usuario_id, banca)
+    return usuario_id
+
+
+@cronometrado()
+def autenticar(nome, senha):
+    """Confere nome e senha (uma vez, no /login) e retorna (id, banca), ou None.
+
+    O usuário é buscado pelo nome (índice único) e a senha comparada com o
+    hash. Senhas antigas (texto puro ou menos iterações) são refeitas aqui.
+    """
+    with conexao() as conn:
+        usuario = conn.execute(consultas.USUARIO_POR_NOME, (nome,)).fetchone()
+    if usuario is None:
+        # Mesmo custo de um usuário existente, para não revelar quais nomes estão cadastrados
+        verificar_senha(senha, _HASH_FALSO)
+        return None
+    usuario_id, armazenada, banca = usuario
+    if not verificar_senha(senha, armazenada):
+        return None
+    if precisa_refazer(armazenada):
+        with conexao() as conn:
+            conn.execute(consultas.ATUALIZAR_SENHA, (gerar_hash(senha), usuario_id))
+        logging.info(f"Senha do usuário {nome} guardada novamente com o hash atual.")
+    return usuario_id, bancas.iniciar(usuario_id, banca)
+